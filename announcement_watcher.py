@@ -0,0 +1,319 @@
+import json
+import os
+import queue
+import threading
+
+
+class AnnouncementWatcher:
+    """
+    Long-running watcher of the 'ServiceAnnouncement' events of the Federation contract.
+
+    The watcher reads the logs of every new block range with 'eth_getLogs' (woken up by a 'newHeads'
+    subscription), so announcements made before a consumer of the queue starts waiting, or several
+    announcements in the same block, are never lost. The last processed block is stored on disk and the
+    watcher resumes from it after a restart. Each announcement is de-duplicated and, if the service is
+    still open, pushed into a bounded queue per consumer (e.g. the experiments and the bid workers, each
+    of them receives every announcement). The queues are created when their consumer starts (see
+    add_consumer and remove_consumer), so only the announcements someone takes are queued. When a queue is
+    full the watcher stops advancing its cursor until the consumer takes an announcement (back-pressure).
+
+    The stored cursor only moves past a block once every announcement of the block has been handled by
+    its consumers (see done), so the announcements still queued or in progress are read again after a
+    restart.
+    """
+
+    def __init__(self, web3, ws_client, federation_contract, get_service_states, cursor_path,
+                 consumers=("default",), max_queue_size=100, lookback_blocks=20, max_block_range=1000,
+                 poll_interval=10):
+        """
+        Args:
+            web3 (Web3): Connected Web3 instance.
+            ws_client (WebsocketClient): Started websocket client used for the 'newHeads' subscription.
+            federation_contract (Contract): The Federation contract instance.
+            get_service_states (callable): Function that returns the states of a list of service IDs.
+            cursor_path (str): JSON file where the last processed block is stored.
+            consumers (tuple): Names of the consumers, each one with its own queue of announcements (more can be
+                               added with add_consumer and removed with remove_consumer).
+            max_queue_size (int): Maximum number of pending announcements in each queue.
+            lookback_blocks (int): Blocks to scan before the current one when there is no stored cursor.
+            max_block_range (int): Maximum number of blocks requested in a single 'eth_getLogs' call.
+            poll_interval (int): Seconds between checks for new blocks when no new head notification arrives.
+        """
+        self.web3 = web3
+        self.ws_client = ws_client
+        self.federation_contract = federation_contract
+        self.get_service_states = get_service_states
+        self.cursor_path = cursor_path
+        self.lookback_blocks = lookback_blocks
+        self.max_block_range = max_block_range
+        self.poll_interval = poll_interval
+        self.max_queue_size = max_queue_size
+        self.queues = {consumer: queue.Queue(maxsize=max_queue_size) for consumer in consumers}
+        self.seen = set()  # IDs of the services already processed
+        self.last_block = None
+        self.genesis_hash = None  # Identifies the chain of the stored cursor
+        self.lock = threading.Lock()
+        self.pending = {}  # block number -> announcements of the block queued but not handled yet
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.subscription_id = None
+
+    def load_cursor(self):
+        """
+        Loads the last processed block from disk, ignoring it if it belongs to another contract deployment or chain
+        (e.g. a new development chain deploys the contract at the same address), or if it is above the current head.
+
+        Returns:
+            int: The last processed block, or None if there is no usable cursor.
+        """
+        if not os.path.isfile(self.cursor_path):
+            return None
+        try:
+            with open(self.cursor_path, 'r') as file:
+                stored = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable announcement cursor {self.cursor_path}: {e}")
+            return None
+        if stored.get("contract-address") != self.federation_contract.address or stored.get("genesis-hash") != self.genesis_hash:
+            return None
+        if stored.get("last-block") is not None and stored["last-block"] > self.web3.eth.blockNumber:
+            print(f"Ignoring announcement cursor {self.cursor_path}: block {stored['last-block']} is above the current head")
+            return None
+        return stored.get("last-block")
+
+    def handled_block(self):
+        """
+        Returns:
+            int: The last block whose announcements have all been handled (the cursor stored on disk).
+        """
+        with self.lock:
+            return min(self.pending) - 1 if self.pending else self.last_block
+
+    def save_cursor(self):
+        """
+        Writes the last handled block to disk atomically.
+        """
+        with self.lock:
+            handled_block = min(self.pending) - 1 if self.pending else self.last_block
+            tmp_path = f"{self.cursor_path}.tmp"
+            with open(tmp_path, 'w') as file:
+                json.dump({"contract-address": self.federation_contract.address, "genesis-hash": self.genesis_hash,
+                           "last-block": handled_block}, file)
+            os.replace(tmp_path, self.cursor_path)
+
+    def start(self):
+        """
+        Starts the watcher thread and subscribes to new block headers to wake it up.
+        """
+        self.genesis_hash = self.web3.toHex(self.web3.eth.getBlock(0)['hash'])
+        self.last_block = self.load_cursor()
+        if self.last_block is None:
+            self.last_block = max(-1, self.web3.eth.blockNumber - self.lookback_blocks - 1)
+        print(f"Watching service announcements from block {self.last_block + 1}")
+
+        try:
+            self.subscription_id = self.ws_client.subscribe(['newHeads'], lambda head: self.wakeup.set())
+        except Exception as e:
+            print(f"Failed to subscribe to new block headers, polling every {self.poll_interval} s: {e}")
+
+        self.thread = threading.Thread(target=self._run, name="announcement-watcher", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stops the watcher thread (the cursor keeps the last processed block).
+        """
+        self.stopped.set()
+        self.wakeup.set()
+        if self.subscription_id is not None:
+            self.ws_client.unsubscribe(self.subscription_id)
+            self.subscription_id = None
+
+    def _run(self):
+        while not self.stopped.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"Announcement watcher error: {e}")
+            self.wakeup.wait(self.poll_interval)
+            self.wakeup.clear()
+
+    def sync(self):
+        """
+        Processes the announcements of the blocks between the cursor and the latest block.
+        """
+        latest_block = self.web3.eth.blockNumber
+        if self.last_block > latest_block:
+            # The chain got shorter than the cursor (reorganization): read the recent blocks again (the announcements
+            # already seen are skipped)
+            print(f"Announcement cursor {self.last_block} is above the current head {latest_block}")
+            self.last_block = max(-1, latest_block - self.lookback_blocks - 1)
+        while self.last_block < latest_block and not self.stopped.is_set():
+            from_block = self.last_block + 1
+            to_block = min(latest_block, self.last_block + self.max_block_range)
+            events = self.federation_contract.events.ServiceAnnouncement.getLogs(fromBlock=from_block, toBlock=to_block)
+            self._process(events)
+            if self.stopped.is_set():
+                # Some announcements may not have been queued: keep the cursor so they are read again
+                return
+            self.last_block = to_block
+            self.save_cursor()
+
+    def _process(self, events):
+        new_events = []
+        for event in events:
+            service_id = self.web3.toText(event['args']['id']).rstrip('\x00')
+            if service_id not in self.seen:
+                new_events.append((service_id, event))
+        if not new_events:
+            return
+
+        # Only open services are worth a bid (read in one batched request)
+        service_states = self.get_service_states([service_id for service_id, _ in new_events])
+        for (service_id, event), state in zip(new_events, service_states):
+            self.seen.add(service_id)
+            if state != 0:
+                continue
+            announcement = {
+                "service-id": service_id,
+                "requirements": self.web3.toText(event['args']['requirements']).rstrip('\x00'),
+                "block-number": event['blockNumber'],
+                "tx-hash": self.web3.toHex(event['transactionHash'])
+            }
+            with self.lock:
+                consumer_queues = list(self.queues.items())
+            for consumer, announcements in consumer_queues:
+                # Counted before it is queued, since a consumer may handle it right away
+                with self.lock:
+                    self.pending[event['blockNumber']] = self.pending.get(event['blockNumber'], 0) + 1
+                # Block (back-pressure) while the queue is full, but never beyond a stop request or the removal of
+                # the consumer
+                while not self.stopped.is_set() and self.queues.get(consumer) is announcements:
+                    try:
+                        announcements.put(announcement, timeout=1)
+                        break
+                    except queue.Full:
+                        continue
+                else:
+                    self._release(event['blockNumber'])
+                    continue
+                if self.queues.get(consumer) is not announcements:
+                    # Removed while the announcement was being queued
+                    self._drain(announcements)
+
+    def add_consumer(self, consumer):
+        """
+        Adds a consumer with its own queue, which receives the announcements processed from now on.
+
+        Args:
+            consumer (str): Name of the consumer (nothing changes if it already exists).
+        """
+        with self.lock:
+            self.queues.setdefault(consumer, queue.Queue(maxsize=self.max_queue_size))
+
+    def remove_consumer(self, consumer):
+        """
+        Removes the queue of a consumer that stops taking announcements (e.g. at the end of an experiment), so its
+        queued announcements no longer hold the cursor and a full queue no longer blocks the watcher.
+
+        Args:
+            consumer (str): Name of the consumer (nothing changes if it does not exist).
+        """
+        with self.lock:
+            announcements = self.queues.pop(consumer, None)
+        if announcements is not None:
+            self._drain(announcements)
+            self.save_cursor()
+
+    def _drain(self, announcements):
+        while True:
+            try:
+                announcement = announcements.get_nowait()
+            except queue.Empty:
+                return
+            self._release(announcement["block-number"])
+
+    def done(self, announcement):
+        """
+        Marks an announcement taken from a queue as handled, so the stored cursor can move past its block.
+
+        Args:
+            announcement (dict): The announcement returned by next_announcement or next_announcements.
+        """
+        self._release(announcement["block-number"])
+        self.save_cursor()
+
+    def _release(self, block_number):
+        with self.lock:
+            self.pending[block_number] -= 1
+            if self.pending[block_number] == 0:
+                del self.pending[block_number]
+
+    def next_announcements(self, consumer="default", max_count=1, timeout=None):
+        """
+        Takes the next open service announcements from the queue of a consumer: waits for one and takes up to
+        max_count - 1 more if they are already queued. The state of the services is checked again when they
+        are taken (another provider may have won them while they were queued) and the closed ones are skipped.
+        Each returned announcement must be marked with done once it has been handled.
+
+        Args:
+            consumer (str): Name of the consumer.
+            max_count (int): Maximum number of announcements.
+            timeout (int): Timeout in seconds of the wait for the first announcement (None waits forever).
+
+        Returns:
+            list: The service ID, requirements, block number and transaction hash of each announcement.
+
+        Raises:
+            queue.Empty: If no open service announcement arrives within the timeout.
+        """
+        announcements = self.queues[consumer]
+        while True:
+            taken = [announcements.get(timeout=timeout)]
+            while len(taken) < max_count:
+                try:
+                    taken.append(announcements.get_nowait())
+                except queue.Empty:
+                    break
+            service_states = self.get_service_states([announcement["service-id"] for announcement in taken])
+            open_announcements = []
+            for announcement, state in zip(taken, service_states):
+                if state == 0:
+                    open_announcements.append(announcement)
+                else:
+                    self.done(announcement)
+            if open_announcements:
+                return open_announcements
+
+    def next_announcement(self, consumer="default", timeout=None):
+        """
+        Takes the next open service announcement from the queue of a consumer (see next_announcements).
+
+        Args:
+            consumer (str): Name of the consumer.
+            timeout (int): Timeout in seconds (None waits forever).
+
+        Returns:
+            dict: The service ID, requirements, block number and transaction hash of the announcement.
+
+        Raises:
+            queue.Empty: If no open service announcement arrives within the timeout.
+        """
+        return self.next_announcements(consumer, 1, timeout)[0]
+
+    def status(self):
+        """
+        Returns the cursor and queue state of the watcher.
+
+        Returns:
+            dict: The last processed and handled blocks, the number of queued announcements per consumer and of
+                  services seen.
+        """
+        return {
+            "last-block": self.last_block,
+            "handled-block": self.handled_block(),
+            "queued-announcements": {consumer: announcements.qsize() for consumer, announcements in list(self.queues.items())},
+            "seen-services": len(self.seen),
+            "running": self.thread is not None and self.thread.is_alive()
+        }
@@ -0,0 +1,156 @@
+"""
+Gas and throughput benchmarks of the Federation contract on an in-process EVM (eth-tester + py-evm).
+
+Deploys the current source of the Federation contract (or another version, see FEDERATION_VERSION) on a
+fresh in-process chain and measures, with pytest-benchmark, the wall time of each contract call. The gas
+used by the measured call is stored in the 'gas' field of the benchmark extra info. Covered:
+- PlaceBid with bid pools of 1 to 500 bids (MAX_BIDS_PER_SERVICE, the largest pool that ReleaseService deletes
+  within the block gas limit), and GetBid/GetBids lookups and ChooseProvider against those pools.
+- AnnounceService with up to 1000 services already announced.
+- The transactions-per-block ceiling of each federation step at the gasLimit of the genesis block.
+
+No Ethereum node or network is needed. Requirements: pip install -r requirements-dev.txt
+Usage (from the repository root):
+    python3 -m pytest benchmarks/bench_federation.py --benchmark-only -s [--benchmark-json federation.json]
+
+Environment variables:
+    FEDERATION_VERSION: 'worktree' (current source, default), 'artifact' (committed truffle build) or a git reference.
+"""
+import json
+import os
+
+import pytest
+from web3 import Web3, EthereumTesterProvider
+
+from gas_report import ENDPOINT_CONSUMER, ENDPOINT_PROVIDER, EXTERNAL_IP, REQUIREMENTS, deploy, load_version, transact
+
+
+GENESIS = "docker-images/dlt-node/scripts/genesis.json"
+POOL_SIZES = [1, 10, 100, 500]  # A service holds at most MAX_BIDS_PER_SERVICE (500) bids
+SERVICE_COUNTS = [1, 100, 1000]
+
+
+class Federation:
+    """
+    Federation contract deployed on a fresh in-process chain, with a registered consumer and provider.
+    """
+
+    def __init__(self, abi, bytecode):
+        self.web3 = Web3(EthereumTesterProvider())
+        self.consumer, self.provider = self.web3.eth.accounts[:2]
+        receipt = deploy(self.web3, abi, bytecode, self.consumer)
+        self.functions = self.web3.eth.contract(address=receipt['contractAddress'], abi=abi).functions
+        self.services = 0
+        self.transact(self.functions.addOperator(self.text("AD1")), self.consumer)
+        self.transact(self.functions.addOperator(self.text("AD2")), self.provider)
+
+    def text(self, value):
+        return self.web3.toBytes(text=value)
+
+    def transact(self, contract_function, sender):
+        return transact(self.web3, contract_function, sender)
+
+    def announce(self):
+        service_id = self.text(f"service{self.services}")
+        self.services += 1
+        gas = self.transact(self.functions.AnnounceService(
+            _requirements=self.text(REQUIREMENTS), _endpoint_consumer=self.text(ENDPOINT_CONSUMER), _id=service_id), self.consumer)
+        return service_id, gas
+
+    def bid(self, service_id, price=10):
+        return self.transact(self.functions.PlaceBid(
+            _id=service_id, _price=price, _endpoint=self.text(ENDPOINT_PROVIDER)), self.provider)
+
+    def service_with_bids(self, bids):
+        service_id, _ = self.announce()
+        for index in range(bids):
+            self.bid(service_id, 10 + index % 100)
+        return service_id
+
+
+@pytest.fixture(scope="module")
+def contract_version():
+    return load_version(os.getenv("FEDERATION_VERSION", "worktree"))
+
+
+@pytest.fixture
+def federation(contract_version):
+    return Federation(*contract_version)
+
+
+@pytest.fixture(scope="module")
+def genesis_gas_limit():
+    return int(json.load(open(GENESIS))["gasLimit"], 0)
+
+
+@pytest.mark.parametrize("pool_size", POOL_SIZES)
+def test_place_bid(benchmark, federation, pool_size):
+    # Each round places bid number pool_size on a new service that already has pool_size - 1 bids
+    def setup():
+        return (federation.service_with_bids(pool_size - 1),), {}
+
+    gas = benchmark.pedantic(federation.bid, setup=setup, rounds=3, iterations=1)
+    benchmark.extra_info["gas"] = gas
+
+
+@pytest.mark.parametrize("pool_size", POOL_SIZES)
+def test_get_bid(benchmark, federation, pool_size):
+    service_id = federation.service_with_bids(pool_size)
+    get_bid = federation.functions.GetBid(service_id, pool_size - 1, federation.consumer)
+    benchmark(get_bid.call)
+    benchmark.extra_info["gas"] = get_bid.estimateGas({'from': federation.consumer})
+
+
+@pytest.mark.parametrize("pool_size", POOL_SIZES)
+def test_get_bids(benchmark, federation, pool_size):
+    if not hasattr(federation.functions, "GetBids"):
+        pytest.skip("GetBids is not available in this contract version")
+    service_id = federation.service_with_bids(pool_size)
+    get_bids = federation.functions.GetBids(service_id, 0, pool_size, federation.consumer)
+    benchmark(get_bids.call)
+    benchmark.extra_info["gas"] = get_bids.estimateGas({'from': federation.consumer})
+
+
+@pytest.mark.parametrize("pool_size", POOL_SIZES)
+def test_choose_provider(benchmark, federation, pool_size):
+    # Each round closes a new service whose pool holds pool_size bids, choosing the last one
+    def setup():
+        return (federation.service_with_bids(pool_size),), {}
+
+    def choose_provider(service_id):
+        return federation.transact(federation.functions.ChooseProvider(_id=service_id, bider_index=pool_size - 1), federation.consumer)
+
+    gas = benchmark.pedantic(choose_provider, setup=setup, rounds=3, iterations=1)
+    benchmark.extra_info["gas"] = gas
+
+
+@pytest.mark.parametrize("service_count", SERVICE_COUNTS)
+def test_announce_service(benchmark, federation, service_count):
+    for _ in range(service_count - 1):
+        federation.announce()
+    _, gas = benchmark.pedantic(federation.announce, rounds=5, iterations=1)
+    benchmark.extra_info["gas"] = gas
+
+
+def test_transactions_per_block(benchmark, federation, genesis_gas_limit):
+    # Complete federation (announce, bid, choose provider, deploy), measured as a whole
+    def federate():
+        service_id, announce_gas = federation.announce()
+        gas = {"AnnounceService": announce_gas, "PlaceBid": federation.bid(service_id)}
+        gas["ChooseProvider"] = federation.transact(federation.functions.ChooseProvider(_id=service_id, bider_index=0), federation.consumer)
+        gas["ServiceDeployed"] = federation.transact(federation.functions.ServiceDeployed(
+            info=federation.text(EXTERNAL_IP), _id=service_id), federation.provider)
+        return gas
+
+    gas = benchmark.pedantic(federate, rounds=5, iterations=1)
+    gas["federation"] = sum(gas.values())
+
+    # Upper bound of transactions (or complete federations) that fit in one block of the private network
+    ceilings = {step: genesis_gas_limit // step_gas for step, step_gas in gas.items()}
+    benchmark.extra_info["gas"] = gas
+    benchmark.extra_info["per-block-ceiling"] = ceilings
+    benchmark.extra_info["block-gas-limit"] = genesis_gas_limit
+
+    print(f"\nTransactions per block at gasLimit {genesis_gas_limit}:")
+    for step, ceiling in ceilings.items():
+        print(f"  {step:<18}{gas[step]:>10} gas{ceiling:>8} per block")
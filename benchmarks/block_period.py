@@ -0,0 +1,286 @@
+"""
+Block period sensitivity benchmark of the federation (clique PoA network).
+
+For each clique period (0 = blocks sealed on demand, 1, 2 and 5 seconds by default) the driver:
+- starts a local single-signer clique network (geth) from docker-images/dlt-node/scripts/genesis.json with
+  that period, using the node1 account as the signer,
+- deploys the Federation contract (current source, see contract_build.py) and starts a consumer and a provider
+  orchestrator (main.py with uvicorn) connected to it,
+- runs N federations through the start_experiments_{flow} endpoints with export_to_csv=true and collects
+  the CSV files of each run,
+and reports the latency distribution of each federation step per period (seconds since the start of the
+flow of each domain, as in the experiment CSVs).
+
+The orchestrators deploy the federated services in Kubernetes, so the driver runs on the testbed host with
+the k8s-cluster-config files exported and geth installed. Accounts and keys come from dlt-network-docker/.env.
+
+Usage (from the repository root):
+    python3 benchmarks/block_period.py [--periods 0 1 2 5] [--runs 10] [--flow v1] [--output block-period-results]
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+from dotenv import dotenv_values
+from web3 import Web3, WebsocketProvider
+from web3.middleware import geth_poa_middleware
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from contract_build import load_contract
+
+
+GENESIS = "docker-images/dlt-node/scripts/genesis.json"
+KEYSTORE = "docker-images/dlt-node/node1/keystore"
+PASSWORD_FILE = "docker-images/dlt-node/scripts/password.txt"
+NETWORK_ENV = "dlt-network-docker/.env"
+TX_GAS = 6721975  # Block gas limit of the private network (genesis)
+
+# Requests sent before, after each run and after all the runs of each flow (as in experiments/start_experiments_*.sh)
+FLOWS = {
+    "v1": {
+        "setup": [],
+        "cleanup": [("provider", "DELETE", "/delete_object_detection_service", None)],
+        "teardown": []
+    },
+    "v2": {
+        "setup": [("consumer", "POST", "/deploy_object_detection_federation_component?domain=consumer&service_to_wait=mediamtx-service", None)],
+        "cleanup": [("provider", "DELETE", "/delete_object_detection_federation_component",
+                     {"domain": "provider", "pod_prefixes": ["object-detector-"]})],
+        "teardown": [("consumer", "DELETE", "/delete_object_detection_federation_component",
+                      {"domain": "consumer", "pod_prefixes": ["frontend-", "sampler-sender-", "receiver-encoder-publisher-", "mediamtx-"]})]
+    }
+}
+
+
+def wait_until(check, timeout, description):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if check():
+                return
+        except Exception:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"Timed out waiting for {description}")
+
+
+def start_chain(period, workdir, signer, ws_port, geth):
+    """
+    Starts a single-signer clique network with the given block period.
+
+    Returns:
+        Popen: The geth process.
+    """
+    genesis = json.load(open(GENESIS))
+    genesis["config"]["clique"]["period"] = period
+    genesis["extraData"] = "0x" + "00" * 32 + signer[2:].lower() + "00" * 65
+    genesis_path = os.path.join(workdir, "genesis.json")
+    with open(genesis_path, 'w') as file:
+        json.dump(genesis, file, indent=2)
+
+    datadir = os.path.join(workdir, "geth")
+    shutil.copytree(KEYSTORE, os.path.join(datadir, "keystore"))
+    subprocess.run([geth, "init", "--datadir", datadir, genesis_path], check=True, capture_output=True)
+    log = open(os.path.join(workdir, "geth.log"), 'w')
+    return subprocess.Popen([
+        geth, "--datadir", datadir, "--networkid", str(genesis["config"]["chainId"]), "--syncmode", "full",
+        "--nodiscover", "--maxpeers", "0", "--port", "0", "--ipcdisable", "--authrpc.port", str(ws_port + 1),
+        "--ws", "--ws.addr", "127.0.0.1", "--ws.port", str(ws_port), "--ws.api", "eth,net,web3",
+        "--mine", "--miner.etherbase", signer, "--unlock", signer, "--password", PASSWORD_FILE,
+        "--allow-insecure-unlock", "--snapshot=false"
+    ], stdout=log, stderr=subprocess.STDOUT)
+
+
+def deploy_federation(ws_url, private_key):
+    """
+    Deploys the current source of the Federation contract.
+
+    Returns:
+        str: The contract address.
+    """
+    web3 = Web3(WebsocketProvider(ws_url))
+    web3.middleware_onion.inject(geth_poa_middleware, layer=0)
+    wait_until(web3.isConnected, 30, "the Ethereum node")
+    account = web3.eth.account.from_key(private_key)
+    abi, bytecode = load_contract("Federation")
+    transaction = web3.eth.contract(abi=abi, bytecode=bytecode).constructor(web3.eth.chainId).buildTransaction({
+        'from': account.address,
+        'nonce': web3.eth.getTransactionCount(account.address),
+        'gas': TX_GAS,
+        'gasPrice': web3.eth.gasPrice,
+        'chainId': web3.eth.chainId
+    })
+    tx_hash = web3.eth.sendRawTransaction(account.sign_transaction(transaction).rawTransaction)
+    return web3.eth.waitForTransactionReceipt(tx_hash, timeout=120)['contractAddress']
+
+
+def start_orchestrator(role, port, workdir, env_file, consumer_port):
+    """
+    Starts main.py (uvicorn) for a domain, answering its domain prompt.
+
+    Returns:
+        Popen: The uvicorn process.
+    """
+    env = dict(os.environ,
+               FEDERATION_ENV_FILE=env_file,
+               CONSUMER_API_PORT=str(consumer_port),
+               GAS_PROFILE_PATH=os.path.join(workdir, f"gas-profile-{role}.json"),
+               EVENT_INDEX_PATH=os.path.join(workdir, f"federation-events-{role}.db"),
+               ANNOUNCEMENT_CURSOR_PATH=os.path.join(workdir, f"announcement-cursor-{role}.json"))
+    log = open(os.path.join(workdir, f"{role}.log"), 'w')
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+                               stdin=subprocess.PIPE, stdout=log, stderr=subprocess.STDOUT, env=env)
+    process.stdin.write(f"{role}\n".encode())
+    process.stdin.close()
+    wait_until(lambda: requests.get(f"http://127.0.0.1:{port}/", timeout=5).status_code == 200, 120, f"the {role} orchestrator")
+    return process
+
+
+def send(urls, role, method, path, body=None):
+    response = requests.request(method, urls[role] + path, json=body, timeout=600)
+    if response.status_code != 200:
+        raise RuntimeError(f"{method} {path} ({role}) failed: {response.status_code} {response.text}")
+    return response.json()
+
+
+def csv_files(role):
+    directory = os.path.join("experiments", role)
+    return set(os.listdir(directory)) if os.path.isdir(directory) else set()
+
+
+def read_steps(path):
+    with open(path, newline='') as file:
+        return {row['step']: float(row['timestamp']) for row in csv.DictReader(file)}
+
+
+def run_federations(urls, flow, runs, output_dir):
+    """
+    Runs the federations of one period and moves the CSV files of each run to the output directory.
+
+    Returns:
+        list: The steps of each run ({'consumer': {step: seconds}, 'provider': {step: seconds}}).
+    """
+    results = []
+    for request in FLOWS[flow]["setup"]:
+        send(urls, *request)
+    for run in range(1, runs + 1):
+        previous = {role: csv_files(role) for role in urls}
+        provider = threading.Thread(target=send, args=(urls, "provider", "POST", f"/start_experiments_provider_{flow}?export_to_csv=true"))
+        provider.start()
+        send(urls, "consumer", "POST", f"/start_experiments_consumer_{flow}?export_to_csv=true")
+        provider.join()
+
+        steps = {}
+        for role in urls:
+            for name in sorted(csv_files(role) - previous[role]):
+                target = os.path.join(output_dir, f"{role}_run_{run}.csv")
+                shutil.move(os.path.join("experiments", role, name), target)
+                steps[role] = read_steps(target)
+        results.append(steps)
+        print(f"Federation {run}/{runs} completed")
+
+        for request in FLOWS[flow]["cleanup"]:
+            send(urls, *request)
+        time.sleep(2)
+    for request in FLOWS[flow]["teardown"]:
+        send(urls, *request)
+    return results
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(results):
+    """
+    Returns the latency distribution of each step of each domain.
+
+    Returns:
+        dict: '<role>/<step>' -> number of samples, mean, p50, p90, min and max (seconds).
+    """
+    samples = {}
+    for steps in results:
+        for role, role_steps in steps.items():
+            for step, seconds in role_steps.items():
+                samples.setdefault(f"{role}/{step}", []).append(seconds)
+    return {
+        name: {
+            "samples": len(values),
+            "mean": sum(values) / len(values),
+            "p50": percentile(values, 0.5),
+            "p90": percentile(values, 0.9),
+            "min": min(values),
+            "max": max(values)
+        }
+        for name, values in samples.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Federation latency per clique block period")
+    parser.add_argument("--periods", type=int, nargs="+", default=[0, 1, 2, 5], help="Clique periods in seconds (0: on demand)")
+    parser.add_argument("--runs", type=int, default=10, help="Federations per period")
+    parser.add_argument("--flow", choices=sorted(FLOWS), default="v1", help="Experiment flow (start_experiments_{flow})")
+    parser.add_argument("--output", default="block-period-results", help="Directory of the CSV files and the report")
+    parser.add_argument("--geth", default="geth", help="Path of the geth binary")
+    parser.add_argument("--ws-port", type=int, default=3344, help="Websocket port of the local node")
+    parser.add_argument("--consumer-port", type=int, default=8000, help="Port of the consumer orchestrator")
+    parser.add_argument("--provider-port", type=int, default=8001, help="Port of the provider orchestrator")
+    args = parser.parse_args()
+
+    network = dotenv_values(NETWORK_ENV)
+    signer = Web3.toChecksumAddress(network["ETHERBASE_NODE_1"])
+    ws_url = f"ws://127.0.0.1:{args.ws_port}"
+    urls = {"consumer": f"http://127.0.0.1:{args.consumer_port}", "provider": f"http://127.0.0.1:{args.provider_port}"}
+    report = {}
+
+    for period in args.periods:
+        print(f"\nBlock period {period} s: starting the network")
+        output_dir = os.path.join(args.output, f"period-{period}")
+        os.makedirs(output_dir, exist_ok=True)
+        workdir = tempfile.mkdtemp(prefix=f"block-period-{period}-")
+        processes = [start_chain(period, workdir, signer, args.ws_port, args.geth)]
+        try:
+            contract_address = deploy_federation(ws_url, network["PRIVATE_KEY_NODE_1"])
+            env_file = os.path.join(workdir, "federation.env")
+            with open(env_file, 'w') as file:
+                file.write("\n".join([
+                    f"WS_NODE_1_URL={ws_url}", f"WS_NODE_2_URL={ws_url}", f"CONTRACT_ADDRESS={contract_address}",
+                    f"ETHERBASE_NODE_1={network['ETHERBASE_NODE_1']}", f"PRIVATE_KEY_NODE_1={network['PRIVATE_KEY_NODE_1']}",
+                    f"ETHERBASE_NODE_2={network['ETHERBASE_NODE_2']}", f"PRIVATE_KEY_NODE_2={network['PRIVATE_KEY_NODE_2']}",
+                    "IP_NODE_1=127.0.0.1", "IP_NODE_2=127.0.0.1"
+                ]) + "\n")
+            processes.append(start_orchestrator("consumer", args.consumer_port, workdir, env_file, args.consumer_port))
+            processes.append(start_orchestrator("provider", args.provider_port, workdir, env_file, args.consumer_port))
+            for role in urls:
+                send(urls, role, "POST", "/register_domain")
+
+            report[period] = summarize(run_federations(urls, args.flow, args.runs, output_dir))
+        finally:
+            for process in reversed(processes):
+                process.terminate()
+                process.wait()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(os.path.join(args.output, "report.json"), 'w') as file:
+        json.dump(report, file, indent=2)
+
+    for period, steps in report.items():
+        print(f"\nBlock period {period} s")
+        print(f"{'step':<56}{'n':>4}{'mean':>9}{'p50':>9}{'p90':>9}{'max':>9}")
+        for name, stats in sorted(steps.items(), key=lambda item: item[1]["mean"]):
+            print(f"{name:<56}{stats['samples']:>4}{stats['mean']:>9.2f}{stats['p50']:>9.2f}{stats['p90']:>9.2f}{stats['max']:>9.2f}")
+    print(f"\nReport written to {os.path.join(args.output, 'report.json')}")
+
+
+if __name__ == '__main__':
+    main()
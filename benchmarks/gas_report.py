@@ -0,0 +1,201 @@
+"""
+Gas report of the Federation contract functions on a local in-process EVM (eth-tester + py-evm).
+
+Deploys two versions of the Federation contract and runs the same federation scenario on both:
+- before: the committed truffle artifact (smart-contracts/build/contracts/Federation.json, default), or the
+  contract source at a git reference (--before <ref>), compiled with solc 0.5.0.
+- after: the contract source of the working tree (smart-contracts/contracts/Federation.sol).
+
+Transactions report the gas used from their receipt. View functions report eth_estimateGas (i.e. including
+the 21000 base cost of a transaction). Functions that do not exist in one of the versions are shown as '-'.
+
+No Ethereum node is needed. Requirements: pip install -r requirements-dev.txt
+Usage (from the repository root):
+    python3 benchmarks/gas_report.py [--before artifact|<git ref>] [--batch-size 10] [--markdown]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from web3 import Web3, EthereumTesterProvider
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from contract_build import compile_source, load_contract
+from signed_bids import sign_bid
+
+
+CONTRACT_ARTIFACT = "smart-contracts/build/contracts/Federation.json"
+CONTRACT_SOURCE = "smart-contracts/contracts/Federation.sol"
+REQUIREMENTS = "service=object-detector;replicas=1"
+ENDPOINT_CONSUMER = "10.5.50.70"
+ENDPOINT_PROVIDER = "10.5.50.71"
+EXTERNAL_IP = "10.5.50.85"
+TX_GAS = 6721975  # Block gas limit of the private network (genesis)
+
+
+def load_version(version):
+    """
+    Returns the ABI and bytecode of a version of the Federation contract.
+
+    Args:
+        version (str): 'artifact', 'worktree' or a git reference.
+
+    Returns:
+        tuple: The ABI and the deployment bytecode.
+    """
+    if version == 'artifact':
+        artifact = json.load(open(CONTRACT_ARTIFACT))
+        return artifact['abi'], artifact['bytecode']
+    if version == 'worktree':
+        return load_contract("Federation")
+    source = subprocess.run(['git', 'show', f'{version}:{CONTRACT_SOURCE}'], check=True, capture_output=True, text=True).stdout
+    return compile_source(source)
+
+
+def deploy(web3, abi, bytecode, sender):
+    """
+    Deploys a version of the Federation contract (versions with signed bids take the chain ID in the constructor).
+
+    Returns:
+        dict: The deployment transaction receipt.
+    """
+    constructor = next((entry for entry in abi if entry.get('type') == 'constructor'), None)
+    args = [web3.eth.chainId] if constructor is not None and constructor['inputs'] else []
+    tx_hash = web3.eth.contract(abi=abi, bytecode=bytecode).constructor(*args).transact({'from': sender, 'gas': TX_GAS})
+    return web3.eth.waitForTransactionReceipt(tx_hash)
+
+
+def transact(web3, contract_function, sender):
+    tx_hash = contract_function.transact({'from': sender, 'gas': TX_GAS})
+    receipt = web3.eth.waitForTransactionReceipt(tx_hash)
+    if receipt['status'] != 1:
+        raise RuntimeError(f"{contract_function.fn_name} reverted")
+    return receipt['gasUsed']
+
+
+def run_scenario(abi, bytecode, batch_size):
+    """
+    Deploys a version of the contract on a fresh in-process chain and measures a complete federation
+    (register, announce, two bids, choose provider, deploy), and, if available, a federation with an off-chain
+    signed bid, the batch entry points and the announcements whose winner is selected by the contract (deadline
+    settled with SettleService, and instant accept).
+
+    Returns:
+        dict: Gas used by each measured function.
+    """
+    web3 = Web3(EthereumTesterProvider())
+    consumer, provider, second_provider = web3.eth.accounts[:3]
+    receipt = deploy(web3, abi, bytecode, consumer)
+    contract = web3.eth.contract(address=receipt['contractAddress'], abi=abi)
+    functions = contract.functions
+    available = {entry['name'] for entry in abi if entry.get('type') == 'function'}
+    text = lambda value: web3.toBytes(text=value)
+    service_id = text("service1718000000")
+
+    gas = {"deployment": receipt['gasUsed']}
+    gas["addOperator"] = transact(web3, functions.addOperator(text("AD1")), consumer)
+    transact(web3, functions.addOperator(text("AD2")), provider)
+    transact(web3, functions.addOperator(text("AD3")), second_provider)
+    gas["getOperatorInfo (call)"] = functions.getOperatorInfo(consumer).estimateGas({'from': consumer})
+
+    gas["AnnounceService"] = transact(web3, functions.AnnounceService(
+        _requirements=text(REQUIREMENTS), _endpoint_consumer=text(ENDPOINT_CONSUMER), _id=service_id), consumer)
+    gas["GetServiceState (call)"] = functions.GetServiceState(service_id).estimateGas({'from': consumer})
+
+    gas["PlaceBid (first bid)"] = transact(web3, functions.PlaceBid(
+        _id=service_id, _price=10, _endpoint=text(ENDPOINT_PROVIDER)), provider)
+    gas["PlaceBid (second bid)"] = transact(web3, functions.PlaceBid(
+        _id=service_id, _price=12, _endpoint=text(ENDPOINT_PROVIDER)), second_provider)
+    gas["GetBidCount (call)"] = functions.GetBidCount(service_id, consumer).estimateGas({'from': consumer})
+    gas["GetBid (call)"] = functions.GetBid(service_id, 0, consumer).estimateGas({'from': consumer})
+    if "GetBids" in available:
+        gas["GetBids (call)"] = functions.GetBids(service_id, 0, 100, consumer).estimateGas({'from': consumer})
+
+    gas["ChooseProvider"] = transact(web3, functions.ChooseProvider(_id=service_id, bider_index=0), consumer)
+    gas["isWinner (call)"] = functions.isWinner(service_id, provider).estimateGas({'from': provider})
+
+    gas["ServiceDeployed"] = transact(web3, functions.ServiceDeployed(info=text(EXTERNAL_IP), _id=service_id), provider)
+    gas["GetServiceInfo (call)"] = functions.GetServiceInfo(service_id, False, consumer).estimateGas({'from': consumer})
+
+    if "ReleaseService" in available:
+        gas["ReleaseService"] = transact(web3, functions.ReleaseService(service_id), provider)
+
+    gas["federation total"] = sum(gas[step] for step in
+                                  ("AnnounceService", "PlaceBid (first bid)", "ChooseProvider", "ServiceDeployed"))
+
+    if "AcceptSignedBid" in available:
+        # Federation with an off-chain signed bid: no PlaceBid nor ChooseProvider transaction
+        signed_id = text("signed1718000000")
+        transact(web3, functions.AnnounceService(
+            _requirements=text(REQUIREMENTS), _endpoint_consumer=text(ENDPOINT_CONSUMER), _id=signed_id), consumer)
+        provider_key = web3.provider.ethereum_tester.backend.account_keys[1]
+        bid = sign_bid(provider_key, web3.eth.chainId, contract.address, "signed1718000000", consumer, 10,
+                       ENDPOINT_PROVIDER, web3.eth.blockNumber + 10)
+        gas["AcceptSignedBid"] = transact(web3, functions.AcceptSignedBid(
+            signed_id, bid["price"], text(ENDPOINT_PROVIDER), bid["expiry-block"], bid["v"],
+            web3.toBytes(hexstr=bid["r"]), web3.toBytes(hexstr=bid["s"])), consumer)
+        transact(web3, functions.ServiceDeployed(info=text(EXTERNAL_IP), _id=signed_id), provider)
+        gas["signed federation total"] = gas["AnnounceService"] + gas["AcceptSignedBid"] + gas["ServiceDeployed"]
+
+    if {"AnnounceServices", "PlaceBids"} <= available:
+        batch_ids = [text(f"batch{index}") for index in range(batch_size)]
+        gas[f"AnnounceServices ({batch_size})"] = transact(web3, functions.AnnounceServices(
+            reqs=[text(REQUIREMENTS)] * batch_size, endpoints=[text(ENDPOINT_CONSUMER)] * batch_size, ids=batch_ids), consumer)
+        gas[f"PlaceBids ({batch_size})"] = transact(web3, functions.PlaceBids(
+            ids=batch_ids, prices=[10] * batch_size, endpoint=text(ENDPOINT_PROVIDER)), provider)
+
+    if {"AnnounceServiceWithDeadline", "SettleService"} <= available:
+        deadline_id = text("deadline1718000000")
+        gas["AnnounceServiceWithDeadline"] = transact(web3, functions.AnnounceServiceWithDeadline(
+            _requirements=text(REQUIREMENTS), _endpoint_consumer=text(ENDPOINT_CONSUMER), _id=deadline_id,
+            deadline_blocks=2, max_bids=0), consumer)
+        gas["PlaceBid (deadline, first bid)"] = transact(web3, functions.PlaceBid(
+            _id=deadline_id, _price=10, _endpoint=text(ENDPOINT_PROVIDER)), provider)
+        web3.provider.ethereum_tester.mine_blocks(2)
+        gas["SettleService"] = transact(web3, functions.SettleService(deadline_id), consumer)
+
+    if "AnnounceServiceWithMaxPrice" in available:
+        instant_id = text("instant1718000000")
+        gas["AnnounceServiceWithMaxPrice"] = transact(web3, functions.AnnounceServiceWithMaxPrice(
+            _requirements=text(REQUIREMENTS), _endpoint_consumer=text(ENDPOINT_CONSUMER), _id=instant_id,
+            max_price=10), consumer)
+        gas["PlaceBid (instant accept)"] = transact(web3, functions.PlaceBid(
+            _id=instant_id, _price=10, _endpoint=text(ENDPOINT_PROVIDER)), provider)
+
+    return gas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Federation contract gas report (before/after)")
+    parser.add_argument("--before", default="artifact", help="'artifact' (committed build) or a git reference")
+    parser.add_argument("--after", default="worktree", help="'worktree' (current source), 'artifact' or a git reference")
+    parser.add_argument("--batch-size", type=int, default=10, help="Services per batch transaction")
+    parser.add_argument("--markdown", action="store_true", help="Print the report as a Markdown table (as in README.md)")
+    args = parser.parse_args()
+
+    before = run_scenario(*load_version(args.before), args.batch_size)
+    after = run_scenario(*load_version(args.after), args.batch_size)
+
+    rows = []
+    for name in list(before) + [name for name in after if name not in before]:
+        gas_before, gas_after = before.get(name), after.get(name)
+        if gas_before is None or gas_after is None:
+            rows.append((name, gas_before if gas_before is not None else '-', gas_after if gas_after is not None else '-', '', ''))
+            continue
+        delta = gas_after - gas_before
+        rows.append((name, gas_before, gas_after, f"{delta:+}", f"{100 * delta / gas_before:+.1f}%"))
+
+    if args.markdown:
+        print("| function | before | after | delta | delta % |\n|---|---:|---:|---:|---:|")
+        for row in rows:
+            print("| " + " | ".join(str(value) for value in row) + " |")
+        return
+    print(f"{'function':<32}{'before':>12}{'after':>12}{'delta':>12}{'delta %':>10}")
+    for name, gas_before, gas_after, delta, delta_percent in rows:
+        print(f"{name:<32}{gas_before:>12}{gas_after:>12}{delta:>12}{delta_percent:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Microbenchmark of the cost of encoding and signing the federation transactions.
+
+Compares, for AnnounceService, PlaceBid, ChooseProvider and ServiceDeployed:
+- contract-function: the original path (ContractFunction + buildTransaction + sign). Gas, gas price and
+  chain ID are given so that no RPC is made and only the local encoding/signing cost is measured.
+- template: pre-encoded calldata template (tx_templates.CallTemplate) + sign.
+- prebuilt: signature of a transaction built in advance, without nonce (prebuild_service_deployed in main.py).
+
+No Ethereum node is needed. Usage (from the repository root):
+    python3 benchmarks/tx_encoding_benchmark.py [--iterations 2000]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+from eth_account import Account
+from web3 import Web3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from contract_build import load_contract
+from tx_templates import CallTemplate
+
+
+CONTRACT_ADDRESS = "0x19e42d35Ae32187929ffdC8aCe2CAC5D5a75b275"
+SERVICE_ID = "service1718000000"
+ENDPOINT = "10.5.50.70"
+EXTERNAL_IP = "10.5.50.85"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Federation transaction encoding/signing microbenchmark")
+    parser.add_argument("--iterations", type=int, default=2000, help="Iterations per measurement")
+    args = parser.parse_args()
+
+    web3 = Web3()
+    contract_abi, _ = load_contract("Federation")
+    contract = web3.eth.contract(abi=contract_abi, address=CONTRACT_ADDRESS)
+    account = Account.create()
+    fees = {'gas': 300000, 'gasPrice': 1000000000, 'chainId': 1234, 'nonce': 0}
+
+    calls = {
+        "AnnounceService": (
+            lambda: contract.functions.AnnounceService(
+                _requirements=web3.toBytes(text="service=object-detector;replicas=1"),
+                _endpoint_consumer=web3.toBytes(text=ENDPOINT),
+                _id=web3.toBytes(text=SERVICE_ID)),
+            CallTemplate(contract, "AnnounceService", _endpoint_consumer=ENDPOINT),
+            {"_requirements": "service=object-detector;replicas=1", "_id": SERVICE_ID}
+        ),
+        "PlaceBid": (
+            lambda: contract.functions.PlaceBid(
+                _id=web3.toBytes(text=SERVICE_ID), _price=10, _endpoint=web3.toBytes(text=ENDPOINT)),
+            CallTemplate(contract, "PlaceBid", _endpoint=ENDPOINT),
+            {"_id": SERVICE_ID, "_price": 10}
+        ),
+        "ChooseProvider": (
+            lambda: contract.functions.ChooseProvider(_id=web3.toBytes(text=SERVICE_ID), bider_index=0),
+            CallTemplate(contract, "ChooseProvider"),
+            {"_id": SERVICE_ID, "bider_index": 0}
+        ),
+        "ServiceDeployed": (
+            lambda: contract.functions.ServiceDeployed(
+                info=web3.toBytes(text=EXTERNAL_IP), _id=web3.toBytes(text=SERVICE_ID)),
+            CallTemplate(contract, "ServiceDeployed"),
+            {"info": EXTERNAL_IP, "_id": SERVICE_ID}
+        )
+    }
+
+    print(f"{'function':<18}{'step':<12}{'contract-function':>20}{'template':>12}{'prebuilt':>12}   (microseconds per call)")
+    for name, (contract_function, template, template_args) in calls.items():
+        # Both paths must produce the same calldata
+        expected = contract_function()._encode_transaction_data()
+        assert Web3.toHex(template.encode(**template_args)) == expected, f"Template mismatch for {name}"
+
+        def contract_function_encode():
+            return contract_function().buildTransaction(dict(fees, **{'from': account.address}))
+
+        def template_encode():
+            return dict(fees, to=CONTRACT_ADDRESS, data=template.encode(**template_args), value=0)
+
+        prebuilt = {EXTERNAL_IP: template_encode()}
+
+        results = {
+            "encode": (
+                timeit.timeit(contract_function_encode, number=args.iterations),
+                timeit.timeit(template_encode, number=args.iterations),
+                None
+            ),
+            "encode+sign": (
+                timeit.timeit(lambda: account.sign_transaction(
+                    {k: v for k, v in contract_function_encode().items() if k != 'from'}), number=args.iterations),
+                timeit.timeit(lambda: account.sign_transaction(template_encode()), number=args.iterations),
+                timeit.timeit(lambda: account.sign_transaction(dict(prebuilt[EXTERNAL_IP], nonce=0)), number=args.iterations)
+            )
+        }
+        for step, (original, templated, prebuilt_sign) in results.items():
+            scale = 1e6 / args.iterations
+            prebuilt_text = f"{prebuilt_sign * scale:>12.2f}" if prebuilt_sign is not None else f"{'-':>12}"
+            print(f"{name:<18}{step:<12}{original * scale:>20.2f}{templated * scale:>12.2f}{prebuilt_text}")
+
+
+if __name__ == '__main__':
+    main()
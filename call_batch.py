@@ -0,0 +1,84 @@
+from hexbytes import HexBytes
+from web3._utils.abi import get_abi_output_types, map_abi_data
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+
+
+def decode_call_result(contract_function, return_data):
+    """
+    Decodes the raw return data of an 'eth_call' the same way ContractFunction.call() does.
+
+    Args:
+        contract_function (ContractFunction): The contract function that was called.
+        return_data (str or bytes): Raw return data of the call.
+
+    Returns:
+        Any: The decoded value (or list of values if the function has several outputs). An exception
+             instance is returned if there is no data to decode.
+    """
+    output_types = get_abi_output_types(contract_function.abi)
+    return_data = HexBytes(return_data)
+    if output_types and not return_data:
+        return ValueError(f"Empty return data for {contract_function.fn_name} (contract not deployed or call reverted)")
+
+    web3 = contract_function.web3
+    output_data = web3.codec.decode_abi(output_types, return_data)
+    normalized_data = map_abi_data(BASE_RETURN_NORMALIZERS, output_types, output_data)
+    if len(normalized_data) == 1:
+        return normalized_data[0]
+    return normalized_data
+
+
+class CallBatch:
+    """
+    Collects contract view calls and executes them as a single JSON-RPC batch of 'eth_call' requests.
+
+    Every call is encoded and decoded exactly as web3 does for ContractFunction.call(), so the results
+    are interchangeable with the ones of individual calls, but N calls cost one websocket round trip.
+    """
+
+    def __init__(self, ws_client, block_identifier='latest'):
+        """
+        Args:
+            ws_client (WebsocketClient): Started websocket client connected to the Ethereum node.
+            block_identifier (int or str): Block at which all the calls are executed. Use a block number
+                                           to read a consistent snapshot.
+        """
+        self.ws_client = ws_client
+        self.block_identifier = hex(block_identifier) if isinstance(block_identifier, int) else block_identifier
+        self.calls = []
+
+    def add(self, contract_function, sender=None):
+        """
+        Adds a contract view call to the batch.
+
+        Args:
+            contract_function (ContractFunction): Contract function with its arguments already bound
+                                                  (e.g. Federation_contract.functions.GetServiceState(_id=...)).
+            sender (str): Optional 'from' address of the call.
+
+        Returns:
+            int: Position of the call result in the list returned by execute().
+        """
+        self.calls.append((contract_function, sender))
+        return len(self.calls) - 1
+
+    def execute(self):
+        """
+        Sends all the collected calls in one batch request and decodes the results.
+
+        Returns:
+            list: Decoded result of each call, in the order they were added. Calls that failed (e.g. reverted)
+                  hold the exception instead of the result.
+        """
+        requests = []
+        for contract_function, sender in self.calls:
+            transaction = {'to': contract_function.address, 'data': contract_function._encode_transaction_data()}
+            if sender is not None:
+                transaction['from'] = sender
+            requests.append(('eth_call', [transaction, self.block_identifier]))
+
+        responses = self.ws_client.batch(requests)
+        return [
+            response if isinstance(response, Exception) else decode_call_result(contract_function, response)
+            for (contract_function, _), response in zip(self.calls, responses)
+        ]
@@ -0,0 +1,67 @@
+"""
+ABI and bytecode of the contracts in smart-contracts/contracts, kept in sync with their source.
+
+The truffle artifacts (smart-contracts/build/contracts) are only rebuilt by 'truffle migrate'. An artifact
+records the source it was compiled from, so an artifact built from an older source is detected and the
+current source is compiled with solc 0.5.0 (the compiler of truffle-config.js) through py-solc-x instead.
+Without py-solc-x a stale artifact is an error: it would deploy or call a contract that no longer exists.
+"""
+import json
+import os
+
+
+CONTRACTS_DIR = "smart-contracts/contracts"
+BUILD_DIR = "smart-contracts/build/contracts"
+SOLC_VERSION = "0.5.0"  # Same compiler as truffle-config.js
+
+
+def compile_source(source, name="Federation"):
+    """
+    Compiles a contract source with solc 0.5.0 (downloaded by py-solc-x on first use).
+
+    Args:
+        source (str): Solidity source.
+        name (str): Name of the contract in the source.
+
+    Returns:
+        tuple: The ABI and the deployment bytecode.
+
+    Raises:
+        RuntimeError: If solc 0.5.0 is not installed and can not be downloaded.
+    """
+    import solcx  # Only needed when the artifact is stale
+    try:
+        solcx.install_solc(SOLC_VERSION)
+    except Exception as e:
+        raise RuntimeError(f"solc {SOLC_VERSION} could not be installed: {e}")
+    compiled = solcx.compile_source(source, output_values=['abi', 'bin'], solc_version=SOLC_VERSION)
+    contract = compiled[f'<stdin>:{name}']
+    return contract['abi'], contract['bin']
+
+
+def load_contract(name="Federation"):
+    """
+    Returns the ABI and bytecode of the current source of a contract: from its truffle artifact if it was
+    built from that source, or compiled otherwise.
+
+    Args:
+        name (str): Contract name (smart-contracts/contracts/<name>.sol).
+
+    Returns:
+        tuple: The ABI and the deployment bytecode.
+
+    Raises:
+        RuntimeError: If the artifact is missing or stale and the source can not be compiled (py-solc-x not
+            installed, or solc 0.5.0 not downloadable).
+    """
+    source = open(os.path.join(CONTRACTS_DIR, f"{name}.sol")).read()
+    artifact_path = os.path.join(BUILD_DIR, f"{name}.json")
+    if os.path.isfile(artifact_path):
+        artifact = json.load(open(artifact_path))
+        if artifact.get("source") == source:
+            return artifact["abi"], artifact["bytecode"]
+    try:
+        return compile_source(source, name)
+    except (ImportError, RuntimeError) as e:
+        raise RuntimeError(f"{artifact_path} was not built from the current {name}.sol and it can not be compiled "
+                           f"({e}): rebuild it with 'truffle migrate' (smart-contracts/deploy.sh)")
@@ -0,0 +1,329 @@
+"""
+In-process development chain for running the federation without the geth network of dlt-network-docker.
+
+The chain is an eth-tester EVM (py-evm) with instant sealing: every transaction is mined in its own block
+as soon as it is received, so the federation flows measure the orchestration overhead without block waits.
+It is served over a websocket JSON-RPC endpoint (including 'eth_subscribe' for 'newHeads' and 'logs'), so
+main.py and its websocket client, transaction tracker, event indexer and watchers use it unchanged.
+
+On start the Federation and FederationMulticall contracts are deployed from their current source (see
+contract_build.py), an account is created, funded and registered for each domain (AD1 consumer, AD2 provider),
+and the addresses and keys are written to an env file that main.py loads.
+
+Requirements: pip install -r requirements-dev.txt
+Usage:
+    DEV_CHAIN=1 ./start_app.sh              # the first domain hosts the chain, the second one joins it
+    python3 dev_chain.py [--port 8546] [--period 0]   # standalone chain (e.g. for CI)
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import threading
+import time
+
+import websockets
+from dotenv import dotenv_values
+from eth_account import Account
+from web3 import Web3, EthereumTesterProvider
+
+from contract_build import load_contract
+
+
+DOMAIN_NAMES = ("AD1", "AD2")
+DOMAIN_FUNDS = Web3.toWei(100, 'ether')
+TX_GAS = 6721975  # Block gas limit of the private network (genesis)
+
+
+def to_json_rpc(value):
+    """
+    Converts a web3/eth-tester result into its JSON-RPC representation (hex quantities and data).
+
+    Args:
+        value (Any): The result.
+
+    Returns:
+        Any: A JSON serializable value.
+    """
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, int):
+        return hex(value)
+    if isinstance(value, (bytes, bytearray)):
+        return '0x' + bytes(value).hex()
+    if hasattr(value, 'items'):
+        return {key: to_json_rpc(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json_rpc(item) for item in value]
+    return value
+
+
+class DevChain:
+    """
+    eth-tester chain served over a websocket JSON-RPC endpoint.
+
+    All the requests are executed on the event loop thread of the server (eth-tester is not thread safe).
+    After each request that can seal blocks, the new blocks are pushed to the 'newHeads' subscriptions and
+    their logs to the matching 'logs' subscriptions.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8546, period=0):
+        """
+        Args:
+            host (str): Address the websocket endpoint listens on.
+            port (int): Port of the websocket endpoint.
+            period (int): Seconds between empty blocks (0 only seals blocks on demand, for each transaction).
+        """
+        self.host = host
+        self.port = port
+        self.period = period
+        self.web3 = Web3(EthereumTesterProvider())
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="dev-chain", daemon=True)
+        self.server = None
+        self.subscriptions = {}  # subscription id -> (connection, params)
+        self.subscription_ids = itertools.count(1)
+        self.last_block = self.web3.eth.blockNumber
+        self.domains = []
+        self.contract_address = None
+        self.multicall_address = None
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self):
+        """
+        Deploys the contracts, sets up the domain accounts and starts serving the chain.
+
+        Raises:
+            OSError: If the port is already in use (e.g. by the chain of another domain).
+        """
+        self.setup()
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._serve(), self.loop).result()
+        print(f"Development chain listening on {self.url} (Federation contract: {self.contract_address})")
+
+    def stop(self):
+        """
+        Stops serving the chain.
+        """
+        if self.server is not None:
+            self.loop.call_soon_threadsafe(self.server.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def setup(self):
+        """
+        Deploys the contracts and creates, funds and registers one account per domain.
+        """
+        funder = self.web3.eth.accounts[0]
+        federation_abi, federation_bytecode = load_contract("Federation")
+        self.contract_address = self.deploy(federation_abi, federation_bytecode, funder, [self.web3.eth.chainId])
+        self.multicall_address = self.deploy(*load_contract("FederationMulticall"), funder, [])
+
+        federation = self.web3.eth.contract(address=self.contract_address, abi=federation_abi)
+        for name in DOMAIN_NAMES:
+            account = Account.create()
+            self.web3.eth.waitForTransactionReceipt(
+                self.web3.eth.sendTransaction({'from': funder, 'to': account.address, 'value': DOMAIN_FUNDS}))
+            transaction = federation.functions.addOperator(Web3.toBytes(text=name)).buildTransaction({
+                'from': account.address,
+                'nonce': self.web3.eth.getTransactionCount(account.address),
+                'gas': TX_GAS,
+                'gasPrice': self.web3.eth.gasPrice,
+                'chainId': self.web3.eth.chainId
+            })
+            signed = account.sign_transaction(transaction)
+            self.web3.eth.waitForTransactionReceipt(self.web3.eth.sendRawTransaction(signed.rawTransaction))
+            self.domains.append(account)
+        self.last_block = self.web3.eth.blockNumber
+
+    def deploy(self, abi, bytecode, sender, constructor_args):
+        """
+        Deploys a contract.
+
+        Raises:
+            ValueError: If the constructor of the ABI does not take the given arguments.
+        """
+        constructor = next((entry for entry in abi if entry.get('type') == 'constructor'), None)
+        inputs = constructor['inputs'] if constructor is not None else []
+        if len(inputs) != len(constructor_args):
+            raise ValueError(f"The contract constructor takes {len(inputs)} arguments, {len(constructor_args)} given")
+        contract = self.web3.eth.contract(abi=abi, bytecode=bytecode)
+        tx_hash = contract.constructor(*constructor_args).transact({'from': sender, 'gas': TX_GAS})
+        return self.web3.eth.waitForTransactionReceipt(tx_hash)['contractAddress']
+
+    def write_env(self, env_path):
+        """
+        Writes the endpoint, contract addresses and domain accounts in the variables read by main.py. The file
+        is replaced atomically, so a joining domain never reads it half written.
+
+        Args:
+            env_path (str): Path of the env file.
+        """
+        lines = [f"WS_NODE_1_URL={self.url}", f"WS_NODE_2_URL={self.url}", f"CONTRACT_ADDRESS={self.contract_address}"]
+        if self.multicall_address is not None:
+            lines.append(f"MULTICALL_ADDRESS={self.multicall_address}")
+        for index, account in enumerate(self.domains, start=1):
+            lines += [f"ETHERBASE_NODE_{index}={account.address}",
+                      f"PRIVATE_KEY_NODE_{index}={account.key.hex()}",
+                      f"IP_NODE_{index}={self.host}"]
+        tmp_path = f"{env_path}.tmp"
+        with open(tmp_path, 'w') as file:
+            file.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, env_path)
+
+    async def _serve(self):
+        self.server = await websockets.serve(self._handler, self.host, self.port, max_size=None)
+        if self.period > 0:
+            self.loop.create_task(self._seal_periodically())
+
+    async def _seal_periodically(self):
+        while True:
+            await asyncio.sleep(self.period)
+            self.web3.provider.ethereum_tester.mine_blocks()
+            await self._notify_new_blocks()
+
+    async def _handler(self, conn, path=None):
+        try:
+            async for raw in conn:
+                message = json.loads(raw)
+                if isinstance(message, list):
+                    response = [self._execute(conn, item) for item in message]
+                else:
+                    response = self._execute(conn, message)
+                await conn.send(json.dumps(response))
+                await self._notify_new_blocks()
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            for subscription_id in [key for key, (owner, _) in self.subscriptions.items() if owner is conn]:
+                del self.subscriptions[subscription_id]
+
+    def _execute(self, conn, request):
+        response = {"jsonrpc": "2.0", "id": request.get("id")}
+        method, params = request.get("method"), request.get("params") or []
+        try:
+            if method == 'eth_subscribe':
+                subscription_id = hex(next(self.subscription_ids))
+                self.subscriptions[subscription_id] = (conn, params)
+                response["result"] = subscription_id
+            elif method == 'eth_unsubscribe':
+                response["result"] = self.subscriptions.pop(params[0], None) is not None
+            else:
+                response["result"] = to_json_rpc(self.web3.manager.request_blocking(method, params))
+        except Exception as e:
+            response["error"] = {"code": -32000, "message": str(e)}
+        return response
+
+    async def _notify_new_blocks(self):
+        latest_block = self.web3.eth.blockNumber
+        while self.last_block < latest_block:
+            self.last_block += 1
+            block_number = hex(self.last_block)
+            for subscription_id, (conn, params) in list(self.subscriptions.items()):
+                if params[0] == 'newHeads':
+                    results = [self.web3.manager.request_blocking('eth_getBlockByNumber', [block_number, False])]
+                elif params[0] == 'logs':
+                    log_filter = dict(params[1] if len(params) > 1 else {}, fromBlock=block_number, toBlock=block_number)
+                    results = self.web3.manager.request_blocking('eth_getLogs', [log_filter])
+                else:
+                    continue
+                for result in results:
+                    notification = {
+                        "jsonrpc": "2.0",
+                        "method": "eth_subscription",
+                        "params": {"subscription": subscription_id, "result": to_json_rpc(result)}
+                    }
+                    try:
+                        await conn.send(json.dumps(notification))
+                    except websockets.ConnectionClosed:
+                        self.subscriptions.pop(subscription_id, None)
+                        break
+
+
+def env_matches_chain(env):
+    """
+    Checks that an env file describes the chain currently served at its endpoint, and not a previous run
+    (the contract address is the same in every run, the domain accounts are new).
+
+    Args:
+        env (dict): Variables of the env file.
+
+    Returns:
+        bool: True if the Federation contract is deployed and both domain accounts are funded on the chain.
+    """
+    web3 = Web3(Web3.WebsocketProvider(env["WS_NODE_1_URL"]))
+    if web3.eth.getCode(env["CONTRACT_ADDRESS"]) in (b'', b'\x00'):
+        return False
+    return all(web3.eth.getBalance(env[f"ETHERBASE_NODE_{index}"]) > 0 for index in range(1, len(DOMAIN_NAMES) + 1))
+
+
+def wait_for_env(env_path, timeout=60):
+    """
+    Waits until the env file describes the running chain (the domain that serves it writes the file right after
+    it starts listening).
+
+    Args:
+        env_path (str): Env file written by the domain that serves the chain.
+        timeout (int): Timeout in seconds.
+
+    Raises:
+        TimeoutError: If the env file does not match the running chain within the timeout.
+    """
+    deadline = time.time() + timeout
+    while True:
+        try:
+            if os.path.isfile(env_path) and env_matches_chain(dotenv_values(env_path)):
+                return
+        except Exception as e:
+            print(f"Waiting for {env_path}: {e}")
+        if time.time() > deadline:
+            raise TimeoutError(f"{env_path} does not describe the running development chain after {timeout} seconds")
+        time.sleep(0.5)
+
+
+def start_or_join(env_path, host="127.0.0.1", port=8546, period=0):
+    """
+    Starts the development chain in this process, or joins the one started by the other domain once its env file
+    is written.
+
+    Args:
+        env_path (str): Env file with the chain endpoint, contract addresses and domain accounts.
+        host (str): Address of the websocket endpoint.
+        port (int): Port of the websocket endpoint.
+        period (int): Seconds between empty blocks (0 only seals blocks on demand).
+
+    Returns:
+        DevChain: The chain started in this process, or None if it was already served by another process.
+    """
+    chain = DevChain(host, port, period)
+    try:
+        chain.start()
+    except OSError as e:
+        chain.stop()
+        print(f"Development chain already running on {chain.url} ({e}): joining it with {env_path}")
+        wait_for_env(env_path)
+        return None
+    chain.write_env(env_path)
+    return chain
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process development chain (eth-tester) for the federation")
+    parser.add_argument("--host", default="127.0.0.1", help="Address of the websocket endpoint")
+    parser.add_argument("--port", type=int, default=8546, help="Port of the websocket endpoint")
+    parser.add_argument("--period", type=int, default=0, help="Seconds between empty blocks (0: on demand only)")
+    parser.add_argument("--env", default="dev-chain.env", help="Env file written for main.py")
+    args = parser.parse_args()
+
+    chain = DevChain(args.host, args.port, args.period)
+    chain.start()
+    chain.write_env(args.env)
+    print(f"Environment written to {args.env}")
+    chain.thread.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,349 @@
+import json
+import sqlite3
+import threading
+
+from eth_utils import event_abi_to_log_topic
+from hexbytes import HexBytes
+
+
+# Events of the Federation contract stored by the indexer
+INDEXED_EVENTS = ('OperatorRegistered', 'ServiceAnnouncement', 'NewBid', 'ServiceAnnouncementClosed', 'ServiceDeployedEvent',
+                  'ServiceReleased')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    number INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    event TEXT NOT NULL,
+    service_id TEXT,
+    args TEXT NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE INDEX IF NOT EXISTS events_by_service ON events (service_id, block_number);
+CREATE INDEX IF NOT EXISTS events_by_name ON events (event, block_number);
+CREATE TABLE IF NOT EXISTS services (
+    service_id TEXT PRIMARY KEY,
+    requirements TEXT,
+    creator TEXT,
+    provider TEXT,
+    state INTEGER NOT NULL,
+    bid_count INTEGER NOT NULL DEFAULT 0,
+    announced_block INTEGER,
+    announced_tx TEXT,
+    closed_block INTEGER,
+    deployed_block INTEGER
+);
+CREATE INDEX IF NOT EXISTS services_by_state ON services (state, announced_block);
+CREATE INDEX IF NOT EXISTS services_by_block ON services (announced_block);
+CREATE INDEX IF NOT EXISTS services_by_creator ON services (creator, announced_block);
+CREATE INDEX IF NOT EXISTS services_by_provider ON services (provider, announced_block);
+CREATE TABLE IF NOT EXISTS operators (
+    address TEXT PRIMARY KEY,
+    name TEXT,
+    block_number INTEGER
+);
+"""
+
+
+def _to_text(value):
+    return value.rstrip(b'\x00').decode('utf-8', errors='replace') if isinstance(value, bytes) else value
+
+
+class EventIndexer:
+    """
+    Incremental local index of the Federation contract logs, stored in SQLite.
+
+    On every new block header the indexer fetches the logs of the contract for the new block range with a
+    single 'eth_getLogs' call, stores them and derives the state of each service (open, closed, deployed)
+    and its bid count (released services are removed). Read queries by service ID, state or block range
+    are then answered from the local database without any request to the Ethereum node.
+
+    Chain reorganizations are detected by comparing the stored hashes of the last indexed blocks with the
+    canonical chain: the index is rolled back to the common ancestor and the service table is rebuilt
+    from the remaining events.
+    """
+
+    def __init__(self, web3, ws_client, federation_contract, db_path, start_block=0,
+                 max_block_range=1000, poll_interval=10, kept_block_hashes=256):
+        """
+        Args:
+            web3 (Web3): Connected Web3 instance.
+            ws_client (WebsocketClient): Started websocket client used for the 'newHeads' subscription.
+            federation_contract (Contract): The Federation contract instance.
+            db_path (str): Path of the SQLite database.
+            start_block (int): First block to index when the database is empty (e.g. the deployment block).
+            max_block_range (int): Maximum number of blocks requested in a single 'eth_getLogs' call.
+            poll_interval (int): Seconds between syncs when no new head notification arrives.
+            kept_block_hashes (int): Number of recent block hashes kept to detect reorganizations.
+        """
+        self.web3 = web3
+        self.ws_client = ws_client
+        self.federation_contract = federation_contract
+        self.db_path = db_path
+        self.start_block = start_block
+        self.max_block_range = max_block_range
+        self.poll_interval = poll_interval
+        self.kept_block_hashes = kept_block_hashes
+
+        # Event topic -> contract event used to decode the log
+        self.events_by_topic = {}
+        for event_name in INDEXED_EVENTS:
+            contract_event = getattr(federation_contract.events, event_name)()
+            self.events_by_topic[HexBytes(event_abi_to_log_topic(contract_event.abi))] = contract_event
+
+        # Single writer connection (guarded by the lock); readers use their own per-thread connection (WAL)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.local = threading.local()
+        self.last_block = self._load_last_block()
+
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.subscription_id = None
+
+    def _load_last_block(self):
+        rows = dict(self.conn.execute("SELECT key, value FROM meta").fetchall())
+        genesis_hash = self.web3.toHex(self.web3.eth.getBlock(0)['hash'])
+        if rows.get("contract-address") != self.federation_contract.address or rows.get("genesis-hash") != genesis_hash:
+            # Index of another contract deployment or chain (e.g. a new development chain deploys the contract at
+            # the same address), or a new database: start again with the current schema
+            with self.conn:
+                for table in ("meta", "blocks", "events", "services", "operators"):
+                    self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self.conn.executescript(SCHEMA)
+            with self.conn:
+                self.conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [
+                    ("contract-address", self.federation_contract.address), ("genesis-hash", genesis_hash)])
+            return self.start_block - 1
+        return int(rows.get("last-block", self.start_block - 1))
+
+    def _reader(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self.local.conn = conn
+        return conn
+
+    def start(self):
+        """
+        Starts the indexer thread and subscribes to new block headers to trigger the syncs.
+        """
+        try:
+            self.subscription_id = self.ws_client.subscribe(['newHeads'], lambda head: self.wakeup.set())
+        except Exception as e:
+            print(f"Failed to subscribe to new block headers, indexing every {self.poll_interval} s: {e}")
+        self.thread = threading.Thread(target=self._run, name="event-indexer", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stops the indexer thread.
+        """
+        self.stopped.set()
+        self.wakeup.set()
+        if self.subscription_id is not None:
+            self.ws_client.unsubscribe(self.subscription_id)
+            self.subscription_id = None
+
+    def _run(self):
+        while not self.stopped.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"Event indexer error: {e}")
+            self.wakeup.wait(self.poll_interval)
+            self.wakeup.clear()
+
+    def sync(self):
+        """
+        Indexes the logs of the blocks between the last indexed block and the latest block,
+        rolling the index back first if the chain was reorganized.
+        """
+        with self.lock:
+            self._check_reorg()
+            latest_block = self.web3.eth.blockNumber
+            while self.last_block < latest_block and not self.stopped.is_set():
+                from_block = self.last_block + 1
+                to_block = min(latest_block, self.last_block + self.max_block_range)
+                to_block_hash = self.web3.toHex(self.web3.eth.getBlock(to_block)['hash'])
+                logs = self.web3.eth.getLogs({
+                    'address': self.federation_contract.address,
+                    'fromBlock': from_block,
+                    'toBlock': to_block
+                })
+                self._store(logs, to_block, to_block_hash)
+
+    def _check_reorg(self):
+        latest_block = self.web3.eth.blockNumber
+        stored_blocks = self.conn.execute("SELECT number, hash FROM blocks ORDER BY number DESC").fetchall()
+        for number, block_hash in stored_blocks:
+            # A stored block above the head is not in the canonical chain any more (the chain got shorter)
+            if number <= latest_block and self.web3.toHex(self.web3.eth.getBlock(number)['hash']) == block_hash:
+                if number != stored_blocks[0][0]:
+                    print(f"Chain reorganization detected: rolling the event index back to block {number}")
+                    self._rollback(number)
+                return
+        if stored_blocks or self.last_block > latest_block:
+            print("Chain reorganization deeper than the stored block hashes: rebuilding the event index")
+            self._rollback(self.start_block - 1)
+
+    def _rollback(self, block_number):
+        with self.conn:
+            self.conn.execute("DELETE FROM events WHERE block_number > ?", (block_number,))
+            self.conn.execute("DELETE FROM blocks WHERE number > ?", (block_number,))
+            self.conn.execute("DELETE FROM operators WHERE block_number > ?", (block_number,))
+            # Rebuild the derived service states from the remaining events
+            self.conn.execute("DELETE FROM services")
+            rows = self.conn.execute(
+                "SELECT block_number, tx_hash, event, service_id, args FROM events ORDER BY block_number, log_index"
+            ).fetchall()
+            for block_number_, tx_hash, event_name, service_id, args in rows:
+                self._apply(block_number_, tx_hash, event_name, service_id, json.loads(args))
+            self._set_last_block(block_number)
+
+    def _set_last_block(self, block_number):
+        self.last_block = block_number
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last-block', ?)", (str(block_number),))
+
+    def _store(self, logs, to_block, to_block_hash):
+        with self.conn:
+            for log in logs:
+                if not log['topics']:
+                    continue
+                contract_event = self.events_by_topic.get(HexBytes(log['topics'][0]))
+                if contract_event is None:
+                    continue
+                event = contract_event.processLog(log)
+                args = {name: _to_text(value) for name, value in event['args'].items()}
+                service_id = args.get('id', args.get('_id'))
+                tx_hash = self.web3.toHex(event['transactionHash'])
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO events (block_number, log_index, tx_hash, event, service_id, args) VALUES (?, ?, ?, ?, ?, ?)",
+                    (event['blockNumber'], event['logIndex'], tx_hash, event['event'], service_id, json.dumps(args))
+                )
+                self.conn.execute("INSERT OR REPLACE INTO blocks (number, hash) VALUES (?, ?)",
+                                  (event['blockNumber'], self.web3.toHex(event['blockHash'])))
+                self._apply(event['blockNumber'], tx_hash, event['event'], service_id, args)
+
+            self.conn.execute("INSERT OR REPLACE INTO blocks (number, hash) VALUES (?, ?)", (to_block, to_block_hash))
+            self.conn.execute("DELETE FROM blocks WHERE number < ?", (to_block - self.kept_block_hashes,))
+            self._set_last_block(to_block)
+
+    def _apply(self, block_number, tx_hash, event_name, service_id, args):
+        if event_name == 'OperatorRegistered':
+            self.conn.execute("INSERT OR REPLACE INTO operators (address, name, block_number) VALUES (?, ?, ?)",
+                              (args['operator'], args['name'], block_number))
+        elif event_name == 'ServiceAnnouncement':
+            self.conn.execute(
+                "INSERT OR REPLACE INTO services (service_id, requirements, creator, state, bid_count, announced_block, announced_tx) VALUES (?, ?, ?, 0, 0, ?, ?)",
+                (service_id, args['requirements'], args.get('creator'), block_number, tx_hash)
+            )
+        elif event_name == 'NewBid':
+            self.conn.execute("UPDATE services SET bid_count = MAX(bid_count, ?) WHERE service_id = ?",
+                              (args['max_bid_index'], service_id))
+        elif event_name == 'ServiceAnnouncementClosed':
+            self.conn.execute("UPDATE services SET state = MAX(state, 1), provider = ?, closed_block = ? WHERE service_id = ?",
+                              (args.get('provider'), block_number, service_id))
+        elif event_name == 'ServiceDeployedEvent':
+            self.conn.execute("UPDATE services SET state = 2, deployed_block = ? WHERE service_id = ?",
+                              (block_number, service_id))
+        elif event_name == 'ServiceReleased':
+            # Released services are deleted from the SC (their events are kept)
+            self.conn.execute("DELETE FROM services WHERE service_id = ?", (service_id,))
+
+    def get_service(self, service_id):
+        """
+        Returns the indexed state of a service.
+
+        Args:
+            service_id (str): The unique identifier of the service.
+
+        Returns:
+            dict: The service (ID, requirements, state, bid count and blocks of each step), or None if it is not indexed.
+        """
+        row = self._reader().execute("SELECT * FROM services WHERE service_id = ?", (service_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def get_services(self, state=None, from_block=None, to_block=None, creator=None, provider=None, limit=100):
+        """
+        Returns the indexed services, newest announcement first.
+
+        Args:
+            state (int): Only services in this state (0 for Open, 1 for Closed, 2 for Deployed).
+            from_block (int): Only services announced at or after this block.
+            to_block (int): Only services announced at or before this block.
+            creator (str): Only services created by this address.
+            provider (str): Only services won by this address.
+            limit (int): Maximum number of services returned.
+
+        Returns:
+            list: The services.
+        """
+        query, params = "SELECT * FROM services WHERE 1 = 1", []
+        for column, operator, value in (("state", "=", state), ("announced_block", ">=", from_block),
+                                        ("announced_block", "<=", to_block), ("creator", "=", creator),
+                                        ("provider", "=", provider)):
+            if value is not None:
+                query += f" AND {column} {operator} ?"
+                params.append(value)
+        query += " ORDER BY announced_block DESC, service_id LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self._reader().execute(query, params).fetchall()]
+
+    def get_events(self, service_id=None, event_name=None, from_block=None, to_block=None, limit=100):
+        """
+        Returns the indexed events, in chain order.
+
+        Args:
+            service_id (str): Only events of this service.
+            event_name (str): Only events with this name (e.g. 'NewBid').
+            from_block (int): Only events at or after this block.
+            to_block (int): Only events at or before this block.
+            limit (int): Maximum number of events returned.
+
+        Returns:
+            list: The events (block number, log index, transaction hash, name, service ID and arguments).
+        """
+        query, params = "SELECT * FROM events WHERE 1 = 1", []
+        for column, operator, value in (("service_id", "=", service_id), ("event", "=", event_name),
+                                        ("block_number", ">=", from_block), ("block_number", "<=", to_block)):
+            if value is not None:
+                query += f" AND {column} {operator} ?"
+                params.append(value)
+        query += " ORDER BY block_number, log_index LIMIT ?"
+        params.append(limit)
+        events = []
+        for row in self._reader().execute(query, params).fetchall():
+            event = dict(row)
+            event['args'] = json.loads(event['args'])
+            events.append(event)
+        return events
+
+    def status(self):
+        """
+        Returns the progress of the indexer.
+
+        Returns:
+            dict: The last indexed block and the number of indexed events and services.
+        """
+        conn = self._reader()
+        return {
+            "last-block": self.last_block,
+            "events": conn.execute("SELECT COUNT(*) FROM events").fetchone()[0],
+            "services": conn.execute("SELECT COUNT(*) FROM services").fetchone()[0],
+            "running": self.thread is not None and self.thread.is_alive()
+        }
@@ -0,0 +1,120 @@
+import asyncio
+
+from eth_utils import event_abi_to_log_topic, to_checksum_address
+from hexbytes import HexBytes
+from web3.datastructures import AttributeDict
+
+
+def format_log(log):
+    """
+    Converts a raw JSON-RPC log (hex strings) into the structure web3 returns from filters, so it can be
+    decoded with ContractEvent.processLog().
+
+    Args:
+        log (dict): Log object of an 'eth_subscription' notification or an 'eth_getLogs' response.
+
+    Returns:
+        AttributeDict: The formatted log.
+    """
+    return AttributeDict({
+        'address': to_checksum_address(log['address']),
+        'topics': [HexBytes(topic) for topic in log['topics']],
+        'data': log['data'],
+        'blockNumber': int(log['blockNumber'], 16),
+        'blockHash': HexBytes(log['blockHash']),
+        'transactionHash': HexBytes(log['transactionHash']),
+        'transactionIndex': int(log['transactionIndex'], 16),
+        'logIndex': int(log['logIndex'], 16),
+        'removed': log.get('removed', False)
+    })
+
+
+class EventSubscription:
+    """
+    Push-based subscription to a contract event through eth_subscribe('logs').
+
+    The node sends each matching log as soon as its block is imported, filtered by contract address and
+    event topic, so waiting for an event costs no polling on either the client or the node. Decoded
+    events are queued on the websocket client event loop; wait_for() blocks a synchronous caller until
+    a matching event arrives, and next_event() is the asyncio equivalent.
+    """
+
+    def __init__(self, ws_client, contract_event, topics=None):
+        """
+        Args:
+            ws_client (WebsocketClient): Started websocket client connected to the Ethereum node.
+            contract_event (ContractEvent): Contract event class (e.g. Federation_contract.events.NewBid).
+            topics (list): Optional filters for the indexed event arguments (topics 1 to 3).
+        """
+        self.ws_client = ws_client
+        self.contract_event = contract_event()
+        self.topics = [HexBytes(event_abi_to_log_topic(self.contract_event.abi)).hex()] + list(topics or [])
+        self.queue = None  # Created on the websocket client event loop, which consumes it
+        self.subscription_id = None
+
+    def start(self):
+        """
+        Subscribes to the event logs. Call it before sending the transaction that triggers the event.
+        """
+        # Before Python 3.10 a queue is bound to the event loop of the thread that creates it
+        self.queue = asyncio.run_coroutine_threadsafe(self._create_queue(), self.ws_client.loop).result(self.ws_client.timeout)
+        params = ['logs', {'address': self.contract_event.address, 'topics': self.topics}]
+        self.subscription_id = self.ws_client.subscribe(params, self._on_log)
+
+    def close(self):
+        """
+        Cancels the subscription.
+        """
+        if self.subscription_id is not None:
+            self.ws_client.unsubscribe(self.subscription_id)
+            self.subscription_id = None
+
+    @staticmethod
+    async def _create_queue():
+        return asyncio.Queue()
+
+    def _on_log(self, log):
+        # Logs removed by a chain reorganization are ignored
+        if log.get('removed'):
+            return
+        try:
+            event = self.contract_event.processLog(format_log(log))
+        except Exception as e:
+            print(f"Failed to decode {self.contract_event.event_name} log: {e}")
+            return
+        self.queue.put_nowait(event)
+
+    async def next_event(self, predicate=None):
+        """
+        Waits for the next event that matches the predicate (runs on the websocket client event loop).
+
+        Args:
+            predicate (callable): Optional function that receives a decoded event and returns True if it matches.
+
+        Returns:
+            AttributeDict: The decoded event.
+        """
+        while True:
+            event = await self.queue.get()
+            if predicate is None or predicate(event):
+                return event
+
+    def wait_for(self, predicate=None, timeout=None):
+        """
+        Blocks the calling thread until an event that matches the predicate arrives.
+
+        Args:
+            predicate (callable): Optional function that receives a decoded event and returns True if it matches.
+            timeout (int): Timeout in seconds (None waits forever).
+
+        Returns:
+            AttributeDict: The decoded event.
+
+        Raises:
+            TimeoutError: If no matching event arrives within the timeout.
+        """
+        coroutine = asyncio.wait_for(self.next_event(predicate), timeout)
+        try:
+            return asyncio.run_coroutine_threadsafe(coroutine, self.ws_client.loop).result()
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"No {self.contract_event.event_name} event received after {timeout} seconds")
@@ -0,0 +1,122 @@
+import json
+import math
+import os
+import threading
+
+
+class GasProfile:
+    """
+    Per contract function gas profile, learned from transaction receipts and stored on disk.
+
+    With a known gas limit, gas price and chain ID, web3 builds a transaction without calling
+    'eth_estimateGas', 'eth_gasPrice' or 'eth_chainId', so the transaction is signed fully offline.
+    The profile only falls back to live estimation for functions that have not been learned yet.
+    The gas of a function can depend on the contract state (e.g. the first bid of a service writes more
+    storage than the next ones), so a call can still run out of gas: see resend_on_out_of_gas in main.py.
+    """
+
+    def __init__(self, path, contract_address, margin=1.25):
+        """
+        Args:
+            path (str): JSON file where the profile is stored.
+            contract_address (str): Address of the contract the profile belongs to. A profile learned
+                                    for another deployment is discarded.
+            margin (float): Safety factor applied to the highest gas usage observed for a function.
+        """
+        self.path = path
+        self.contract_address = contract_address
+        self.margin = margin
+        self.lock = threading.Lock()
+        self.functions = {}  # function name -> {"gas-used": highest gas used, "samples": number of receipts}
+        self.gas_price = None
+        self.chain_id = None
+        self.load()
+
+    def load(self):
+        """
+        Loads the profile from disk, ignoring it if it belongs to another contract deployment.
+        """
+        if not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, 'r') as file:
+                stored = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable gas profile {self.path}: {e}")
+            return
+        if stored.get("contract-address") != self.contract_address:
+            print(f"Gas profile {self.path} belongs to another contract deployment. Starting a new profile.")
+            return
+        self.functions = stored.get("functions", {})
+        self.gas_price = stored.get("gas-price")
+        self.chain_id = stored.get("chain-id")
+
+    def save(self):
+        """
+        Writes the profile to disk atomically.
+        """
+        # The lock is held while writing, so concurrent saves do not share the temporary file
+        with self.lock:
+            stored = {
+                "contract-address": self.contract_address,
+                "chain-id": self.chain_id,
+                "gas-price": self.gas_price,
+                "functions": self.functions
+            }
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as file:
+                json.dump(stored, file, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def refresh_fees(self, web3):
+        """
+        Reads the gas price and chain ID from the node (off the critical path, e.g. at startup).
+
+        Args:
+            web3 (Web3): Connected Web3 instance.
+        """
+        with self.lock:
+            self.gas_price = web3.eth.gasPrice
+            self.chain_id = web3.eth.chainId
+        self.save()
+
+    def gas_limit(self, function_name):
+        """
+        Returns the gas limit to use for a function call.
+
+        Args:
+            function_name (str): Name of the contract function.
+
+        Returns:
+            int: The learned gas limit, or None if the function has not been learned yet.
+        """
+        with self.lock:
+            entry = self.functions.get(function_name)
+            if entry is None:
+                return None
+            return int(math.ceil(entry["gas-used"] * self.margin))
+
+    def record(self, function_name, gas_used):
+        """
+        Learns the gas used by a mined transaction.
+
+        Args:
+            function_name (str): Name of the contract function.
+            gas_used (int): Gas used according to the transaction receipt.
+        """
+        with self.lock:
+            entry = self.functions.setdefault(function_name, {"gas-used": 0, "samples": 0})
+            entry["gas-used"] = max(entry["gas-used"], gas_used)
+            entry["samples"] += 1
+        self.save()
+
+    def invalidate(self, function_name):
+        """
+        Forgets a function (e.g. after an out-of-gas failure), so the next call is estimated live.
+
+        Args:
+            function_name (str): Name of the contract function.
+        """
+        with self.lock:
+            self.functions.pop(function_name, None)
+        self.save()
@@ -0,0 +1,338 @@
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+from kubernetes.client.rest import ApiException
+
+
+HTTP_CONFLICT = 409
+
+ACTION_PATTERN = re.compile(r'\{\{(-?)\s*(.*?)\s*(-?)\}\}', re.DOTALL)
+RANGE_PATTERN = re.compile(r'^range\s+(?:(\$\w+)\s*(?:,\s*(\$\w+)\s*)?:=\s*)?(.+)$')
+SET_PATTERN = re.compile(r'(\w+)(?:\[(\d+)\])?')
+
+
+def _tokenize(text):
+    """
+    Splits a template into text and action tokens, applying the whitespace trim markers ({{- and -}}).
+    """
+    tokens = []
+    position = 0
+    trim_next = False
+    for match in ACTION_PATTERN.finditer(text):
+        chunk = text[position:match.start()]
+        if trim_next:
+            chunk = chunk.lstrip()
+        if match.group(1):
+            chunk = chunk.rstrip()
+        tokens.append(('text', chunk))
+        tokens.append(('action', match.group(2)))
+        trim_next = bool(match.group(3))
+        position = match.end()
+    chunk = text[position:]
+    tokens.append(('text', chunk.lstrip() if trim_next else chunk))
+    return tokens
+
+
+def _parse(tokens, index=0):
+    """
+    Builds the tree of a template: text, output, range and if nodes (with their else branch).
+
+    Returns:
+        tuple: The nodes, the index of the next token and the keyword that closed the block (end/else/None).
+    """
+    nodes = []
+    while index < len(tokens):
+        kind, value = tokens[index]
+        index += 1
+        if kind == 'text':
+            if value:
+                nodes.append(('text', value))
+        elif value in ('end', 'else'):
+            return nodes, index, value
+        elif value.startswith('/*'):
+            continue
+        elif value.startswith('range ') or value.startswith('if '):
+            body, index, closing = _parse(tokens, index)
+            else_body = []
+            if closing == 'else':
+                else_body, index, closing = _parse(tokens, index)
+            if closing != 'end':
+                raise ValueError(f"Missing {{{{ end }}}} for {{{{ {value} }}}}")
+            if value.startswith('range '):
+                match = RANGE_PATTERN.match(value)
+                if match is None:
+                    raise ValueError(f"Unsupported range action: {value}")
+                nodes.append(('range', match.groups(), body, else_body))
+            else:
+                nodes.append(('if', value[3:].strip(), body, else_body))
+        else:
+            nodes.append(('output', value))
+    return nodes, index, None
+
+
+def _lookup(value, fields):
+    for field in fields:
+        if isinstance(value, dict):
+            value = value.get(field)
+        else:
+            return None
+    return value
+
+
+def _evaluate(expression, dot, variables):
+    if len(expression) >= 2 and expression[0] == expression[-1] == '"':
+        return expression[1:-1]
+    if expression == '.':
+        return dot
+    if expression.startswith('.'):
+        return _lookup(dot, expression[1:].split('.'))
+    if expression.startswith('$'):
+        name, _, path = expression.partition('.')
+        return _lookup(variables[name], path.split('.') if path else [])
+    raise ValueError(f"Unsupported template expression: {expression}")
+
+
+def _format(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _items(value):
+    if isinstance(value, dict):
+        return sorted(value.items())
+    return list(enumerate(value or []))
+
+
+def _execute(nodes, dot, variables, output):
+    for node in nodes:
+        if node[0] == 'text':
+            output.append(node[1])
+        elif node[0] == 'output':
+            output.append(_format(_evaluate(node[1], dot, variables)))
+        elif node[0] == 'if':
+            _, expression, body, else_body = node
+            _execute(body if _evaluate(expression, dot, variables) else else_body, dot, variables, output)
+        else:
+            _, (first, second, expression), body, else_body = node
+            items = _items(_evaluate(expression, dot, variables))
+            if not items:
+                _execute(else_body, dot, variables, output)
+            for key, item in items:
+                scope = dict(variables)
+                if second is not None:
+                    scope[first], scope[second] = key, item
+                elif first is not None:
+                    scope[first] = item
+                _execute(body, item, scope, output)
+
+
+def render_template(text, context):
+    """
+    Renders a Helm (Go) template in-process.
+
+    Only the subset of the template language used by the charts of this repository is supported:
+    field and variable output (.a.b, $.a.b, $var), 'range' over lists and maps (with or without
+    $key, $value variables), 'if'/'else', comments and the whitespace trim markers.
+
+    Args:
+        text (str): The template.
+        context (dict): The root context (Values, Release, Chart).
+
+    Returns:
+        str: The rendered template.
+    """
+    nodes, _, closing = _parse(_tokenize(text))
+    if closing is not None:
+        raise ValueError(f"Unexpected {{{{ {closing} }}}}")
+    output = []
+    _execute(nodes, context, {'$': context}, output)
+    return "".join(output)
+
+
+def merge_values(base, override):
+    """
+    Merges Helm values: maps are merged recursively, any other value (including lists) is replaced.
+    """
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_values(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def set_value(values, assignment):
+    """
+    Applies a Helm --set assignment (e.g. 'deployments[4].replicas=2') to the values.
+    """
+    path, _, raw = assignment.partition('=')
+    value = yaml.safe_load(raw) if raw else None
+    fields = [SET_PATTERN.fullmatch(field) for field in path.split('.')]
+    if not all(fields):
+        raise ValueError(f"Unsupported --set assignment: {assignment}")
+    target = values
+    for position, field in enumerate(fields):
+        name, list_index = field.group(1), field.group(2)
+        last = position == len(fields) - 1
+        if list_index is None:
+            if last:
+                target[name] = value
+            else:
+                target = target.setdefault(name, {})
+        else:
+            items = target.setdefault(name, [])
+            list_index = int(list_index)
+            while len(items) <= list_index:
+                items.append({})
+            if last:
+                items[list_index] = value
+            else:
+                target = items[list_index]
+
+
+class Chart:
+    """
+    Helm chart rendered and applied in-process, through the Kubernetes Python client, instead of forking
+    'helm install'.
+
+    The rendered manifests are cached by the hash of the values files (and --set assignments), so a
+    release that is installed again with the same values is applied without rendering. ConfigMaps,
+    Services and Deployments are submitted concurrently: Services at the same time as the ConfigMaps,
+    and Deployments as soon as the ConfigMaps they read their environment from exist.
+    """
+
+    def __init__(self, path, core_api, apps_api, service_name="dlt-federation"):
+        """
+        Args:
+            path (str): Directory of the chart (with Chart.yaml, values.yaml and templates/).
+            core_api (CoreV1Api): Client of the core API (config maps and services).
+            apps_api (AppsV1Api): Client of the apps API (deployments).
+            service_name (str): Value of .Release.Service (managed-by label).
+        """
+        self.path = path
+        self.core_api = core_api
+        self.apps_api = apps_api
+        self.service_name = service_name
+        with open(os.path.join(path, "Chart.yaml"), 'r') as file:
+            self.metadata = yaml.safe_load(file)
+        values_path = os.path.join(path, "values.yaml")
+        self.default_values = {}
+        if os.path.isfile(values_path):
+            with open(values_path, 'r') as file:
+                self.default_values = yaml.safe_load(file) or {}
+        templates_path = os.path.join(path, "templates")
+        self.templates = {}
+        for name in sorted(os.listdir(templates_path)):
+            if name.endswith(('.yaml', '.yml', '.tpl')) and not name.startswith('_'):
+                with open(os.path.join(templates_path, name), 'r') as file:
+                    self.templates[name] = file.read()
+        self.lock = threading.Lock()
+        self.rendered = {}  # hash of the release, values files and --set assignments -> manifests
+
+    def values_hash(self, release, namespace, value_files, set_values):
+        digest = hashlib.sha256(json.dumps([release, namespace, set_values]).encode('utf-8'))
+        for value_file in value_files:
+            with open(os.path.join(self.path, value_file), 'rb') as file:
+                digest.update(file.read())
+        return digest.hexdigest()
+
+    def render(self, release, value_files=(), set_values=(), namespace="default"):
+        """
+        Renders the manifests of a release (like 'helm template').
+
+        Args:
+            release (str): Name of the release.
+            value_files (list): Values files, relative to the chart directory (like -f).
+            set_values (list): Assignments such as 'deployments[0].replicas=2' (like --set).
+            namespace (str): Namespace of the release.
+
+        Returns:
+            list: The manifests (dicts), from the cache if the values have not changed.
+        """
+        key = self.values_hash(release, namespace, list(value_files), list(set_values))
+        with self.lock:
+            if key in self.rendered:
+                return copy.deepcopy(self.rendered[key])
+
+        values = copy.deepcopy(self.default_values)
+        for value_file in value_files:
+            with open(os.path.join(self.path, value_file), 'r') as file:
+                values = merge_values(values, yaml.safe_load(file) or {})
+        for assignment in set_values:
+            set_value(values, assignment)
+
+        context = {
+            "Values": values,
+            "Release": {"Name": release, "Namespace": namespace, "Service": self.service_name},
+            "Chart": {"Name": self.metadata.get("name"), "Version": self.metadata.get("version")}
+        }
+        manifests = []
+        for text in self.templates.values():
+            manifests += [manifest for manifest in yaml.safe_load_all(render_template(text, context)) if manifest]
+
+        with self.lock:
+            self.rendered[key] = manifests
+        return copy.deepcopy(manifests)
+
+    def create(self, manifest, namespace, exist_ok=False):
+        kind = manifest.get("kind")
+        try:
+            if kind == "ConfigMap":
+                self.core_api.create_namespaced_config_map(namespace, manifest)
+            elif kind == "Service":
+                self.core_api.create_namespaced_service(namespace, manifest)
+            elif kind == "Deployment":
+                self.apps_api.create_namespaced_deployment(namespace, manifest)
+            else:
+                raise ValueError(f"Unsupported resource kind: {kind}")
+        except ApiException as e:
+            if not exist_ok or e.status != HTTP_CONFLICT:
+                raise
+            return
+        print(f"{kind} created: {manifest['metadata']['name']}")
+
+    def create_all(self, executor, manifests, namespace, exist_ok=False):
+        for future in [executor.submit(self.create, manifest, namespace, exist_ok) for manifest in manifests]:
+            future.result()
+
+    def install(self, release, value_files=(), set_values=(), namespace="default", exist_ok=False):
+        """
+        Renders a release and creates its resources (like 'helm install'), concurrently where the dependency
+        order allows: Services and ConfigMaps at once, then the Deployments.
+
+        Args:
+            release (str): Name of the release.
+            value_files (list): Values files, relative to the chart directory (like -f).
+            set_values (list): Assignments such as 'deployments[0].replicas=2' (like --set).
+            namespace (str): Namespace of the release.
+            exist_ok (bool): Keep the resources that already exist instead of failing (409 Conflict).
+
+        Returns:
+            list: The applied manifests.
+        """
+        manifests = self.render(release, value_files, set_values, namespace)
+        by_kind = {}
+        for manifest in manifests:
+            by_kind.setdefault(manifest.get("kind"), []).append(manifest)
+        unsupported = set(by_kind) - {"ConfigMap", "Service", "Deployment"}
+        if unsupported:
+            raise ValueError(f"Unsupported resource kinds in release {release}: {sorted(unsupported)}")
+
+        with ThreadPoolExecutor(max_workers=len(manifests) + 1) as executor:
+            # Services do not depend on anything: they are created while the ConfigMaps and Deployments are applied
+            services = executor.submit(self.create_all, executor, by_kind.get("Service", []), namespace, exist_ok)
+            # Deployments read their environment from the ConfigMaps: they are created once the ConfigMaps exist
+            self.create_all(executor, by_kind.get("ConfigMap", []), namespace, exist_ok)
+            self.create_all(executor, by_kind.get("Deployment", []), namespace, exist_ok)
+            services.result()
+        return manifests
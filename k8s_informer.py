@@ -0,0 +1,203 @@
+import bisect
+import threading
+import time
+
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+
+HTTP_GONE = 410
+
+
+def object_key(obj):
+    return obj.metadata.namespace, obj.metadata.name
+
+
+def list_objects(list_function, **kwargs):
+    """
+    Lists the objects returned by a Kubernetes list function.
+
+    Args:
+        list_function (callable): List function of the Kubernetes client (e.g. CoreV1Api().list_namespaced_pod).
+        **kwargs: Arguments of the list function (namespace, field_selector, label_selector...).
+
+    Returns:
+        tuple: The objects by (namespace, name) and the resourceVersion of the list.
+    """
+    object_list = list_function(**kwargs)
+    return {object_key(obj): obj for obj in object_list.items}, object_list.metadata.resource_version
+
+
+class Informer:
+    """
+    Shared in-process cache of one Kubernetes resource kind, kept up to date from a watch stream.
+
+    The objects are listed once and then every change is applied from a watch that resumes from the last
+    resourceVersion (and lists again when that version has expired), so any number of readers and waiters
+    query the local cache without requests to the API server. The cache is indexed by namespace, by label
+    (key=value) and by name (sorted, for name prefix queries).
+    """
+
+    def __init__(self, list_function, kind, resync_delay=5, **kwargs):
+        """
+        Args:
+            list_function (callable): List function of the Kubernetes client for all namespaces
+                                      (e.g. CoreV1Api().list_pod_for_all_namespaces).
+            kind (str): Name of the resource kind (used in the logs).
+            resync_delay (int): Seconds to wait before listing again after an unexpected error.
+            **kwargs: Arguments of the list function (field_selector, label_selector...).
+        """
+        self.list_function = list_function
+        self.kind = kind
+        self.resync_delay = resync_delay
+        self.kwargs = kwargs
+        self.changed = threading.Condition(threading.RLock())
+        self.objects = {}      # (namespace, name) -> object
+        self.by_namespace = {}  # namespace -> set of keys
+        self.by_label = {}     # (label key, label value) -> set of keys
+        self.names = []        # sorted (name, namespace) keys
+        self.synced = False
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """
+        Starts the thread that lists and watches the objects.
+        """
+        self.thread = threading.Thread(target=self._run, name=f"{self.kind}-informer", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stops the informer at the end of the current watch request.
+        """
+        self.stopped.set()
+
+    def _run(self):
+        resource_version = None
+        while not self.stopped.is_set():
+            try:
+                if resource_version is None:
+                    objects, resource_version = list_objects(self.list_function, **self.kwargs)
+                    self._replace(objects)
+                resource_version = self._watch(resource_version)
+            except ApiException as e:
+                if e.status != HTTP_GONE:
+                    print(f"{self.kind} informer error: {e}")
+                    time.sleep(self.resync_delay)
+                # List again (the resourceVersion has expired or the watch failed)
+                resource_version = None
+            except Exception as e:
+                print(f"{self.kind} informer error: {e}")
+                time.sleep(self.resync_delay)
+                resource_version = None
+
+    def _watch(self, resource_version):
+        watcher = watch.Watch()
+        try:
+            for event in watcher.stream(self.list_function, resource_version=resource_version, allow_watch_bookmarks=True,
+                                        timeout_seconds=60, **self.kwargs):
+                if event['type'] == 'BOOKMARK':
+                    # Bookmarks are not deserialized by the client: only their resourceVersion is read
+                    resource_version = event['raw_object']['metadata']['resourceVersion']
+                    continue
+                obj = event['object']
+                resource_version = obj.metadata.resource_version
+                with self.changed:
+                    self._remove(object_key(obj))
+                    if event['type'] != 'DELETED':
+                        self._add(obj)
+                    self.changed.notify_all()
+                if self.stopped.is_set():
+                    break
+        finally:
+            watcher.stop()
+        return resource_version
+
+    def _replace(self, objects):
+        with self.changed:
+            self.objects, self.by_namespace, self.by_label, self.names = {}, {}, {}, []
+            for obj in objects.values():
+                self._add(obj)
+            self.synced = True
+            self.changed.notify_all()
+
+    def _add(self, obj):
+        key = object_key(obj)
+        self.objects[key] = obj
+        self.by_namespace.setdefault(key[0], set()).add(key)
+        for label in (obj.metadata.labels or {}).items():
+            self.by_label.setdefault(label, set()).add(key)
+        bisect.insort(self.names, (key[1], key[0]))
+
+    def _remove(self, key):
+        obj = self.objects.pop(key, None)
+        if obj is None:
+            return
+        self.by_namespace[key[0]].discard(key)
+        for label in (obj.metadata.labels or {}).items():
+            self.by_label.get(label, set()).discard(key)
+        index = bisect.bisect_left(self.names, (key[1], key[0]))
+        if index < len(self.names) and self.names[index] == (key[1], key[0]):
+            del self.names[index]
+
+    def get(self, namespace, name):
+        """
+        Returns a cached object.
+
+        Args:
+            namespace (str): Namespace of the object (None for cluster-scoped objects).
+            name (str): Name of the object.
+
+        Returns:
+            object: The object, or None if it does not exist.
+        """
+        with self.changed:
+            return self.objects.get((namespace, name))
+
+    def list(self, namespace=None, labels=None, name_prefixes=None):
+        """
+        Returns the cached objects that match all the given filters.
+
+        Args:
+            namespace (str): Only objects of this namespace.
+            labels (dict): Only objects with all these labels (equality).
+            name_prefixes (list): Only objects whose name starts with one of these prefixes.
+
+        Returns:
+            list: The matching objects.
+        """
+        with self.changed:
+            candidates = None
+            if namespace is not None:
+                candidates = set(self.by_namespace.get(namespace, ()))
+            for label in (labels or {}).items():
+                keys = self.by_label.get(label, set())
+                candidates = set(keys) if candidates is None else candidates & keys
+            if name_prefixes is not None:
+                keys = set()
+                for prefix in name_prefixes:
+                    index = bisect.bisect_left(self.names, (prefix,))
+                    while index < len(self.names) and self.names[index][0].startswith(prefix):
+                        keys.add((self.names[index][1], self.names[index][0]))
+                        index += 1
+                candidates = keys if candidates is None else candidates & keys
+            if candidates is None:
+                return list(self.objects.values())
+            return [self.objects[key] for key in candidates]
+
+    def wait_for(self, condition, timeout=None):
+        """
+        Blocks the calling thread until a condition on the cache is met. The condition is evaluated once the
+        cache is synced and again after every change received from the watch stream.
+
+        Args:
+            condition (callable): Function without arguments that queries the informer and returns True when done.
+            timeout (int): Timeout in seconds (None waits forever).
+
+        Raises:
+            TimeoutError: If the condition is not met within the timeout.
+        """
+        with self.changed:
+            if not self.changed.wait_for(lambda: self.synced and condition(), timeout):
+                raise TimeoutError(f"Timed out waiting for the {self.kind} informer condition")
@@ -0,0 +1,132 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from kubernetes import client
+
+
+RELEASE_LABEL = "app.kubernetes.io/instance"
+
+
+def label_selector(labels):
+    return ",".join(f"{key}={value}" for key, value in labels.items())
+
+
+class TeardownEngine:
+    """
+    Bulk deletion of the Kubernetes resources of the experiments.
+
+    Each resource kind is deleted with a single deletecollection request (by label selector), all the kinds
+    are deleted concurrently, and the termination of the pods, deployments and services is tracked
+    concurrently from the informer caches, so the teardown returns as soon as the last object disappears.
+    """
+
+    def __init__(self, core_api, apps_api, informers, propagation_policy="Background", grace_period_seconds=None,
+                 timeout=None):
+        """
+        Args:
+            core_api (CoreV1Api): Client of the core API (pods, services, config maps).
+            apps_api (AppsV1Api): Client of the apps API (deployments).
+            informers (dict): Informers by kind ('pods', 'deployments', 'services') used to track the termination.
+            propagation_policy (str): Deletion propagation policy ('Background', 'Foreground' or 'Orphan').
+            grace_period_seconds (int): Grace period of the deleted pods (None uses the one of each pod).
+            timeout (int): Timeout in seconds of the termination tracking (None waits forever).
+        """
+        self.core_api = core_api
+        self.apps_api = apps_api
+        self.informers = informers
+        self.propagation_policy = propagation_policy
+        self.grace_period_seconds = grace_period_seconds
+        self.timeout = timeout
+
+    def delete_options(self):
+        return client.V1DeleteOptions(propagation_policy=self.propagation_policy,
+                                      grace_period_seconds=self.grace_period_seconds)
+
+    def delete_collections(self, namespace, labels):
+        """
+        Deletes the deployments, pods, services and config maps with the given labels, one request per kind,
+        all of them concurrently.
+
+        Args:
+            namespace (str): Namespace of the resources.
+            labels (dict): Labels of the resources (equality).
+        """
+        selector = label_selector(labels)
+        delete_functions = [
+            self.apps_api.delete_collection_namespaced_deployment,
+            # The pods are deleted directly (not only through their deployment) to apply the grace period
+            self.core_api.delete_collection_namespaced_pod,
+            self.core_api.delete_collection_namespaced_service,
+            self.core_api.delete_collection_namespaced_config_map
+        ]
+        with ThreadPoolExecutor(max_workers=len(delete_functions)) as executor:
+            futures = [executor.submit(delete_function, namespace, label_selector=selector, body=self.delete_options())
+                       for delete_function in delete_functions]
+            for future in futures:
+                future.result()
+
+    def wait_for_deleted(self, namespace, labels=None, kinds=("pods", "deployments", "services")):
+        """
+        Blocks the calling thread until no object of the given kinds matches the labels, tracking every kind
+        concurrently.
+
+        Args:
+            namespace (str): Namespace of the resources.
+            labels (dict): Labels of the resources (None matches all the objects of the namespace).
+            kinds (tuple): Kinds to track (keys of the informers).
+
+        Raises:
+            TimeoutError: If some object still exists after the timeout.
+        """
+        def wait_for_kind(kind):
+            informer = self.informers[kind]
+            informer.wait_for(lambda: not informer.list(namespace=namespace, labels=labels), self.timeout)
+
+        with ThreadPoolExecutor(max_workers=len(kinds)) as executor:
+            for future in [executor.submit(wait_for_kind, kind) for kind in kinds]:
+                future.result()
+
+    def delete_releases(self, releases, namespace="default"):
+        """
+        Deletes the resources of chart releases (selected by their release label) and waits until all of them
+        are gone. This replaces 'helm uninstall', which deleted the objects one by one.
+
+        Args:
+            releases (list): Names of the releases.
+            namespace (str): Namespace of the releases.
+        """
+        def delete_release(release):
+            self.delete_collections(namespace, {RELEASE_LABEL: release})
+            self.wait_for_deleted(namespace, {RELEASE_LABEL: release})
+            print(f"Release \"{release}\" deleted.")
+
+        with ThreadPoolExecutor(max_workers=len(releases)) as executor:
+            for future in [executor.submit(delete_release, release) for release in releases]:
+                future.result()
+
+    def delete_all(self, namespace="default"):
+        """
+        Deletes all the pods, deployments and services (except services with type ClusterIP) of a namespace
+        and waits until all of them are gone.
+
+        Args:
+            namespace (str): Namespace of the resources.
+        """
+        # Services cannot be selected by type, so the non-ClusterIP ones are deleted one by one (concurrently)
+        services = [service.metadata.name for service in self.informers["services"].list(namespace=namespace)
+                    if service.spec.type != "ClusterIP"]
+        with ThreadPoolExecutor(max_workers=2 + len(services)) as executor:
+            futures = [
+                executor.submit(self.apps_api.delete_collection_namespaced_deployment, namespace, body=self.delete_options()),
+                executor.submit(self.core_api.delete_collection_namespaced_pod, namespace, body=self.delete_options())
+            ]
+            futures += [executor.submit(self.core_api.delete_namespaced_service, name, namespace, body=self.delete_options())
+                        for name in services]
+            for future in futures:
+                future.result()
+        print(f"Deleted all pods and deployments and {len(services)} services of namespace '{namespace}'.")
+
+        def services_deleted():
+            return not any(self.informers["services"].get(namespace, name) for name in services)
+
+        self.wait_for_deleted(namespace, kinds=("pods", "deployments"))
+        self.informers["services"].wait_for(services_deleted, self.timeout)
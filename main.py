@@ -1,5 +1,5 @@
 import os
-import json
+import asyncio
 import time
 import yaml
 import requests
@@ -7,7 +7,10 @@ import csv
 import subprocess
 import sys
 import re
+import ipaddress
+import threading
 from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from dotenv import load_dotenv
 from web3 import Web3, HTTPProvider, WebsocketProvider
@@ -18,6 +21,23 @@ from kubernetes.client.rest import ApiException
 from enum import Enum
 from typing import List
 
+from nonce_manager import NonceManager
+from call_batch import CallBatch
+from contract_build import load_contract
+from gas_profile import GasProfile
+from multicall import FederationMulticall
+from tx_templates import CallTemplate
+from announcement_watcher import AnnouncementWatcher
+from event_indexer import EventIndexer
+from event_subscription import EventSubscription
+from k8s_informer import Informer
+from k8s_teardown import RELEASE_LABEL, TeardownEngine
+from helm_chart import Chart
+from warm_pool import WarmPool
+from signed_bids import SignedBidPool, recover_bid_signer, sign_bid
+from tx_tracker import TransactionFailed, TransactionTracker
+from ws_client import WebsocketClient
+
 
 class YAMLFile(str, Enum):
     nginx_deployment = "nginx-deployment.yaml"
@@ -25,6 +45,11 @@ class YAMLFile(str, Enum):
     nginx_service = "nginx-service.yaml"
     federated_service = "federated-service.yaml"
 
+class ServiceState(str, Enum):
+    open = "open"
+    closed = "closed"
+    deployed = "deployed"
+
 # Define your tags
 tags_metadata = [
     {
@@ -90,6 +115,20 @@ while domain not in ["consumer", "provider"]:
 load_dotenv('./dlt-network-docker/.env')
 load_dotenv('./smart-contracts/.env', override=True)
 
+# Development mode: in-process EVM with instant sealing instead of the geth network (see dev_chain.py).
+# The first domain started hosts the chain and the second one joins it through the env file.
+dev_chain = None
+if os.getenv('DEV_CHAIN'):
+    from dev_chain import start_or_join
+    dev_chain_env = os.getenv('DEV_CHAIN_ENV', 'dev-chain.env')
+    dev_chain = start_or_join(dev_chain_env, port=int(os.getenv('DEV_CHAIN_PORT', '8546')),
+                              period=int(os.getenv('DEV_CHAIN_PERIOD', '0')))
+    load_dotenv(dev_chain_env, override=True)
+
+# Extra environment file loaded last (e.g. written by benchmarks/block_period.py for its local network)
+if os.getenv('FEDERATION_ENV_FILE'):
+    load_dotenv(os.getenv('FEDERATION_ENV_FILE'), override=True)
+
 # Configure Web3
 eth_node_url = os.getenv(f'WS_NODE_{"1" if domain == "consumer" else "2"}_URL')
 try:
@@ -106,11 +145,15 @@ try:
 except Exception as e:
     print(f"An error occurred while trying to connect to the Ethereum node: {e}")
 
-# Load smart contract ABI
-contract_abi = json.load(open("smart-contracts/build/contracts/Federation.json"))["abi"]
+# Load smart contract ABI (of the current contract source, see contract_build.py)
+contract_abi, _ = load_contract("Federation")
 contract_address = web3.toChecksumAddress(os.getenv('CONTRACT_ADDRESS'))
 Federation_contract = web3.eth.contract(abi=contract_abi, address=contract_address)
 
+# Optional aggregator contract used to read federation snapshots in a single call
+multicall_address = os.getenv('MULTICALL_ADDRESS')
+federation_multicall = FederationMulticall(web3, multicall_address, Federation_contract) if multicall_address else None
+
 # Retrieve private key and blockchain address for the domain
 private_key = os.getenv(f'PRIVATE_KEY_NODE_{"1" if domain == "consumer" else "2"}')
 block_address = os.getenv(f'ETHERBASE_NODE_{"1" if domain == "consumer" else "2"}')
@@ -120,7 +163,32 @@ block_address = os.getenv(f'ETHERBASE_NODE_{"1" if domain == "consumer" else "2"
 ip_address = os.getenv(f'IP_NODE_{"1" if domain == "consumer" else "2"}')
 
 # Number that is used to prevent transaction replay attacks and ensure the order of transactions.
-nonce = web3.eth.getTransactionCount(block_address)
+# Nonces are reserved atomically so that concurrent endpoints can keep several transactions in flight.
+nonce_manager = NonceManager(web3, block_address)
+
+# Gas limits learned from receipts, so transactions are built and signed without estimation round trips
+gas_profile = GasProfile(os.getenv('GAS_PROFILE_PATH', 'gas-profile.json'), contract_address)
+gas_profile.refresh_fees(web3)
+
+# Dedicated websocket connection for push notifications (new blocks) that web3 does not expose
+ws_client = WebsocketClient(eth_node_url)
+tx_tracker = TransactionTracker(ws_client)
+try:
+    ws_client.start()
+except Exception as e:
+    print(f"Failed to connect to {eth_node_url}: {e}")
+try:
+    tx_tracker.start()
+    print("Subscribed to new block headers for transaction tracking")
+except Exception as e:
+    print(f"Failed to subscribe to new block headers: {e}. Receipts are polled every {tx_tracker.poll_interval} seconds")
+
+# Local SQLite index of the Federation contract logs (started with the application), used by the read endpoints
+event_indexer = EventIndexer(
+    web3, ws_client, Federation_contract,
+    db_path=os.getenv('EVENT_INDEX_PATH', 'federation-events.db'),
+    start_block=int(os.getenv('EVENT_INDEX_START_BLOCK', '0'))
+)
 
 # Address of the miner (node that adds a block to the blockchain)
 coinbase = block_address
@@ -140,6 +208,15 @@ manager_address = ''
 winnerChosen_event = None
 service_endpoint = ''
 domain_registered = False
+announcement_watcher = None
+signed_bid_pool = None
+# Blocks during which a signed bid can be accepted, and port of the consumer API that receives the signed bids
+signed_bid_expiry_blocks = int(os.getenv('SIGNED_BID_EXPIRY_BLOCKS', '30'))
+consumer_api_port = int(os.getenv('CONSUMER_API_PORT', '8000'))
+# Seconds the experiments wait for each federation event (bids, winner, deployment confirmation)
+event_timeout = int(os.getenv('EVENT_TIMEOUT', '300'))
+# Seconds after the first bid the consumer waits for the SC to select the winner (max_bids or max_price) before choosing it itself
+bid_window = int(os.getenv('BID_WINDOW', '30'))
 
 # Initialize domain-specific configurations and variables
 if domain == "consumer":
@@ -149,10 +226,14 @@ if domain == "consumer":
     service_consumer_address = block_address
     service_requirements = 'service=object-detector;replicas=1'
     bids_event = None  # Placeholder for event listener setup
+    signed_bid_pool = SignedBidPool()  # Bids signed off-chain by the providers (received by /signed_bid)
     domain_name = "AD1"
 
-    # Load Kubernetes configuration
-    config.load_kube_config(config_file=os.path.join(os.getcwd(), "k8s-cluster-config", "microk8s-1-config"))
+    # Load Kubernetes configuration (the K8s functions fail until a cluster is configured, e.g. with the development chain)
+    try:
+        config.load_kube_config(config_file=os.path.join(os.getcwd(), "k8s-cluster-config", "microk8s-1-config"))
+    except Exception as e:
+        print(f"Failed to load the Kubernetes configuration: {e}")
 
 else:  # Provider
     # Provider-specific variables
@@ -165,11 +246,59 @@ else:  # Provider
     winnerChosen_event = None  # Placeholder for event listener setup
     domain_name = "AD2"
 
-    # Load Kubernetes configuration
-    config.load_kube_config(config_file=os.path.join(os.getcwd(), "k8s-cluster-config", "microk8s-2-config"))
+    # Service announcements are collected in the background (started with the application) and queued for the
+    # experiments and the bid workers, which get their own queue while they run
+    announcement_watcher = AnnouncementWatcher(
+        web3, ws_client, Federation_contract, lambda service_ids: GetServiceStates(service_ids),
+        cursor_path=os.getenv('ANNOUNCEMENT_CURSOR_PATH', 'announcement-cursor.json'),
+        consumers=(),
+        max_queue_size=int(os.getenv('ANNOUNCEMENT_QUEUE_SIZE', '100'))
+    )
+
+    # Load Kubernetes configuration (the K8s functions fail until a cluster is configured, e.g. with the development chain)
+    try:
+        config.load_kube_config(config_file=os.path.join(os.getcwd(), "k8s-cluster-config", "microk8s-2-config"))
+    except Exception as e:
+        print(f"Failed to load the Kubernetes configuration: {e}")
 
 print(f"Configuration complete for {domain_name} with IP {ip_address}.")
 
+# Fixed arguments of the pre-encoded calldata templates of the federation transactions (the endpoint of this
+# domain never changes). The templates are built on first use, so a contract artifact that lacks one of these
+# functions (e.g. not migrated yet) only fails when that function is called.
+call_template_args = {
+    "addOperator": {},
+    "AnnounceService": {"_endpoint_consumer": service_endpoint_consumer},
+    "AnnounceServiceWithDeadline": {"_endpoint_consumer": service_endpoint_consumer},
+    "AnnounceServiceWithMaxPrice": {"_endpoint_consumer": service_endpoint_consumer},
+    "PlaceBid": {"_endpoint": service_endpoint_provider},
+    "ChooseProvider": {},
+    "AcceptSignedBid": {},
+    "ServiceDeployed": {},
+    "SettleService": {},
+    "ReleaseService": {}
+}
+call_templates = {}
+
+def get_call_template(function_name):
+    """
+    Returns the pre-encoded calldata template of a Federation contract function, building it on first use.
+
+    Args:
+        function_name (str): Name of the Federation contract function.
+
+    Returns:
+        CallTemplate: The template.
+
+    Raises:
+        ValueError: If the function is not in the contract ABI.
+    """
+    template = call_templates.get(function_name)
+    if template is None:
+        template = CallTemplate(Federation_contract, function_name, **call_template_args.get(function_name, {}))
+        call_templates[function_name] = template
+    return template
+
 # CoreV1Api provides access to core components of Kubernetes such as pods, namespaces, and services.
 api_instance_coreV1 = client.CoreV1Api()
 
@@ -177,6 +306,48 @@ api_instance_coreV1 = client.CoreV1Api()
 # This includes managing deployments, stateful sets, and other application controllers
 api_instance_appsV1 = client.AppsV1Api()
 
+# Shared caches of the pods, deployments and services of the cluster, kept up to date from watch streams (started
+# with the application). The waiters and the K8s functions read them instead of listing the objects in the API server.
+pod_informer = Informer(api_instance_coreV1.list_pod_for_all_namespaces, "pods")
+deployment_informer = Informer(api_instance_appsV1.list_deployment_for_all_namespaces, "deployments")
+service_informer = Informer(api_instance_coreV1.list_service_for_all_namespaces, "services")
+
+# Bulk teardown of the experiment resources (deletecollection by label, tracked from the informers)
+teardown_grace_period = os.getenv('TEARDOWN_GRACE_PERIOD')
+teardown_engine = TeardownEngine(
+    api_instance_coreV1,
+    api_instance_appsV1,
+    {"pods": pod_informer, "deployments": deployment_informer, "services": service_informer},
+    propagation_policy=os.getenv('TEARDOWN_PROPAGATION_POLICY', 'Background'),
+    grace_period_seconds=int(teardown_grace_period) if teardown_grace_period else None
+)
+
+# Chart of the object detection service, rendered (and cached by values) and applied in-process instead of 'helm install'
+object_detection_chart = Chart("descriptors/6g-latency-sensitive-service/chart/app", api_instance_coreV1, api_instance_appsV1)
+
+# Warm standby pool of object detector pods of the provider (WARM_POOL_SIZE > 0): claimed on win by a label flip
+warm_pool_size = int(os.getenv('WARM_POOL_SIZE', '0'))
+warm_pool = None
+if domain == "provider" and warm_pool_size > 0:
+    provider_values_dir = "values/federation-object-detector-provider"
+    warm_pool = WarmPool(
+        object_detection_chart,
+        api_instance_coreV1,
+        pod_informer,
+        standby_release="federation-standby-provider",
+        service_release="federation-app-services-provider",
+        component_release="federation-app-core-provider",
+        standby_values=([f"{provider_values_dir}/config-map-values.yaml", f"{provider_values_dir}/deployment-values.yaml"],
+                        ["deployments[0].name=standby-object-detector", "deployments[0].app=standby-object-detector",
+                         f"deployments[0].replicas={warm_pool_size}"]),
+        service_values=([f"{provider_values_dir}/service-values.yaml"], []),
+        # The ConfigMaps belong to the standby release
+        component_values=([f"{provider_values_dir}/deployment-values.yaml"], ["configMaps=null"]),
+        app="object-detector",
+        standby_app="standby-object-detector",
+        size=warm_pool_size
+    )
+
 # Validate connectivity to Kubernetes and get the version information
 try:
     version_info = client.VersionApi().get_code()
@@ -189,56 +360,395 @@ except Exception as e:
 federation_step_times = []
 #----------------------------------------------------------------------------------#
 
-def send_signed_transaction(build_transaction):
+def build_transaction(function_name, **args):
+    """
+    Builds the transaction of a Federation contract call from its pre-encoded calldata template and the
+    learned gas profile, so no ContractFunction is created and web3 does not need to estimate the gas or
+    fetch the gas price and chain ID before signing.
+    The gas is only estimated live when the function has not been learned yet.
+    
+    Args:
+        function_name (str): Name of the Federation contract function.
+        **args: Values of the arguments that change between calls (e.g. _id).
+    
+    Returns:
+        dict: The transaction data (without nonce).
+    """
+    data = get_call_template(function_name).encode(**args)
+    gas = gas_profile.gas_limit(function_name)
+    if gas is None:
+        gas = int(web3.eth.estimateGas({'from': block_address, 'to': contract_address, 'data': data}) * gas_profile.margin)
+        print(f"No gas profile for {function_name}. Estimated gas limit: {gas}")
+
+    return {
+        'to': contract_address,
+        'data': data,
+        'value': 0,
+        'gas': gas,
+        'gasPrice': gas_profile.gas_price,
+        'chainId': gas_profile.chain_id
+    }
+
+def build_batch_transaction(contract_function):
+    """
+    Builds the transaction of a batched Federation contract call (e.g. AnnounceServices).
+    The gas of a batch grows with the number of services, so it is always estimated live
+    instead of being read from the gas profile.
+    
+    Args:
+        contract_function (ContractFunction): The contract function call with its arguments.
+    
+    Returns:
+        dict: The transaction data (without nonce).
+    """
+    data = contract_function._encode_transaction_data()
+    gas = int(web3.eth.estimateGas({'from': block_address, 'to': contract_address, 'data': data}) * gas_profile.margin)
+
+    return {
+        'to': contract_address,
+        'data': data,
+        'value': 0,
+        'gas': gas,
+        'gasPrice': gas_profile.gas_price,
+        'chainId': gas_profile.chain_id
+    }
+
+def learn_gas_usage(step, gas_limit):
+    """
+    Returns a receipt future callback that records the gas used by a transaction in the gas profile.
+    A transaction that reverted after consuming its whole gas limit is treated as out of gas, and the
+    function is forgotten so that the next call is estimated live.
+    
+    Args:
+        step (str): Name of the contract function.
+        gas_limit (int): Gas limit the transaction was sent with.
+    
+    Returns:
+        callable: Callback for Future.add_done_callback().
+    """
+    def callback(receipt):
+        try:
+            result = receipt.result()
+        except TransactionFailed as e:
+            if e.receipt['gas-used'] >= gas_limit:
+                print(f"{step} ran out of gas ({gas_limit}). Gas profile reset for this function.")
+                gas_profile.invalidate(step)
+            return
+        except Exception:
+            return
+        gas_profile.record(step, result['gas-used'])
+    return callback
+
+def broadcast_signed_transaction(signed_txn, tx_nonce, step, gas_limit):
+    """
+    Broadcasts an already signed transaction whose nonce was reserved from the nonce manager.
+    
+    Args:
+        signed_txn (SignedTransaction): The signed transaction.
+        tx_nonce (int): The nonce the transaction was signed with.
+        step (str): Name of the federation step, used to record the inclusion latency.
+        gas_limit (int): Gas limit the transaction was signed with, used to learn its gas usage.
+    
+    Returns:
+        Future: Resolves to the receipt summary (tx hash, block number, gas used, latency) once the
+                transaction is included in a block, or raises TransactionFailed if it reverted.
+    """
+    # Track the receipt before broadcasting, so the including block cannot be missed
+    receipt = tx_tracker.track(signed_txn.hash, step)
+    try:
+        # Send the signed transaction
+        tx_hash = web3.eth.sendRawTransaction(signed_txn.rawTransaction)
+    except Exception:
+        tx_tracker.forget(signed_txn.hash)
+        raise
+
+    nonce_manager.mark_pending(tx_nonce, tx_hash)
+    receipt.add_done_callback(lambda _, mined_nonce=tx_nonce: nonce_manager.confirm(mined_nonce))
+    receipt.add_done_callback(learn_gas_usage(step, gas_limit))
+    return receipt
+
+def send_signed_transaction(build_transaction, step):
     """
     Sends a signed transaction to the blockchain network using the private key.
+    A nonce is reserved from the nonce manager right before signing, so this function can be called
+    concurrently from several endpoints. If the node rejects the nonce, the manager is resynchronized
+    and the transaction is signed again once with a fresh nonce. If the transaction runs out of gas,
+    it is sent again once with a live gas estimation.
     
     Args:
-        build_transaction (dict): The transaction data to be sent.
+        build_transaction (dict): The transaction data to be sent (without nonce).
+        step (str): Name of the federation step, used to record the inclusion latency.
     
     Returns:
-        str: The transaction hash of the sent transaction.
+        Future: Resolves to the receipt summary (tx hash, block number, gas used, latency) once the
+                transaction is included in a block, or raises TransactionFailed if it reverted.
     """
-    global nonce
-    # Sign the transaction
-    signed_txn = web3.eth.account.signTransaction(build_transaction, private_key)
+    return resend_on_out_of_gas(sign_and_broadcast_transaction(build_transaction, step), build_transaction, step)
 
-    # Send the signed transaction
-    tx_hash = web3.eth.sendRawTransaction(signed_txn.rawTransaction)
+def resend_on_out_of_gas(receipt, build_transaction, step):
+    """
+    Follows the receipt of a transaction whose gas limit was read from the gas profile. The gas of a function
+    depends on the contract state (e.g. the first bid of a service costs more than the next ones), so if the
+    transaction ran out of gas, the gas is estimated live and the transaction is sent once more with a new nonce.
+    
+    Args:
+        receipt (Future): Receipt future of the transaction.
+        build_transaction (dict): The transaction data that was sent.
+        step (str): Name of the federation step.
+    
+    Returns:
+        Future: Resolves to the receipt of the transaction, or of the resent one if it ran out of gas.
+    """
+    result = Future()
+    gas_limit = build_transaction['gas']
 
-    # Increment the nonce
-    nonce += 1
+    def follow(receipt_future):
+        try:
+            result.set_result(receipt_future.result())
+        except Exception as e:
+            result.set_exception(e)
 
-    return tx_hash
+    def resend():
+        try:
+            transaction = dict(build_transaction)
+            transaction['gas'] = int(web3.eth.estimateGas(
+                {'from': block_address, 'to': transaction['to'], 'data': transaction['data']}) * gas_profile.margin)
+            print(f"{step} ran out of gas ({gas_limit}). Sending it again with a gas limit of {transaction['gas']}")
+            sign_and_broadcast_transaction(transaction, step).add_done_callback(follow)
+        except Exception as e:
+            result.set_exception(e)
+
+    def on_receipt(receipt_future):
+        try:
+            result.set_result(receipt_future.result())
+        except TransactionFailed as e:
+            if e.receipt['gas-used'] < gas_limit:
+                result.set_exception(e)
+                return
+            # Not on the receipt tracker thread: the estimation and the broadcast are blocking calls
+            threading.Thread(target=resend, daemon=True).start()
+        except Exception as e:
+            result.set_exception(e)
+
+    receipt.add_done_callback(on_receipt)
+    return result
 
-def AnnounceService():
+def sign_and_broadcast_transaction(build_transaction, step):
+    """
+    Reserves a nonce, signs and broadcasts a transaction (see send_signed_transaction).
+    
+    Args:
+        build_transaction (dict): The transaction data to be sent (without nonce).
+        step (str): Name of the federation step, used to record the inclusion latency.
+    
+    Returns:
+        Future: Resolves to the receipt summary once the transaction is included in a block.
+    """
+    for attempt in range(2):
+        tx_nonce = nonce_manager.reserve()
+        build_transaction['nonce'] = tx_nonce
+        try:
+            # Sign and send the transaction
+            signed_txn = web3.eth.account.signTransaction(build_transaction, private_key)
+            return broadcast_signed_transaction(signed_txn, tx_nonce, step, build_transaction['gas'])
+        except Exception as e:
+            # Give the nonce back so the next transaction fills the gap
+            nonce_manager.release(tx_nonce)
+            if attempt == 0 and isinstance(e, ValueError) and 'nonce' in str(e).lower():
+                print(f"Nonce {tx_nonce} rejected by the node ({e}). Resynchronizing nonce...")
+                nonce_manager.resync()
+                continue
+            if attempt == 0 and isinstance(e, ValueError) and any(m in str(e).lower() for m in ('underpriced', 'fee cap')):
+                print(f"Gas price rejected by the node ({e}). Refreshing gas price...")
+                gas_profile.refresh_fees(web3)
+                build_transaction['gasPrice'] = gas_profile.gas_price
+                continue
+            raise
+
+def prebuild_service_deployed(service_id, candidate_ips):
+    """
+    Speculatively signs the ServiceDeployed confirmation while the federated service is still being deployed:
+    one transaction is signed for each external IP the load balancer can assign, so it only has to be broadcast
+    once the external IP is known. The nonce is reserved speculatively (see NonceManager.reserve_speculative): only
+    if no other transaction of this domain is in flight, and any transaction sent during the deployment (e.g. a
+    bid for another service) takes it over, so the confirmation never holds the other transactions back.
+    
+    Args:
+        service_id (str): The unique identifier of the service.
+        candidate_ips (list): External IPs that the load balancer may assign to the service.
+    
+    Returns:
+        dict: The speculative nonce ('nonce', None if the domain was busy), the transaction (without nonce) of each
+              candidate IP ('transactions') and, if a nonce was reserved, their signed version ('signed').
+    """
+    transactions = {external_ip: build_transaction("ServiceDeployed", info=external_ip, _id=service_id) for external_ip in candidate_ips}
+    tx_nonce = nonce_manager.reserve_speculative()
+    if tx_nonce is None:
+        return {"nonce": None, "transactions": transactions, "signed": {}}
+    try:
+        signed = {external_ip: web3.eth.account.signTransaction(dict(transaction, nonce=tx_nonce), private_key)
+                  for external_ip, transaction in transactions.items()}
+    except Exception:
+        nonce_manager.cancel_speculative(tx_nonce)
+        raise
+    return {"nonce": tx_nonce, "transactions": transactions, "signed": signed}
+
+def deploy_with_prebuilt_confirmation(service_id, deploy_function, *args):
+    """
+    Runs the deployment of a federated service while the ServiceDeployed confirmation is signed in the
+    background for the external IPs of LB_ADDRESS_POOL (nothing is prebuilt if it is not set).
+    
+    Args:
+        service_id (str): The unique identifier of the service.
+        deploy_function (callable): Deployment function that returns the external IP (or None on failure).
+        *args: Arguments of the deployment function.
+    
+    Returns:
+        tuple: The external IP and the result of prebuild_service_deployed() to send with ServiceDeployed.
+    
+    Raises:
+        RuntimeError: If the deployment did not return an external IP.
+    """
+    candidate_ips = load_balancer_candidate_ips()
+    prebuilt = None
+    external_ip = None
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        prebuilt_future = executor.submit(prebuild_service_deployed, service_id, candidate_ips) if candidate_ips else None
+        try:
+            external_ip = deploy_function(*args)
+        finally:
+            if prebuilt_future is not None:
+                try:
+                    prebuilt = prebuilt_future.result()
+                except Exception as e:
+                    print(f"Failed to prebuild the ServiceDeployed confirmation of {service_id}: {e}")
+            if external_ip is None and prebuilt and prebuilt["nonce"] is not None:
+                # Not deployed: the confirmation will not be sent
+                nonce_manager.cancel_speculative(prebuilt["nonce"])
+
+    if external_ip is None:
+        raise RuntimeError(f"Failed to deploy the federated service {service_id}")
+    return external_ip, prebuilt
+
+def load_balancer_candidate_ips():
+    """
+    Returns the external IPs the load balancer (MetalLB) can assign, from the LB_ADDRESS_POOL environment
+    variable (e.g. "10.5.50.80-10.5.50.90" or a comma-separated list).
+    
+    Returns:
+        list: Candidate external IPs (empty if the pool is not configured).
+    """
+    candidate_ips = []
+    for entry in filter(None, os.getenv('LB_ADDRESS_POOL', '').replace(' ', '').split(',')):
+        if '-' in entry:
+            first, last = (ipaddress.ip_address(ip) for ip in entry.split('-', 1))
+            candidate_ips.extend(str(ipaddress.ip_address(ip)) for ip in range(int(first), int(last) + 1))
+        else:
+            candidate_ips.append(entry)
+    return candidate_ips
+
+def AnnounceService(deadline_blocks=0, max_bids=0, max_price=None):
     """
     Consumer AD announces the need for a federated service. 
     This transaction includes the service requirements, consumer's endpoint, and a unique service identifier.
+    With a deadline or a maximum number of bids, the SC selects the winner itself (lowest price) and closes
+    the announcement, so the consumer does not send ChooseProvider. With a maximum price (instant accept),
+    the first bid at or below it closes the announcement in the same transaction.
+    
+    Args:
+        deadline_blocks (int): Blocks after which the first bid or SettleService call closes the announcement (0 for none).
+        max_bids (int): Number of bids after which the announcement is closed (0 for none).
+        max_price (int): Highest price accepted instantly (None to disable instant accept).
     
     Returns:
-        Filter: A filter for catching the 'NewBid' event that is emitted when a new bid is placed for the announced service.
+        Future: Resolves to the transaction receipt once the announcement is included in a block.
     """
     global service_id
     service_id = 'service' + str(int(time.time()))
-    announce_transaction = Federation_contract.functions.AnnounceService(
-        _requirements=web3.toBytes(text=service_requirements),
-        _endpoint_consumer=web3.toBytes(text=service_endpoint_consumer),
-        _id=web3.toBytes(text=service_id)
-    ).buildTransaction({
-        'from': block_address,
-        'nonce': nonce
-    })
+    if max_price is not None:
+        announce_transaction = build_transaction("AnnounceServiceWithMaxPrice", _requirements=service_requirements, _id=service_id,
+                                                 max_price=max_price)
+        step = "AnnounceServiceWithMaxPrice"
+    elif deadline_blocks > 0 or max_bids > 0:
+        announce_transaction = build_transaction("AnnounceServiceWithDeadline", _requirements=service_requirements, _id=service_id,
+                                                 deadline_blocks=deadline_blocks, max_bids=max_bids)
+        step = "AnnounceServiceWithDeadline"
+    else:
+        announce_transaction = build_transaction("AnnounceService", _requirements=service_requirements, _id=service_id)
+        step = "AnnounceService"
     
     # Send the signed transaction
-    tx_hash = send_signed_transaction(announce_transaction)
+    return send_signed_transaction(announce_transaction, step)
+
+def AnnounceServices(requirements_list):
+    """
+    Consumer AD announces several federated services in a single transaction, one per requirements entry.
+    The contract emits the same 'ServiceAnnouncement' event for each service as AnnounceService.
     
-    block = web3.eth.getBlock('latest')
-    block_number = block['number']
+    Args:
+        requirements_list (list): The requirements of each service (e.g. 'service=object-detector;replicas=1').
     
-    event_filter = Federation_contract.events.NewBid.createFilter(fromBlock=web3.toHex(block_number))
+    Returns:
+        tuple: The unique identifiers of the announced services, and a Future that resolves to the transaction
+               receipt once the announcements are included in a block.
+    """
+    timestamp = str(int(time.time()))
+    service_ids = [f"service{timestamp}-{index}" for index in range(len(requirements_list))]
+    announce_function = Federation_contract.functions.AnnounceServices(
+        reqs=[web3.toBytes(text=requirements) for requirements in requirements_list],
+        endpoints=[web3.toBytes(text=service_endpoint_consumer)] * len(service_ids),
+        ids=[web3.toBytes(text=_service_id) for _service_id in service_ids]
+    )
+
+    # Send the signed transaction
+    receipt = send_signed_transaction(build_batch_transaction(announce_function), "AnnounceServices")
+    return service_ids, receipt
+
+def SubscribeEvent(event_name, topics=None, subscriptions=None):
+    """
+    Subscribes to a Federation contract event through the websocket node (eth_subscribe('logs')), so the
+    event is pushed to this domain as soon as its block is imported instead of polling a filter.
+    Subscribe before sending the transaction that triggers the event, so that no event is missed.
     
-    return event_filter
+    Args:
+        event_name (str): Name of the event (e.g. 'NewBid').
+        topics (list): Optional filters for the indexed event arguments, in declaration order
+                       (None matches any value), e.g. [None, address_topic(block_address)].
+        subscriptions (list): Optional list the subscription is added to, so the caller can close all of them
+                              in a finally block.
+    
+    Returns:
+        EventSubscription: The started subscription (close it once it is no longer needed).
+    """
+    subscription = EventSubscription(ws_client, getattr(Federation_contract.events, event_name), topics)
+    subscription.start()
+    if subscriptions is not None:
+        subscriptions.append(subscription)
+    return subscription
+
+def address_topic(address):
+    """
+    Returns the log topic of an indexed address argument.
+    
+    Args:
+        address (str): Blockchain address (e.g. of the creator or the provider of a service).
+    
+    Returns:
+        str: The topic as a hex string.
+    """
+    return '0x' + address[2:].lower().rjust(64, '0')
+
+def event_service_id(event):
+    """
+    Returns the service ID carried by a Federation contract event.
+    
+    Args:
+        event (AttributeDict): Decoded event with an '_id' argument.
+    
+    Returns:
+        str: The service ID.
+    """
+    return web3.toText(event['args']['_id']).rstrip('\x00')
 
 def GetBidInfo(bid_index):
     """
@@ -253,23 +763,179 @@ def GetBidInfo(bid_index):
     bid_info = Federation_contract.functions.GetBid(_id=web3.toBytes(text=service_id), bider_index=bid_index, _creator=block_address).call()
     return bid_info
 
+def GetBids(service_id, page_size=100):
+    """
+    Consumer AD retrieves the whole bid pool of a service, reading it with GetBids in pages of page_size bids.
+    
+    Args:
+        service_id (str): The unique identifier of the service.
+        page_size (int): Maximum number of bids returned by each call (at least 1).
+    
+    Returns:
+        list: The bids (provider address, service price, provider endpoint and bid index), in arrival order.
+    """
+    if page_size < 1:
+        raise ValueError("page_size must be at least 1")
+    bids = []
+    while True:
+        bid_addresses, prices, endpoints = Federation_contract.functions.GetBids(
+            _id=web3.toBytes(text=service_id), offset=len(bids), limit=page_size, _creator=block_address).call()
+        for bid_address, price, endpoint in zip(bid_addresses, prices, endpoints):
+            bids.append({
+                "provider-address": bid_address,
+                "service-price": price,
+                "endpoint-provider": web3.toText(endpoint).rstrip('\x00'),
+                "bid-index": len(bids)
+            })
+        if len(bid_addresses) < page_size:
+            return bids
+
 def ChooseProvider(bid_index):
     """
     Consumer AD chooses a provider from the list of bids based on the bid index. 
     
     Args:
         bid_index (int): The index of the bid that identifies the chosen provider.
+    
+    Returns:
+        Future: Resolves to the transaction receipt once the choice is included in a block.
     """
-    choose_transaction = Federation_contract.functions.ChooseProvider(
-        _id=web3.toBytes(text=service_id),
-        bider_index=bid_index
-    ).buildTransaction({
-        'from': block_address,
-        'nonce': nonce
-    })
+    choose_transaction = build_transaction("ChooseProvider", _id=service_id, bider_index=bid_index)
 
     # Send the signed transaction
-    tx_hash = send_signed_transaction(choose_transaction)
+    return send_signed_transaction(choose_transaction, "ChooseProvider")
+
+def AcceptSignedBid(bid):
+    """
+    Consumer AD closes the service announcement with a bid signed off-chain by a provider (EIP-712).
+    The SC verifies the signature, so this single transaction replaces the PlaceBid of the provider
+    and the ChooseProvider of the consumer.
+    
+    Args:
+        bid (dict): The signed bid (as received by the /signed_bid endpoint).
+    
+    Returns:
+        Future: Resolves to the transaction receipt once the choice is included in a block.
+    """
+    accept_transaction = build_transaction("AcceptSignedBid", _id=bid["service-id"], _price=bid["price"],
+                                           _endpoint=bid["endpoint-provider"], expiry_block=bid["expiry-block"],
+                                           v=bid["v"], r=web3.toBytes(hexstr=bid["r"]), s=web3.toBytes(hexstr=bid["s"]))
+
+    # Send the signed transaction
+    return send_signed_transaction(accept_transaction, "AcceptSignedBid")
+
+def AcceptBestSignedBid(service_id, timeout=60):
+    """
+    Consumer AD accepts the lowest signed bid received for a service and waits for the transaction. If the SC
+    rejects it (e.g. the bid expired meanwhile), the next lowest bid is tried.
+    
+    Args:
+        service_id (str): The unique identifier of the service.
+        timeout (int): Timeout in seconds for the inclusion of each AcceptSignedBid transaction.
+    
+    Returns:
+        dict: The accepted bid.
+    
+    Raises:
+        ValueError: If no signed bid could be accepted.
+    """
+    for bid in sorted(signed_bid_pool.get(service_id), key=lambda bid: bid["price"]):
+        try:
+            AcceptSignedBid(bid).result(timeout=timeout)
+        except (TransactionFailed, ValueError) as e:
+            print(f"Signed bid of {bid['provider']} rejected by the SC: {e}")
+            continue
+        signed_bid_pool.pop(service_id)
+        return bid
+    raise ValueError(f"No signed bid could be accepted for the service {service_id}")
+
+def VerifySignedBid(bid):
+    """
+    Consumer AD checks a signed bid before keeping it: it must be addressed to this domain, for one of its
+    open services, not expired and signed by the registered provider it claims (the same checks as AcceptSignedBid).
+    
+    Args:
+        bid (dict): The signed bid.
+    
+    Raises:
+        ValueError: If the bid can not be accepted.
+    """
+    if web3.toChecksumAddress(bid["consumer"]) != web3.toChecksumAddress(block_address):
+        raise ValueError("The bid is addressed to another consumer")
+    if GetServiceState(bid["service-id"]) != 0:
+        raise ValueError(f"The service {bid['service-id']} is closed or not exists")
+    if bid["expiry-block"] < web3.eth.blockNumber:
+        raise ValueError("The signed bid has expired")
+    signer = recover_bid_signer(gas_profile.chain_id, contract_address, bid)
+    if signer != web3.toChecksumAddress(bid["provider"]):
+        raise ValueError("Invalid bid signature")
+    if Federation_contract.functions.operator(signer).call() == bytes(32):
+        raise ValueError(f"The provider {signer} is not a registered operator")
+
+def SettleService(service_id):
+    """
+    Closes a service announced with a deadline once the deadline is reached, selecting the lowest bid as the winner.
+    Any domain can send it (e.g. when no further bid arrives after the deadline).
+    
+    Args:
+        service_id (str): The unique identifier of the service.
+    
+    Returns:
+        Future: Resolves to the transaction receipt once the service is closed.
+    """
+    settle_transaction = build_transaction("SettleService", _id=service_id)
+
+    # Send the signed transaction
+    return send_signed_transaction(settle_transaction, "SettleService")
+
+def WaitForWinner(service_id, bids_subscription, closed_subscription, expected_bids=0):
+    """
+    Consumer AD waits for the SC to select the winner of a service announced with automatic selection (max_bids
+    or max_price), once its first bid is received. If the SC has not closed the announcement when expected_bids
+    bids have been received or bid_window seconds have passed (e.g. no bid is at or below the maximum price),
+    the consumer falls back to choosing the lowest bid with ChooseProvider.
+    
+    Args:
+        service_id (str): The unique identifier of the service.
+        bids_subscription (EventSubscription): 'NewBid' subscription the first bid was received from.
+        closed_subscription (EventSubscription): 'ServiceAnnouncementClosed' subscription.
+        expected_bids (int): Number of bids (including the first one) after which the consumer stops waiting
+                             for the SC (0 waits for the whole bid window).
+    
+    Returns:
+        tuple: The address of the winner, and True if the consumer chose it with ChooseProvider.
+    """
+    matches = lambda event: event_service_id(event) == service_id
+
+    async def wait_for_closed_or_bids():
+        closed = asyncio.ensure_future(closed_subscription.next_event(matches))
+        waits = {closed}
+        if expected_bids > 0:
+            async def remaining_bids():
+                for _ in range(expected_bids - 1):
+                    await bids_subscription.next_event(matches)
+            waits.add(asyncio.ensure_future(remaining_bids()))
+        done, pending = await asyncio.wait(waits, timeout=bid_window, return_when=asyncio.FIRST_COMPLETED)
+        for wait in pending:
+            wait.cancel()
+        return closed.result() if closed in done else None
+
+    closed_event = asyncio.run_coroutine_threadsafe(wait_for_closed_or_bids(), ws_client.loop).result()
+    if closed_event is not None:
+        return closed_event['args']['provider'], False
+
+    print(f"The SC did not select a winner for {service_id}: choosing the lowest bid")
+    if GetServiceState(service_id) == 0:
+        best_bid = min(GetBids(service_id), key=lambda bid: bid["service-price"])
+        try:
+            ChooseProvider(best_bid["bid-index"]).result(timeout=event_timeout)
+            return best_bid["provider-address"], True
+        except TransactionFailed:
+            # A bid closed the announcement in the meantime, its event is still queued
+            if GetServiceState(service_id) == 0:
+                raise
+    closed_event = closed_subscription.wait_for(matches, event_timeout)
+    return closed_event['args']['provider'], False
 
 def GetServiceState(service_id):
     """
@@ -284,6 +950,25 @@ def GetServiceState(service_id):
     service_state = Federation_contract.functions.GetServiceState(_id=web3.toBytes(text=service_id)).call()
     return service_state
 
+def GetServiceStates(service_ids):
+    """
+    Returns the current state of several services using a single batched JSON-RPC request.
+    
+    Args:
+        service_ids (list): The unique identifiers of the services.
+    
+    Returns:
+        list: The state of each service (0 for Open, 1 for Closed, 2 for Deployed), in the same order.
+    """
+    batch = CallBatch(ws_client)
+    for service_id in service_ids:
+        batch.add(Federation_contract.functions.GetServiceState(_id=web3.toBytes(text=service_id)))
+    service_states = batch.execute()
+    for state in service_states:
+        if isinstance(state, Exception):
+            raise state
+    return service_states
+
 def GetDeployedInfo(service_id):
     """
     Consumer AD retrieves the deployment information of a service, including the service ID, provider's endpoint, and external IP (exposed IP for the federated service).
@@ -302,6 +987,21 @@ def GetDeployedInfo(service_id):
     return _external_ip, _service_endpoint_provider
     #return service_endpoint_provider
 
+def BidsEvent(service_id, block_number):
+    """
+    Creates a filter to catch the 'NewBid' events emitted when a bid is placed for a service.
+    
+    Args:
+        service_id (str): The unique identifier of the service.
+        block_number (int): Block from which the bids are caught.
+    
+    Returns:
+        Filter: A filter for catching the 'NewBid' events of the service.
+    """
+    # Only the bids for this service ('_id' is an indexed topic, filtered by the node)
+    return Federation_contract.events.NewBid.createFilter(fromBlock=web3.toHex(block_number),
+                                                          argument_filters={'_id': web3.toBytes(text=service_id)})
+
 def ServiceAnnouncementEvent():
     """
     Creates a filter to catch the 'ServiceAnnouncement' event emitted when a service is announced. This function
@@ -326,28 +1026,84 @@ def PlaceBid(service_id, service_price):
         service_price (int): The price offered for providing the service.
     
     Returns:
-        Filter: A filter for catching the 'ServiceAnnouncementClosed' event that is emitted when a service
-                announcement is closed.
-    """
-    place_bid_transaction = Federation_contract.functions.PlaceBid(
-        _id=web3.toBytes(text=service_id),
-        _price=service_price,
-        _endpoint=web3.toBytes(text=service_endpoint_provider)
-    ).buildTransaction({
-        'from': block_address,
-        'nonce': nonce
-    })
+        Future: Resolves to the transaction receipt of the bid once it is included in a block.
+    """
+    place_bid_transaction = build_transaction("PlaceBid", _id=service_id, _price=service_price)
 
     # Send the signed transaction
-    tx_hash = send_signed_transaction(place_bid_transaction)
+    return send_signed_transaction(place_bid_transaction, "PlaceBid")
 
-    block = web3.eth.getBlock('latest')
-    block_number = block['number']
-    print("\nLatest block:", block_number)
+def SendSignedBid(service_id, service_price):
+    """
+    Provider AD signs a bid offer off-chain (EIP-712) and sends it to the API of the consumer (at the consumer
+    endpoint of the service) instead of placing it in the SC. The consumer accepts it with AcceptSignedBid.
+    
+    Args:
+        service_id (str): The unique identifier of the service for which the bid is placed.
+        service_price (int): The price offered for providing the service.
+    
+    Returns:
+        dict: The response of the consumer.
+    """
+    service_info = Federation_contract.functions.service(web3.toBytes(text=service_id)).call()
+    consumer, endpoint_consumer = service_info[0], web3.toText(service_info[8]).rstrip('\x00')
+    block_number = web3.eth.blockNumber
+    bid = sign_bid(private_key, gas_profile.chain_id, contract_address, service_id, consumer, service_price,
+                   service_endpoint_provider, block_number + signed_bid_expiry_blocks)
 
-    event_filter = Federation_contract.events.ServiceAnnouncementClosed.createFilter(fromBlock=web3.toHex(block_number))
+    response = requests.post(f"http://{endpoint_consumer}:{consumer_api_port}/signed_bid", json=bid, timeout=10)
+    response.raise_for_status()
+    return response.json()
 
-    return event_filter
+def PlaceBids(service_ids, service_prices):
+    """
+    Provider AD places a bid offer for several services in a single transaction.
+    The contract emits the same 'NewBid' event for each service as PlaceBid, and skips the services that are
+    already closed (e.g. won by another provider while they were queued) instead of reverting the batch.
+    
+    Args:
+        service_ids (list): The unique identifiers of the services for which the bids are placed.
+        service_prices (list or int): The price offered for each service (or the same price for all of them).
+    
+    Returns:
+        Future: Resolves to the transaction receipt once the bids are included in a block.
+    """
+    if isinstance(service_prices, int):
+        service_prices = [service_prices] * len(service_ids)
+    bids_function = Federation_contract.functions.PlaceBids(
+        ids=[web3.toBytes(text=_service_id) for _service_id in service_ids],
+        prices=service_prices,
+        endpoint=web3.toBytes(text=service_endpoint_provider)
+    )
+
+    # Send the signed transaction
+    return send_signed_transaction(build_batch_transaction(bids_function), "PlaceBids")
+
+def bid_worker(worker_index, service_price, batch_size=1):
+    """
+    Provider AD bid worker: takes the open service announcements queued by the announcement watcher and places a bid
+    offer for each of them, so a burst of announcements is handled concurrently by several workers.
+    Up to batch_size announcements already waiting in the queue are answered with a single PlaceBids transaction.
+    
+    Args:
+        worker_index (int): Index of the worker (used in the logs).
+        service_price (int): The price offered for providing the services.
+        batch_size (int): Maximum number of services bid for in one transaction.
+    """
+    while True:
+        announcements = announcement_watcher.next_announcements("bid-workers", batch_size)
+        service_ids = [announcement["service-id"] for announcement in announcements]
+        try:
+            if len(service_ids) == 1:
+                receipt = PlaceBid(service_ids[0], service_price)
+            else:
+                receipt = PlaceBids(service_ids, service_price)
+            print(f"\n\033[1;32m(TX-2) Bid offer sent to the SC by worker {worker_index} (service-ids: {service_ids})\033[0m")
+            receipt.result(timeout=60)
+        except Exception as e:
+            print(f"Bid worker {worker_index} failed to bid for {service_ids}: {e}")
+        for announcement in announcements:
+            announcement_watcher.done(announcement)
 
 def CheckWinner(service_id):
     """
@@ -359,33 +1115,103 @@ def CheckWinner(service_id):
     Returns:
         bool: True if the caller is the winning provider, False otherwise.
     """
-    state = GetServiceState(service_id)
+    # State and winner are read in one batched request; isWinner reverts unless the service is closed
+    batch = CallBatch(ws_client)
+    batch.add(Federation_contract.functions.GetServiceState(_id=web3.toBytes(text=service_id)))
+    batch.add(Federation_contract.functions.isWinner(_id=web3.toBytes(text=service_id), _winner=block_address))
+    state, is_winner = batch.execute()
+    if isinstance(state, Exception):
+        raise state
     result = False
     if state == 1:
-        result = Federation_contract.functions.isWinner(_id=web3.toBytes(text=service_id), _winner=block_address).call()
+        result = is_winner is True
         print("Am I a Winner? ", result)
     return result
 
 
-def ServiceDeployed(service_id, external_ip):
+def ServiceDeployed(service_id, external_ip, prebuilt=None):
     """
     Provider AD confirms the operation of a service deployment.
     This transaction includes the external IP and the service ID, and it records the successful deployment.
+    If the confirmation was signed while deploying and its nonce was not taken over, the matching transaction is
+    only broadcast; otherwise it is signed now with a new nonce.
     
     Args:
         service_id (str): The unique identifier of the service.
         external_ip (str): The external IP address for the deployed service (~ exposed IP).
+        prebuilt (dict): Optional result of prebuild_service_deployed() for this service.
+    
+    Returns:
+        Future: Resolves to the transaction receipt once the confirmation is included in a block.
+    """
+    if prebuilt and prebuilt["nonce"] is not None:
+        tx_nonce = prebuilt["nonce"]
+        if external_ip in prebuilt["signed"] and nonce_manager.claim_speculative(tx_nonce):
+            # Signed while deploying and the nonce is still free: only the broadcast is left
+            service_deployed_transaction = prebuilt["transactions"][external_ip]
+            try:
+                receipt = broadcast_signed_transaction(prebuilt["signed"][external_ip], tx_nonce, "ServiceDeployed",
+                                                       service_deployed_transaction['gas'])
+                return resend_on_out_of_gas(receipt, dict(service_deployed_transaction), "ServiceDeployed")
+            except Exception as e:
+                print(f"Prebuilt ServiceDeployed rejected by the node ({e}). Signing it again...")
+                nonce_manager.release(tx_nonce)
+        else:
+            # Another transaction took the nonce over, or the IP is outside LB_ADDRESS_POOL
+            nonce_manager.cancel_speculative(tx_nonce)
+
+    if prebuilt and external_ip in prebuilt["transactions"]:
+        service_deployed_transaction = dict(prebuilt["transactions"][external_ip])
+    else:
+        # Not prebuilt (no LB_ADDRESS_POOL, or an IP outside of it)
+        service_deployed_transaction = build_transaction("ServiceDeployed", info=external_ip, _id=service_id)
+
+    # Send the signed transaction (the nonce is reserved now)
+    return send_signed_transaction(service_deployed_transaction, "ServiceDeployed")
+
+def ReleaseService(service_id):
+    """
+    Releases a finished federated service: the SC deletes the service and its bids (bounding the chain state)
+    and emits the 'ServiceReleased' event. A deployed service can be released by its creator or provider, an open
+    service without bids or past its deadline by its creator, and so can a closed service that its provider did not
+    deploy within CLOSED_RELEASE_TIMEOUT_BLOCKS.
+    
+    Args:
+        service_id (str): The unique identifier of the service.
+    
+    Returns:
+        Future: Resolves to the transaction receipt once the release is included in a block.
     """
-    service_deployed_transaction = Federation_contract.functions.ServiceDeployed(
-        info=web3.toBytes(text=external_ip),
-        _id=web3.toBytes(text=service_id)
-    ).buildTransaction({
-        'from': block_address,
-        'nonce': nonce
-    })
+    release_transaction = build_transaction("ReleaseService", _id=service_id)
 
     # Send the signed transaction
-    tx_hash = send_signed_transaction(service_deployed_transaction)
+    return send_signed_transaction(release_transaction, "ReleaseService")
+
+def release_deployed_services():
+    """
+    Releases in the SC the federated services deployed by this domain (provider = this domain, state = Deployed in
+    the event index), so they survive a restart of the application. Called when the deployed resources are deleted.
+    A failed release (e.g. already released by the consumer) is only reported.
+    """
+    # Index the latest blocks first, so a ServiceDeployed confirmed a moment ago is included
+    event_indexer.sync()
+    services = event_indexer.get_services(state=2, provider=web3.toChecksumAddress(block_address), limit=1000)
+
+    # The releases are sent at once (one nonce each) and their receipts awaited afterwards
+    receipts = []
+    for service_id in [service["service_id"] for service in services]:
+        receipt = Future()
+        try:
+            receipt = ReleaseService(service_id)
+        except Exception as e:
+            receipt.set_exception(e)
+        receipts.append((service_id, receipt))
+    for service_id, receipt in receipts:
+        try:
+            receipt.result(timeout=60)
+            print(f"\n\033[1;32mService {service_id} released in the SC\033[0m")
+        except Exception as e:
+            print(f"Failed to release service {service_id} in the SC: {e}")
 
 def DisplayServiceState(service_id):
     """
@@ -412,13 +1238,13 @@ def extract_service_requirements(requirements):
     - requirements (str): String containing service and replicas in the format "service=X;replicas=Y".
 
     Returns:
-    - tuple: A tuple containing extracted service and replicas.
+    - tuple: A tuple containing extracted service and replicas (int).
     """
-    match = re.match(r'service=(.*?);replicas=(.*)', requirements)
+    match = re.match(r'service=(.*?);replicas=(\d+)', requirements)
 
     if match:
         requested_service = match.group(1)
-        replicas = match.group(2)
+        replicas = int(match.group(2))
         return requested_service, replicas
     else:
         return None, None
@@ -504,24 +1330,8 @@ def delete_all_k8s_resources(namespace='default'):
     """
 
     try:
-        # Delete all Pods
-        pods = api_instance_coreV1.list_namespaced_pod(namespace)
-        for pod in pods.items:
-            api_instance_coreV1.delete_namespaced_pod(name=pod.metadata.name, namespace=namespace)
-            print(f"Pod '{pod.metadata.name}' deleted from namespace '{namespace}'.")
-
-        # Delete all Deployments
-        deployments = api_instance_appsV1.list_namespaced_deployment(namespace)
-        for deployment in deployments.items:
-            api_instance_appsV1.delete_namespaced_deployment(name=deployment.metadata.name, namespace=namespace)
-            print(f"Deployment '{deployment.metadata.name}' deleted from namespace '{namespace}'.")
-
-        # Delete all Services, except those with type ClusterIP
-        services = api_instance_coreV1.list_namespaced_service(namespace)
-        for service in services.items:
-            if service.spec.type != "ClusterIP":
-                api_instance_coreV1.delete_namespaced_service(name=service.metadata.name, namespace=namespace)
-                print(f"Service '{service.metadata.name}' deleted from namespace '{namespace}'.")
+        # Delete all Pods and Deployments (one request per kind) and the Services concurrently
+        teardown_engine.delete_all(namespace)
 
     except ApiException as e:
         print(f"Exception when calling Kubernetes API for deletion: {e}")
@@ -533,28 +1343,26 @@ def delete_all_k8s_resources(namespace='default'):
 
 # Function to deploy object detection service
 def deploy_entire_object_detection_service(replicas=1):
-    dir_path = "descriptors/6g-latency-sensitive-service/chart"
+    # If replicas parameter is different than 1, set the replicas of the object detector
+    set_values = [f"deployments[4].replicas={replicas}"] if replicas != 1 else []
     try:
-        # Helm install commands for app-services and app-core
-        subprocess.run(["helm", "install", "app-services", "./app", "-f", "./app/values/service-values.yaml"], cwd=dir_path, check=True)
-        print("Services were applied successfully.")
-
-        # Wait for the mediamtx_service IP 
-        mediamtx_service_ip = wait_for_service_ready("mediamtx-service")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # Install app-services and app-core concurrently (app-core does not depend on the services IP)
+            services = executor.submit(object_detection_chart.install, "app-services", ["values/service-values.yaml"])
+            core = executor.submit(object_detection_chart.install, "app-core",
+                                   ["values/config-map-values.yaml", "values/deployment-values.yaml"], set_values)
+            services.result()
+            print("Services were applied successfully.")
+
+            # Wait for the mediamtx_service IP while the configmaps and deployments are applied
+            mediamtx_service_ip = wait_for_service_ready("mediamtx-service")
+            core.result()
+            print("Configmaps and deployments were applied successfully.")
         if mediamtx_service_ip is None:
             print("Failed to obtain mediamtx_service IP.")
             return None
         print(f"Found mediamtx_service IP: {mediamtx_service_ip}")
-        
-        helm_command_core = ["helm", "install", "app-core", "./app", "-f", "./app/values/config-map-values.yaml", "-f", "./app/values/deployment-values.yaml"]
-
-        # If replicas parameter is different than 1, add the replicas flag to Helm command
-        if replicas != 1:
-            helm_command_core.extend(["--set", f"deployments[4].replicas={replicas}"])
-
-        subprocess.run(helm_command_core, cwd=dir_path, check=True)
-        print("Configmaps and deployments were applied successfully.")
-    except subprocess.CalledProcessError as e:
+    except (ApiException, ValueError, TimeoutError) as e:
         print(f"Failed to apply services: {e}")
         return None
 
@@ -564,15 +1372,19 @@ def deploy_entire_object_detection_service(replicas=1):
 
 # Function to delete object detection service
 def delete_entire_object_detection_service():
+    releases = ["app-core", "app-services"]
+    # The federated services no longer exist: release them in the SC while the pods terminate
+    release_thread = threading.Thread(target=release_deployed_services)
+    release_thread.start()
+
     try:
-        # Uninstall Helm releases for app-core and app-services
-        subprocess.run(["helm", "uninstall", "app-core"], check=True)
-        print("Release \"app-core\" uninstalled.")
-        subprocess.run(["helm", "uninstall", "app-services"], check=True)
-        print("Release \"app-services\" uninstalled.")
-    except subprocess.CalledProcessError as e:
+        # Delete the resources of the Helm releases for app-core and app-services (concurrently, by release label)
+        teardown_engine.delete_releases(releases)
+    except ApiException as e:
         print(f"Failed to uninstall services: {e}")
         return
+    finally:
+        release_thread.join()
 
     # Wait for all deployments to terminate
     wait_for_pods_terminated([
@@ -581,32 +1393,46 @@ def delete_entire_object_detection_service():
         "sampler-sender-",
         "receiver-encoder-publisher-",
         "mediamtx-"
-    ])
+    ], labels={RELEASE_LABEL: "app-core"})
 
 # Function to deploy only object detector component
 def deploy_object_detection_federation_component(domain, service_to_wait, replicas=1):
-    dir_path = "descriptors/6g-latency-sensitive-service/chart"
-    try:
-        # Helm install commands for app-services and app-core
-        subprocess.run(["helm", "install", f"federation-app-services-{domain}", "./app", "-f", f"./app/values/federation-object-detector-{domain}/service-values.yaml"], cwd=dir_path, check=True)
-        print("Services were applied successfully.")
+    if warm_pool is not None and domain == "provider":
+        # Warm pool mode: the service already exists, move ready standby pods into it
+        try:
+            claimed = warm_pool.claim(replicas)
+            if len(claimed) < replicas:
+                print("Not enough ready standby pods in the warm pool: deploying the rest of the component from cold")
+                warm_pool.deploy(replicas - len(claimed))
+            service_ip = wait_for_service_ready(service_to_wait)
+        except (ApiException, ValueError, TimeoutError) as e:
+            print(f"Failed to provision the component from the warm pool: {e}")
+            return None
+        print(f"Found {service_to_wait} IP: {service_ip}")
+        return service_ip
 
-        # Wait for the object_detection_service IP 
-        service_ip = wait_for_service_ready(service_to_wait)
+    values_dir = f"values/federation-object-detector-{domain}"
+    # If replicas parameter is different than 1, set the replicas of the deployment
+    set_values = [f"deployments[0].replicas={replicas}"] if replicas != 1 else []
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # Install app-services and app-core concurrently (app-core does not depend on the service IP)
+            services = executor.submit(object_detection_chart.install, f"federation-app-services-{domain}",
+                                       [f"{values_dir}/service-values.yaml"])
+            core = executor.submit(object_detection_chart.install, f"federation-app-core-{domain}",
+                                   [f"{values_dir}/config-map-values.yaml", f"{values_dir}/deployment-values.yaml"], set_values)
+            services.result()
+            print("Services were applied successfully.")
+
+            # Wait for the object_detection_service IP while the configmaps and deployments are applied
+            service_ip = wait_for_service_ready(service_to_wait)
+            core.result()
+            print("Configmaps and deployments were applied successfully.")
         if service_ip is None:
             print(f"Failed to obtain {service_to_wait} IP.")
             return None
         print(f"Found {service_to_wait} IP: {service_ip}")
-
-        helm_command_core = ["helm", "install", f"federation-app-core-{domain}", "./app", "-f", f"./app/values/federation-object-detector-{domain}/config-map-values.yaml", "-f", f"./app/values/federation-object-detector-{domain}/deployment-values.yaml"]
-
-        # If replicas parameter is different than 1, add the replicas flag to Helm command
-        if replicas != 1:
-            helm_command_core.extend(["--set", f"deployments[0].replicas={replicas}"])
-
-        subprocess.run(helm_command_core, cwd=dir_path, check=True)
-        print("Configmaps and deployments were applied successfully.")
-    except subprocess.CalledProcessError as e:
+    except (ApiException, ValueError, TimeoutError) as e:
         print(f"Failed to apply services: {e}")
         return None
 
@@ -616,71 +1442,71 @@ def deploy_object_detection_federation_component(domain, service_to_wait, replic
 
 # Function to delete object detection service
 def delete_object_detection_federation_component(domain, pod_prefixes):
+    releases = [f"federation-app-core-{domain}", f"federation-app-services-{domain}"]
+    # The federated services no longer exist: release them in the SC while the pods terminate
+    release_thread = threading.Thread(target=release_deployed_services)
+    release_thread.start()
+
     try:
-        # Uninstall Helm releases for app-core and app-services
-        subprocess.run(["helm", "uninstall", f"federation-app-core-{domain}"], check=True)
-        print("Release \"federation-app-core\" uninstalled.")
-        subprocess.run(["helm", "uninstall", f"federation-app-services-{domain}"], check=True)
-        print("Release \"federation-app-services\" uninstalled.")
-    except subprocess.CalledProcessError as e:
+        # Delete the resources of the Helm releases for app-core and app-services (concurrently, by release label)
+        teardown_engine.delete_releases(releases)
+    except ApiException as e:
         print(f"Failed to uninstall services: {e}")
         return
+    finally:
+        release_thread.join()
 
-    # Wait for all deployments to terminate
+    # Create the service again for the next claim (the pool itself refills through its ReplicaSet)
+    if warm_pool is not None and domain == "provider":
+        warm_pool.refill_in_background()
+
+    # Wait for all deployments to terminate. Pods claimed from the warm pool keep their standby names
+    # (standby-object-detector-*), so the pods of the release are tracked by label and not by prefix
+    wait_for_pods_terminated(labels={RELEASE_LABEL: f"federation-app-core-{domain}"})
     wait_for_pods_terminated(pod_prefixes)
 
 # Function to check and wait for the service to get an external IP
 def wait_for_service_ready(service_name, namespace="default", timeout=200):
-    start_time = time.time()
-    while True:
-        elapsed_time = time.time() - start_time
-        if elapsed_time > timeout:
-            raise TimeoutError("Timed out waiting for service to be ready.")
-
-        service = api_instance_coreV1.read_namespaced_service(name=service_name, namespace=namespace)
-        ingress = service.status.load_balancer.ingress
+    def external_ip():
+        service = service_informer.get(namespace, service_name)
+        ingress = service.status.load_balancer.ingress if service is not None else None
         if ingress and ingress[0].ip:
             return ingress[0].ip
+        return None
 
-# Function to wait for specific pods to terminate
-def wait_for_pods_terminated(prefixes):
-    while True:
-        pods = api_instance_coreV1.list_pod_for_all_namespaces().items
-        active_pods = [
-            pod for pod in pods
-            if any(pod.metadata.name.startswith(prefix) for prefix in prefixes)
-        ]
-
-        if not active_pods:
-            print("All specified pods have been terminated.")
-            break
-        else:
-            remaining_pods = [pod.metadata.name for pod in active_pods]
-            print(f"Waiting for specific pods to terminate: {remaining_pods}")
-            time.sleep(2)
-
-# Function to wait for specific pods to start
-def wait_for_pods_started(prefixes):
-    while True:
-        try:
-            # Retrieve all pods from all namespaces
-            pods = api_instance_coreV1.list_pod_for_all_namespaces().items
-
-            # Filter pods based on prefixes
-            active_pods = [pod for pod in pods if any(pod.metadata.name.startswith(prefix) for prefix in prefixes)]
+    # Woken up by the service informer as soon as the LoadBalancer assigns the external IP
+    service_informer.wait_for(lambda: external_ip() is not None, timeout)
+    return external_ip()
 
-            # Check if all specified pods are in running state
-            if all(pod.status.phase == 'Running' for pod in active_pods):
-                print("All specified pods have started.")
-                break
-            else:
-                # Get remaining pods that are not in running state
-                remaining_pods = [pod.metadata.name for pod in active_pods if pod.status.phase != 'Running']
-                print(f"Waiting for specific pods to start: {remaining_pods}")
-                time.sleep(2)
-        except Exception as e:
-            print(f"Error occurred: {e}")
-            pass
+# Function to wait for specific pods (by name prefix and/or labels) to terminate
+def wait_for_pods_terminated(prefixes=None, labels=None, timeout=None):
+    def terminated():
+        remaining_pods = [pod.metadata.name for pod in pod_informer.list(labels=labels, name_prefixes=prefixes)]
+        if remaining_pods:
+            print(f"Waiting for specific pods to terminate: {remaining_pods}")
+        return not remaining_pods
+
+    # Pod deletions are received by the pod informer (no listing of every pod)
+    pod_informer.wait_for(terminated, timeout)
+    print("All specified pods have been terminated.")
+
+# Function to wait for specific pods (by name prefix and/or labels) to start, optionally until exactly count of them run
+def wait_for_pods_started(prefixes=None, labels=None, timeout=None, count=None):
+    def started():
+        # Terminating pods (e.g. after a scale down) are not counted
+        pods = [pod for pod in pod_informer.list(labels=labels, name_prefixes=prefixes)
+                if pod.metadata.deletion_timestamp is None]
+        remaining_pods = [pod.metadata.name for pod in pods if pod.status.phase != 'Running']
+        if remaining_pods:
+            print(f"Waiting for specific pods to start: {remaining_pods}")
+        elif count is not None and len(pods) != count:
+            print(f"Waiting for {count} pods to run ({len(pods)} running)")
+            return False
+        return not remaining_pods
+
+    # Pod phase changes are received by the pod informer (no listing of every pod)
+    pod_informer.wait_for(started, timeout)
+    print("All specified pods have started.")
 
 
 def create_csv_file(role, header, data):
@@ -826,23 +1652,42 @@ async def web3_info_endpoint():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/nonce_status",
+         summary="Get nonce manager status",
+         tags=["Default DLT Functions"],
+         description="Endpoint to get the next nonce and the transactions that are still in flight")
+def nonce_status_endpoint(resync: bool = False):
+    try:
+        if resync:
+            nonce_manager.resync()
+        return {"nonce-status": nonce_manager.status()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/transaction_latency",
+         summary="Get transaction inclusion latency",
+         tags=["Default DLT Functions"],
+         description="Endpoint to get the submit -> inclusion latency of the transactions sent for each federation step")
+def transaction_latency_endpoint():
+    try:
+        return {"transaction-latency": tx_tracker.summary()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/register_domain", 
           summary="Register a domain",
           tags=["Default DLT Functions"],
           description="Endpoint to register a domain in the smart contract")  
 def register_domain_endpoint():
     global domain_registered  
-    # global nonce
     try:
         if not domain_registered:
             # Build the transaction for the addOperator function
-            add_operator_transaction = Federation_contract.functions.addOperator(Web3.toBytes(text=domain_name)).buildTransaction({
-                'from': block_address,
-                'nonce': nonce
-            })
+            add_operator_transaction = build_transaction("addOperator", name=domain_name)
 
-            # Send the signed transaction
-            tx_hash = send_signed_transaction(add_operator_transaction)
+            # Send the signed transaction and wait until it is included in a block
+            receipt = send_signed_transaction(add_operator_transaction, "addOperator")
+            receipt.result(timeout=60)
 
             domain_registered = True
             print("\n\033[1;32m(TX) Domain has been registered\033[0m")
@@ -857,16 +1702,53 @@ def register_domain_endpoint():
           summary="Create a service announcement", 
           tags=["Consumer Functions"],
           description="Endpoint to create a service announcement")
-def create_service_announcement_endpoint():
+def create_service_announcement_endpoint(deadline_blocks: int = 0, max_bids: int = 0, max_price: int = None):
     global bids_event
     try:
-        bids_event = AnnounceService()
+        block_number = web3.eth.blockNumber
+        AnnounceService(deadline_blocks, max_bids, max_price)
+        bids_event = BidsEvent(service_id, block_number)
         print("\n\033[1;32m(TX-1) Service announcement sent to the SC\033[0m")
         return {"message": "Service announcement sent to the SC"}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/create_service_announcements",
+          summary="Create several service announcements",
+          tags=["Consumer Functions"],
+          description="Endpoint to announce several services in a single transaction")
+def create_service_announcements_endpoint(count: int = 1, requirements: str = None):
+    try:
+        service_ids, receipt = AnnounceServices([requirements or service_requirements] * count)
+        receipt.result(timeout=60)
+        print(f"\n\033[1;32m(TX-1) {count} service announcements sent to the SC\033[0m")
+        return {"message": f"{count} service announcements sent to the SC", "service-ids": service_ids}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/settle_service/{service_id}",
+          summary="Settle a service announcement",
+          tags=["Default DLT Functions"],
+          description="Endpoint to close a service announced with a deadline, selecting the lowest bid, once the deadline is reached")
+def settle_service_endpoint(service_id: str):
+    try:
+        receipt = SettleService(service_id).result(timeout=60)
+        return {"message": f"Service {service_id} settled", "tx-hash": receipt["tx-hash"]}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/release_service/{service_id}",
+          summary="Release a service",
+          tags=["Default DLT Functions"],
+          description="Endpoint to release a finished service, deleting it and its bids from the SC")
+def release_service_endpoint(service_id: str):
+    try:
+        receipt = ReleaseService(service_id).result(timeout=60)
+        return {"message": f"Service {service_id} released", "tx-hash": receipt["tx-hash"]}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/check_service_state/{service_id}",
          summary="Get service state",
          tags=["Default DLT Functions"],
@@ -885,6 +1767,62 @@ async def check_service_state_endpoint(service_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/services",
+         summary="Query indexed services",
+         tags=["Default DLT Functions"],
+         description="Endpoint to query the services of the local event index by state, announcement block range, creator or provider")
+def services_endpoint(state: ServiceState = None, from_block: int = None, to_block: int = None,
+                      creator: str = None, provider: str = None, limit: int = 100):
+    try:
+        state_value = list(ServiceState).index(state) if state is not None else None
+        services = event_indexer.get_services(state=state_value, from_block=from_block, to_block=to_block,
+                                              creator=web3.toChecksumAddress(creator) if creator else None,
+                                              provider=web3.toChecksumAddress(provider) if provider else None,
+                                              limit=limit)
+        return {"indexed-block": event_indexer.last_block, "services": services}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/services/{service_id}",
+         summary="Get indexed service",
+         tags=["Default DLT Functions"],
+         description="Endpoint to get a service and its events from the local event index")
+def get_service_endpoint(service_id: str):
+    try:
+        service = event_indexer.get_service(service_id)
+        if service is None:
+            raise HTTPException(status_code=404, detail=f"Service {service_id} not found in the event index")
+        return {"indexed-block": event_indexer.last_block, "service": service, "events": event_indexer.get_events(service_id=service_id)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/event_index",
+         summary="Get event index status",
+         tags=["Default DLT Functions"],
+         description="Endpoint to get the last indexed block and the number of indexed events and services")
+def event_index_endpoint():
+    try:
+        return {"event-index": event_indexer.status()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/federation_snapshot",
+         summary="Get federation snapshot",
+         tags=["Default DLT Functions"],
+         description="Endpoint to read the state, winner, bid count and info of several services in one call, from the same block")
+async def federation_snapshot_endpoint(service_ids: List[str] = Query(...)):
+    try:
+        if federation_multicall is None:
+            raise HTTPException(status_code=500, detail="MULTICALL_ADDRESS is not configured. Please deploy the smart contracts.")
+        snapshot = federation_multicall.snapshot(service_ids, block_address, as_provider=(domain == 'provider'))
+        return {"federation-snapshot": snapshot}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/check_deployed_info/{service_id}",
          summary="Get deployed info",
          tags=["Default DLT Functions"],
@@ -934,42 +1872,22 @@ def check_service_connectivity(external_ip):
          description="Endpoint to check for new announcements")
 async def check_service_announcements_endpoint():
     try:
-        new_service_event = Federation_contract.events.ServiceAnnouncement()  
-
-        # Determine the current block number
-        current_block = web3.eth.blockNumber
-
-        # Calculate the start block for the event search (last 20 blocks)
-        start_block = max(0, current_block - 20)  # Ensure start block is not negative
-
-        # Fetch new events from the last 20 blocks
-        new_events = new_service_event.createFilter(fromBlock=start_block, toBlock='latest').get_all_entries()
-
-        open_services = []
-        message = ""
-
-        for event in new_events:
-            service_id = web3.toText(event['args']['id']).rstrip('\x00')
-            requirements = web3.toText(event['args']['requirements']).rstrip('\x00')
-            tx_hash = web3.toHex(event['transactionHash'])
-            address = event['address']
-            block_number = event['blockNumber']
-            event_name = event['event']
-
-            if GetServiceState(service_id) == 0:
-                open_services.append(service_id)
+        # Open services announced in the last 20 indexed blocks (read from the local event index)
+        start_block = max(0, event_indexer.last_block - 20)  # Ensure start block is not negative
+        open_services = event_indexer.get_services(state=0, from_block=start_block, limit=1)
 
         if len(open_services) > 0:
+            service = open_services[0]
             service_details = {
-                    "service_id": service_id,
-                    "requirements": requirements,
-                    "tx_hash": tx_hash,
-                    "contract_address": address,
-                    "block": block_number,
-                    "event_name": event_name
+                    "service_id": service["service_id"],
+                    "requirements": service["requirements"],
+                    "tx_hash": service["announced_tx"],
+                    "contract_address": contract_address,
+                    "block": service["announced_block"],
+                    "event_name": "ServiceAnnouncement"
             }
             print('Announcement received:')
-            print(new_events)
+            print(service)
             return {"Announcements": service_details}
         else:
             return {"No new events found": "No new services announced in the last 20 blocks."}
@@ -981,44 +1899,137 @@ async def check_service_announcements_endpoint():
           tags=["Provider Functions"],
           description="Endpoint to place a bid for a service")
 def place_bid_endpoint(service_id: str, service_price: int):
-    global winnerChosen_event 
     try:
-        winnerChosen_event  = PlaceBid(service_id, service_price)
+        PlaceBid(service_id, service_price)
         print("\n\033[1;32m(TX-2) Bid offer sent to the SC\033[0m")
         return {"message": "Bid offer sent to the SC"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/send_signed_bid/{service_id}-{service_price}",
+          summary="Send a signed bid",
+          tags=["Provider Functions"],
+          description="Endpoint to sign a bid for a service off-chain and send it to the consumer")
+def send_signed_bid_endpoint(service_id: str, service_price: int):
+    try:
+        response = SendSignedBid(service_id, service_price)
+        print("\n\033[1;32mSigned bid offer sent to the consumer\033[0m")
+        return {"message": "Signed bid offer sent to the consumer", "consumer-response": response}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/signed_bid",
+          summary="Receive a signed bid",
+          tags=["Consumer Functions"],
+          description="Endpoint where the providers send their bids signed off-chain (EIP-712)")
+def signed_bid_endpoint(bid: dict):
+    try:
+        VerifySignedBid(bid)
+    except (ValueError, KeyError, TypeError) as e:
+        # Rejected bid (malformed, expired, badly signed or from an unregistered provider)
+        raise HTTPException(status_code=400, detail=f"Signed bid rejected: {e}")
+    try:
+        bid_count = signed_bid_pool.add(bid)
+        print(f"\nSigned bid received from {bid['provider']} (service-id: {bid['service-id']}, price: {bid['price']})")
+        return {"message": "Signed bid received", "service-id": bid["service-id"], "bid-count": bid_count}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/signed_bids/{service_id}",
+         summary="Check signed bids",
+         tags=["Consumer Functions"],
+         description="Endpoint to check the signed bids received for a service")
+def signed_bids_endpoint(service_id: str):
+    try:
+        bids = signed_bid_pool.get(service_id)
+        if bids:
+            return {"bids": bids}
+        else:
+            return {"message": f"No signed bids found for the service {service_id}"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/accept_signed_bid/{service_id}",
+          summary="Accept a signed bid",
+          tags=["Consumer Functions"],
+          description="Endpoint to close a service with the lowest signed bid received")
+def accept_signed_bid_endpoint(service_id: str):
+    try:
+        bids = signed_bid_pool.get(service_id)
+        if not bids:
+            return {"message": f"No signed bids found for the service {service_id}"}
+        best_bid = AcceptBestSignedBid(service_id)
+        print("\n\033[1;32mSigned bid accepted! (provider: " + best_bid["provider"] + ")\033[0m")
+        return {"message": "Signed bid accepted", "service-id": service_id, "provider-address": best_bid["provider"]}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.on_event("startup")
+def start_background_tasks():
+    event_indexer.start()
+    for informer in (pod_informer, deployment_informer, service_informer):
+        informer.start()
+    if warm_pool is not None:
+        warm_pool.refill_in_background()
+    if announcement_watcher is not None:
+        announcement_watcher.start()
+
+@app.get("/announcement_watcher",
+         summary="Get announcement watcher status",
+         tags=["Provider Functions"],
+         description="Endpoint to get the last processed block and the number of queued service announcements")
+def announcement_watcher_endpoint():
+    try:
+        if announcement_watcher is None:
+            raise HTTPException(status_code=500, detail="The announcement watcher only runs in the provider domain")
+        return {"announcement-watcher": announcement_watcher.status()}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/start_bid_workers",
+          summary="Start bid workers",
+          tags=["Provider Functions"],
+          description="Endpoint to start background workers that place a bid offer for every queued service announcement")
+def start_bid_workers_endpoint(workers: int = 1, service_price: int = 10, batch_size: int = 1):
+    try:
+        if announcement_watcher is None:
+            raise HTTPException(status_code=500, detail="Bid workers only run in the provider domain")
+        announcement_watcher.add_consumer("bid-workers")
+        for worker_index in range(workers):
+            threading.Thread(target=bid_worker, args=(worker_index, service_price, batch_size), name=f"bid-worker-{worker_index}", daemon=True).start()
+        return {"message": f"{workers} bid worker(s) started", "service-price": service_price, "batch-size": batch_size}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/place_bids",
+          summary="Place several bids",
+          tags=["Provider Functions"],
+          description="Endpoint to place a bid for several services in a single transaction")
+def place_bids_endpoint(service_price: int, service_ids: List[str] = Query(...)):
+    try:
+        PlaceBids(service_ids, service_price).result(timeout=60)
+        print(f"\n\033[1;32m(TX-2) {len(service_ids)} bid offers sent to the SC\033[0m")
+        return {"message": f"{len(service_ids)} bid offers sent to the SC", "service-ids": service_ids}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get('/check_bids/{service_id}',
          summary="Check bids",
          tags=["Consumer Functions"],
          description="Endpoint to check bids for a service")  
 async def check_bids_endpoint(service_id: str):
-    global bids_event
-    message = ""
-    new_events = bids_event.get_all_entries()
-    bidderArrived = False
     try:
-        for event in new_events:
-            # New bid received
-            event_id = str(web3.toText(event['args']['_id']))
-            # service id, service id, index of the bid
-            print(service_id, web3.toText(event['args']['_id']), event['args']['max_bid_index'])
-                    
-            bid_index = int(event['args']['max_bid_index'])
-            bidderArrived = True 
-            if int(bid_index) < 2:
-                print("\nBids-info = [provider address , service price , bid index]\n")
-                bid_info = GetBidInfo(int(bid_index-1))
-                print(bid_info)
-                message = {
-                    "provider-address": bid_info[0],
-                    "service-price": bid_info[1],
-                    "bid-index": bid_info[2]
-                }
-                break
-        if bidderArrived:
-            return {"bids": message}
+        # The whole bid pool is read with a single call
+        bids = GetBids(service_id)
+        if bids:
+            print("\nBids-info = [provider address , service price , bid index]\n")
+            for bid in bids:
+                print([bid["provider-address"], bid["service-price"], bid["bid-index"]])
+            return {"bids": bids}
 
         else:
             return {"message": f"No bids found for the service {service_id}"}
@@ -1047,18 +2058,10 @@ def choose_provider_endpoint(bid_index: int):
          tags=["Provider Functions"],
          description="Endpoint to check if there is a winner for a service")
 async def check_winner_endpoint(service_id: str):
-    global winnerChosen_event 
     try:
-        new_events = winnerChosen_event.get_all_entries()
-        winnerChosen = False
-        # Ask to the Federation SC if there is a winner
-        for event in new_events:
-            event_serviceid = web3.toText(event['args']['_id']).rstrip('\x00')
-            if event_serviceid == service_id:
-                # Winner choosen
-                winnerChosen = True
-                break
-        if winnerChosen:
+        # Ask to the local event index if the service announcement was closed (winner choosen)
+        service = event_indexer.get_service(service_id)
+        if service is not None and service["state"] >= 1:
             return {"message": f"There is a winner for the service {service_id}"}
         else:
             return {"message": f"No winner yet for the service {service_id}"}
@@ -1103,7 +2106,8 @@ def deploy_service_endpoint(service_id: str):
 
 
 @app.post("/start_experiments_consumer_v1", tags=["Test 1: migration of the entire object detection K8s service"])
-def start_experiments_consumer_entire_service(export_to_csv: bool = False):
+def start_experiments_consumer_entire_service(export_to_csv: bool = False, max_bids: int = 0, max_price: int = None, signed_bids: bool = False):
+    subscriptions = []  # Event subscriptions of the flow, closed when it finishes or fails
     try:
         header = ['step', 'timestamp']
         data = []
@@ -1113,59 +2117,80 @@ def start_experiments_consumer_entire_service(export_to_csv: bool = False):
             # Start time of the process
             process_start_time = time.time()
             
-            global bids_event
             
             # Service Announcement Sent
             t_service_announced = time.time() - process_start_time
             data.append(['service_announced', t_service_announced])
-            bids_event = AnnounceService()
+            # Subscribe to the bids and the deployment confirmation of the services created by this domain before announcing the service
+            # With signed_bids, the providers send their bids signed off-chain to /signed_bid instead of placing them in the SC
+            bids_subscription = SubscribeEvent('NewBid', [None, address_topic(block_address)], subscriptions) if not signed_bids else None
+            deployed_subscription = SubscribeEvent('ServiceDeployedEvent', [None, address_topic(block_address)], subscriptions)
+            # With max_bids or max_price, the SC selects the winner and closes the announcement itself
+            auto_selection = (max_bids > 0 or max_price is not None) and not signed_bids
+            closed_subscription = SubscribeEvent('ServiceAnnouncementClosed', [None, address_topic(block_address)], subscriptions) if auto_selection else None
+            AnnounceService(max_bids=max_bids, max_price=max_price)
             print("\nSERVICE_ID:", service_id) # service + timestamp
 
             print("\n\033[1;32m(TX-1) Service announcement sent to the SC\033[0m")
 
             # Consumer AD wait for provider bids
-            bidderArrived = False
-
             print("Waiting for bids...\n")
-            while bidderArrived == False:
-                new_events = bids_event.get_all_entries()
-                for event in new_events:
-                    
-                    # Bid Offer Received
-                    t_bid_offer_received = time.time() - process_start_time
-                    data.append(['bid_offer_received', t_bid_offer_received])
-
-                    event_id = str(web3.toText(event['args']['_id']))
-                    
-                    # Choosing provider
-
-                    # service id, service id, index of the bid
-                    print(service_id, web3.toText(event['args']['_id']), event['args']['max_bid_index'])
-                    print("BIDS ENTERED")
-                    bid_index = int(event['args']['max_bid_index'])
-                    bidderArrived = True 
-                    if int(bid_index) < 2:
-
-                        print("\nBids-info = [provider address , service price , bid index]\n")
-                        bid_info = GetBidInfo(int(bid_index-1))
-                        print(bid_info)
-                    
-
-                        # Winner choosen 
-                        t_winner_choosen = time.time() - process_start_time
-                        data.append(['winner_choosen', t_winner_choosen])
-                        
-                        ChooseProvider(int(bid_index)-1)
-                        print("\n\033[1;32m(TX-3) Provider choosen! (bid index=" + str(bid_index-1) + ")\033[0m")
-
-                        # Service closed (state 1)
-                        #DisplayServiceState(service_id)
-                        break
+            if signed_bids:
+                signed_bid_pool.wait_for_bids(service_id, timeout=event_timeout)
+            else:
+                event = bids_subscription.wait_for(lambda event: event_service_id(event) == service_id, event_timeout)
+                if closed_subscription is None:
+                    bids_subscription.close()
+
+            # Bid Offer Received
+            t_bid_offer_received = time.time() - process_start_time
+            data.append(['bid_offer_received', t_bid_offer_received])
+
+            # Choosing provider
+
+            if signed_bids:
+                # Winner choosen
+                t_winner_choosen = time.time() - process_start_time
+                data.append(['winner_choosen', t_winner_choosen])
+
+                # The lowest signed bid closes the announcement in a single transaction (no PlaceBid nor ChooseProvider),
+                # falling back to the next lowest one if the SC rejects it
+                best_bid = AcceptBestSignedBid(service_id)
+                print("\n\033[1;32m(TX-2) Signed bid accepted! (provider: " + best_bid["provider"] + ")\033[0m")
+            else:
+                # service id, service id, index of the bid
+                print(service_id, web3.toText(event['args']['_id']), event['args']['max_bid_index'])
+                print("BIDS ENTERED")
+                bid_index = int(event['args']['max_bid_index'])
+
+                if closed_subscription is not None:
+                    # Winner choosen by the SC (no ChooseProvider transaction), or by the consumer if the SC does not close
+                    # the announcement within the bid window (with max_price, max_bids is the number of bids expected)
+                    winner, chosen_by_consumer = WaitForWinner(service_id, bids_subscription, closed_subscription,
+                                                               expected_bids=max_bids if max_price is not None else 0)
+                    bids_subscription.close()
+                    closed_subscription.close()
+                    t_winner_choosen = time.time() - process_start_time
+                    data.append(['winner_choosen', t_winner_choosen])
+                    print("\n\033[1;32mProvider choosen by the " + ("consumer" if chosen_by_consumer else "SC") + " (provider: " + winner + ")\033[0m")
+                else:
+                    # All the offers are evaluated with a single call: the lowest price wins
+                    print("\nBids-info = [provider address , service price , bid index]\n")
+                    bids = GetBids(service_id)
+                    for bid in bids:
+                        print([bid["provider-address"], bid["service-price"], bid["bid-index"]])
+                    bid_index = min(bids, key=lambda bid: bid["service-price"])["bid-index"] + 1
+
+                    # Winner choosen
+                    t_winner_choosen = time.time() - process_start_time
+                    data.append(['winner_choosen', t_winner_choosen])
+
+                    ChooseProvider(int(bid_index)-1)
+                    print("\n\033[1;32m(TX-3) Provider choosen! (bid index=" + str(bid_index-1) + ")\033[0m")
 
             # Consumer AD wait for provider confirmation
-            serviceDeployed = False 
-            while serviceDeployed == False:
-                serviceDeployed = True if GetServiceState(service_id) == 2 else False
+            deployed_subscription.wait_for(lambda event: event_service_id(event) == service_id, event_timeout)
+            deployed_subscription.close()
             
             # Confirmation received
             t_confirm_deployment_received = time.time() - process_start_time
@@ -1222,9 +2247,13 @@ def start_experiments_consumer_entire_service(export_to_csv: bool = False):
             raise HTTPException(status_code=500, detail=error_message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))    
+    finally:
+        for subscription in subscriptions:
+            subscription.close()
 
 @app.post("/start_experiments_provider_v1", tags=["Test 1: migration of the entire object detection K8s service"])
-def start_experiments_provider_entire_service(export_to_csv: bool = False):
+def start_experiments_provider_entire_service(export_to_csv: bool = False, signed_bids: bool = False):
+    subscriptions = []  # Event subscriptions of the flow, closed when it finishes or fails
     try:
         header = ['step', 'timestamp']
         data = []
@@ -1234,95 +2263,95 @@ def start_experiments_provider_entire_service(export_to_csv: bool = False):
             # Start time of the process
             process_start_time = time.time()
 
-            global winnerChosen_event 
             service_id = ''
             print("\nSERVICE_ID:", service_id)
 
-            newService_event = ServiceAnnouncementEvent()
-            newService = False
-            open_services = []
-
-            # Provider AD wait for service announcements
-            print("Subscribed to federation events...")
-            while newService == False:
-                new_events = newService_event.get_all_entries()
-                for event in new_events:
-                    service_id = web3.toText(event['args']['id'])
-                    
-                    requirements = web3.toText(event['args']['requirements'])
-
-                    requested_service, requested_replicas = extract_service_requirements(requirements.rstrip('\x00'))
-                    
-                    if GetServiceState(service_id) == 0:
-                        open_services.append(service_id)
-                # print("OPEN =", len(open_services)) 
-                if len(open_services) > 0:
-                    
-                    # Announcement received
-                    t_announce_received = time.time() - process_start_time
-                    data.append(['announce_received', t_announce_received])
-
-                    print('Announcement received:')
-                    print(new_events)
-                    print("\n\033[1;33mRequested service: " + repr(requested_service) + "\033[0m")
-                    print("\033[1;33mRequested replicas: " + repr(requested_replicas) + "\033[0m")
-                    newService = True
-                
-            service_id = open_services[-1]
-
-            # Place a bid offer to the Federation SC
-            t_bid_offer_sent = time.time() - process_start_time
-            data.append(['bid_offer_sent', t_bid_offer_sent])
-            winnerChosen_event = PlaceBid(service_id, 10)
-
-            print("\n\033[1;32m(TX-2) Bid offer sent to the SC\033[0m")
+            # The experiments queue of the announcement watcher only exists while an experiment runs
+            announcement_watcher.add_consumer("experiments")
+
+            # Subscribe to the closing of the announcements before taking one: its state is checked again when it is taken,
+            # so a closing mined after that check is received
+            closed_subscription = SubscribeEvent('ServiceAnnouncementClosed', None, subscriptions)
+
+            # Provider AD wait for service announcements (queued by the announcement watcher)
+            print("Waiting for service announcements...")
+            announcement = announcement_watcher.next_announcement("experiments")
+            try:
+                service_id = announcement["service-id"]
+                requested_service, requested_replicas = extract_service_requirements(announcement["requirements"])
+
+                # Announcement received
+                t_announce_received = time.time() - process_start_time
+                data.append(['announce_received', t_announce_received])
+
+                print('Announcement received:')
+                print(announcement)
+                print("\n\033[1;33mRequested service: " + repr(requested_service) + "\033[0m")
+                print("\033[1;33mRequested replicas: " + repr(requested_replicas) + "\033[0m")
+
+                # Place a bid offer to the Federation SC
+                t_bid_offer_sent = time.time() - process_start_time
+                data.append(['bid_offer_sent', t_bid_offer_sent])
+                if signed_bids:
+                    # The bid is signed off-chain and sent to the consumer, which accepts it in the SC
+                    SendSignedBid(service_id, 10)
+                    print("\n\033[1;32mSigned bid offer sent to the consumer\033[0m")
+                else:
+                    bid_receipt = PlaceBid(service_id, 10)
+                    print("\n\033[1;32m(TX-2) Bid offer sent to the SC\033[0m")
+                    try:
+                        bid_receipt.result(timeout=event_timeout)
+                    except TransactionFailed:
+                        # A bid on an announcement closed in the meantime is a lost auction (the closing is received
+                        # below), any other rejection (e.g. a full bid pool) fails the flow at once
+                        if GetServiceState(service_id) == 0:
+                            raise
+            finally:
+                # Also when the bid fails, so the announcement does not hold the cursor of the watcher
+                announcement_watcher.done(announcement)
             
-            # Ask to the Federation SC if there is a winner (wait...)
-        
-            winnerChosen = False
-            while winnerChosen == False:
-                new_events = winnerChosen_event.get_all_entries()
-                for event in new_events:
-                    event_serviceid = web3.toText(event['args']['_id'])
-                    if event_serviceid == service_id:
-                        
-                        # Winner choosen received
-                        t_winner_received = time.time() - process_start_time
-                        data.append(['winner_received', t_winner_received])
-                        print("There is a winner")
-                        winnerChosen = True
-                        break
+            # Wait until the Federation SC closes the announcement with a winner
+            event = closed_subscription.wait_for(lambda event: event_service_id(event) == service_id, event_timeout)
+            closed_subscription.close()
+
+            # Winner choosen received
+            t_winner_received = time.time() - process_start_time
+            data.append(['winner_received', t_winner_received])
+            print("There is a winner")
+            winner_address = event['args']['provider']
             
-            am_i_winner = False
-            while am_i_winner == False:
-                # Provider AD ask if he is the winner
-                am_i_winner = CheckWinner(service_id)
-                if am_i_winner == True:
-                    # Start deployment of the requested federated service
-                    print("Start deployment of the requested federated service...")
-                    t_deployment_start = time.time() - process_start_time
-                    data.append(['deployment_start', t_deployment_start])
-                    # print("I am the winner")
-                    break
+            # Provider AD checks if he is the winner (the winner is carried by the closing event)
+            if winner_address != web3.toChecksumAddress(block_address):
+                # The outcome is recorded and the flow goes on with the CSV export and cleanup
+                t_another_provider_won = time.time() - process_start_time
+                data.append(['another_provider_won', t_another_provider_won])
+                message = f"Another provider won the service {service_id}"
+                print(message)
+            else:
+                # Start deployment of the requested federated service
+                print("Start deployment of the requested federated service...")
+                t_deployment_start = time.time() - process_start_time
+                data.append(['deployment_start', t_deployment_start])
 
-            # Wait for the service to be ready and get the external IP
-            external_ip = deploy_entire_object_detection_service()
+                # Wait for the service to be ready and get the external IP, signing the deployment confirmation meanwhile
+                external_ip, prebuilt = deploy_with_prebuilt_confirmation(service_id, deploy_entire_object_detection_service)
 
-            # Deployment finished
-            t_deployment_finished = time.time() - process_start_time
-            data.append(['deployment_finished', t_deployment_finished])
+                # Deployment finished
+                t_deployment_finished = time.time() - process_start_time
+                data.append(['deployment_finished', t_deployment_finished])
                 
-            # Deployment confirmation sent
-            t_confirm_deployment_sent = time.time() - process_start_time
-            data.append(['confirm_deployment_sent', t_confirm_deployment_sent])
-            ServiceDeployed(service_id, external_ip)
+                # Deployment confirmation sent
+                t_confirm_deployment_sent = time.time() - process_start_time
+                data.append(['confirm_deployment_sent', t_confirm_deployment_sent])
+                ServiceDeployed(service_id, external_ip, prebuilt)
 
-            total_duration = time.time() - process_start_time
-                
-            print("\n\033[1;32m(TX-4) Service deployed\033[0m")
-            print("External IP:", external_ip)
-            DisplayServiceState(service_id)
+                total_duration = time.time() - process_start_time
                 
+                print("\n\033[1;32m(TX-4) Service deployed\033[0m")
+                print("External IP:", external_ip)
+                DisplayServiceState(service_id)
+                message = f"Federation process completed in {total_duration:.2f} seconds"
+
             if export_to_csv:
                 # Export the data to a csv file only if export_to_csv is True
                 create_csv_file(domain, header, data)
@@ -1331,12 +2360,17 @@ def start_experiments_provider_entire_service(export_to_csv: bool = False):
                 print("CSV export not requested.")
 
 
-            return {"message": f"Federation process completed in {total_duration:.2f} seconds"}
+            return {"message": message}
         else:
             error_message = "You must be provider to run this code"
             raise HTTPException(status_code=500, detail=error_message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))    
+    finally:
+        for subscription in subscriptions:
+            subscription.close()
+        if announcement_watcher is not None:
+            announcement_watcher.remove_consumer("experiments")
 # ------------------------------------------------------------------------------------------------------------------------------#
 
 def update_configmap_and_restart_deployment(service_ip):
@@ -1353,7 +2387,7 @@ def update_configmap_and_restart_deployment(service_ip):
             "kubectl", "rollout", "restart", "deployment", "sampler-sender"
         ], check=True)
 
-        wait_for_pods_started(["sampler-sender-"])
+        wait_for_pods_started(["sampler-sender-"], labels={"app": "sampler-sender"})
 
         print("ConfigMap updated and deployment restarted successfully.")
     except subprocess.CalledProcessError as e:
@@ -1363,12 +2397,9 @@ def update_configmap_and_restart_deployment(service_ip):
 
 def scale_deployment(deployment_name, replicas, action="up"):
     try:
-        # Retrieve current number of replicas
-        deployment_info = api_instance_appsV1.read_namespaced_deployment(
-            name=deployment_name,
-            namespace="default"
-        )
-        current_replicas = deployment_info.spec.replicas
+        # Retrieve current number of replicas (read live: the informer cache may lag behind a previous scaling)
+        scale = api_instance_appsV1.read_namespaced_deployment_scale(name=deployment_name, namespace="default")
+        current_replicas = scale.spec.replicas
         
         if action == "up":
             new_replicas = current_replicas + replicas
@@ -1387,15 +2418,17 @@ def scale_deployment(deployment_name, replicas, action="up"):
         
         print(f"Deployment '{deployment_name}' scaled {action} by {abs(new_replicas - current_replicas)} replicas successfully.")
 
-        # Wait for pods to start after scaling
-        wait_for_pods_started([deployment_name + "-"])
+        # Wait until the pods selected by the deployment match the new number of replicas
+        selector = dict(term.split("=", 1) for term in scale.status.selector.split(","))
+        wait_for_pods_started(labels=selector, count=new_replicas)
     except Exception as e:
         print(f"Error: {e}")
         return
 
 
 @app.post("/start_experiments_consumer_v2", tags=["Test 2: migration of the object detector component"])
-def start_experiments_consumer_object_detection_component(export_to_csv: bool = False):
+def start_experiments_consumer_object_detection_component(export_to_csv: bool = False, max_bids: int = 0, max_price: int = None, signed_bids: bool = False):
+    subscriptions = []  # Event subscriptions of the flow, closed when it finishes or fails
     try:
         header = ['step', 'timestamp']
         data = []
@@ -1405,58 +2438,80 @@ def start_experiments_consumer_object_detection_component(export_to_csv: bool =
             # Start time of the process
             process_start_time = time.time()
             
-            global bids_event
             
             # Service Announcement Sent
             t_service_announced = time.time() - process_start_time
             data.append(['service_announced', t_service_announced])
-            bids_event = AnnounceService()
+            # Subscribe to the bids and the deployment confirmation of the services created by this domain before announcing the service
+            # With signed_bids, the providers send their bids signed off-chain to /signed_bid instead of placing them in the SC
+            bids_subscription = SubscribeEvent('NewBid', [None, address_topic(block_address)], subscriptions) if not signed_bids else None
+            deployed_subscription = SubscribeEvent('ServiceDeployedEvent', [None, address_topic(block_address)], subscriptions)
+            # With max_bids or max_price, the SC selects the winner and closes the announcement itself
+            auto_selection = (max_bids > 0 or max_price is not None) and not signed_bids
+            closed_subscription = SubscribeEvent('ServiceAnnouncementClosed', [None, address_topic(block_address)], subscriptions) if auto_selection else None
+            AnnounceService(max_bids=max_bids, max_price=max_price)
             print("\nSERVICE_ID:", service_id) # service + timestamp
 
             print("\n\033[1;32m(TX-1) Service announcement sent to the SC\033[0m")
 
             # Consumer AD wait for provider bids
-            bidderArrived = False
-
             print("Waiting for bids...\n")
-            while bidderArrived == False:
-                new_events = bids_event.get_all_entries()
-                for event in new_events:
-                    
-                    # Bid Offer Received
-                    t_bid_offer_received = time.time() - process_start_time
-                    data.append(['bid_offer_received', t_bid_offer_received])
-
-                    event_id = str(web3.toText(event['args']['_id']))
-                    
-                    # Choosing provider
-
-                    # service id, service id, index of the bid
-                    print(service_id, web3.toText(event['args']['_id']), event['args']['max_bid_index'])
-                    print("BIDS ENTERED")
-                    bid_index = int(event['args']['max_bid_index'])
-                    bidderArrived = True 
-                    if int(bid_index) < 2:
-
-                        print("\nBids-info = [provider address , service price , bid index]\n")
-                        bid_info = GetBidInfo(int(bid_index-1))
-                        print(bid_info)
-                        
-                        # Winner choosen sent
-                        t_winner_choosen = time.time() - process_start_time
-                        data.append(['winner_choosen', t_winner_choosen])
-                        
-                        ChooseProvider(int(bid_index)-1)
-                        print("\n\033[1;32m(TX-3) Provider choosen! (bid index=" + str(bid_index-1) + ")\033[0m")
-
-                        # Service closed (state 1)
-                        #DisplayServiceState(service_id)
-                        break
+            if signed_bids:
+                signed_bid_pool.wait_for_bids(service_id, timeout=event_timeout)
+            else:
+                event = bids_subscription.wait_for(lambda event: event_service_id(event) == service_id, event_timeout)
+                if closed_subscription is None:
+                    bids_subscription.close()
+
+            # Bid Offer Received
+            t_bid_offer_received = time.time() - process_start_time
+            data.append(['bid_offer_received', t_bid_offer_received])
+
+            # Choosing provider
+
+            if signed_bids:
+                # Winner choosen
+                t_winner_choosen = time.time() - process_start_time
+                data.append(['winner_choosen', t_winner_choosen])
+
+                # The lowest signed bid closes the announcement in a single transaction (no PlaceBid nor ChooseProvider),
+                # falling back to the next lowest one if the SC rejects it
+                best_bid = AcceptBestSignedBid(service_id)
+                print("\n\033[1;32m(TX-2) Signed bid accepted! (provider: " + best_bid["provider"] + ")\033[0m")
+            else:
+                # service id, service id, index of the bid
+                print(service_id, web3.toText(event['args']['_id']), event['args']['max_bid_index'])
+                print("BIDS ENTERED")
+                bid_index = int(event['args']['max_bid_index'])
+
+                if closed_subscription is not None:
+                    # Winner choosen by the SC (no ChooseProvider transaction), or by the consumer if the SC does not close
+                    # the announcement within the bid window (with max_price, max_bids is the number of bids expected)
+                    winner, chosen_by_consumer = WaitForWinner(service_id, bids_subscription, closed_subscription,
+                                                               expected_bids=max_bids if max_price is not None else 0)
+                    bids_subscription.close()
+                    closed_subscription.close()
+                    t_winner_choosen = time.time() - process_start_time
+                    data.append(['winner_choosen', t_winner_choosen])
+                    print("\n\033[1;32mProvider choosen by the " + ("consumer" if chosen_by_consumer else "SC") + " (provider: " + winner + ")\033[0m")
+                else:
+                    # All the offers are evaluated with a single call: the lowest price wins
+                    print("\nBids-info = [provider address , service price , bid index]\n")
+                    bids = GetBids(service_id)
+                    for bid in bids:
+                        print([bid["provider-address"], bid["service-price"], bid["bid-index"]])
+                    bid_index = min(bids, key=lambda bid: bid["service-price"])["bid-index"] + 1
+
+                    # Winner choosen sent
+                    t_winner_choosen = time.time() - process_start_time
+                    data.append(['winner_choosen', t_winner_choosen])
+
+                    ChooseProvider(int(bid_index)-1)
+                    print("\n\033[1;32m(TX-3) Provider choosen! (bid index=" + str(bid_index-1) + ")\033[0m")
 
             # Consumer AD wait for provider confirmation
-            serviceDeployed = False 
-            while serviceDeployed == False:
-                serviceDeployed = True if GetServiceState(service_id) == 2 else False
+            deployed_subscription.wait_for(lambda event: event_service_id(event) == service_id, event_timeout)
+            deployed_subscription.close()
             
             # Confirmation received
             t_confirm_deployment_received = time.time() - process_start_time
@@ -1509,7 +2564,7 @@ def start_experiments_consumer_object_detection_component(export_to_csv: bool =
             else:
                 api_instance_appsV1.delete_namespaced_deployment(name="object-detector", namespace="default")
                 api_instance_coreV1.delete_namespaced_service(name="object-detector-service", namespace="default")
-                wait_for_pods_terminated(["object-detector-"])
+                wait_for_pods_terminated(["object-detector-"], labels={"app": "object-detector"})
                 print("CSV export not requested.")
 
             return {"message": f"Federation process completed in {total_duration:.2f} seconds"}
@@ -1518,9 +2573,13 @@ def start_experiments_consumer_object_detection_component(export_to_csv: bool =
             raise HTTPException(status_code=500, detail=error_message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))    
+    finally:
+        for subscription in subscriptions:
+            subscription.close()
 
 @app.post("/start_experiments_provider_v2", tags=["Test 2: migration of the object detector component"])
-def start_experiments_provider_object_detection_component(export_to_csv: bool = False):
+def start_experiments_provider_object_detection_component(export_to_csv: bool = False, signed_bids: bool = False):
+    subscriptions = []  # Event subscriptions of the flow, closed when it finishes or fails
     try:
         header = ['step', 'timestamp']
         data = []
@@ -1530,95 +2589,95 @@ def start_experiments_provider_object_detection_component(export_to_csv: bool =
             # Start time of the process
             process_start_time = time.time()
 
-            global winnerChosen_event 
             service_id = ''
             print("\nSERVICE_ID:", service_id)
 
-            newService_event = ServiceAnnouncementEvent()
-            newService = False
-            open_services = []
-
-            # Provider AD wait for service announcements
-            print("Subscribed to federation events...")
-            while newService == False:
-                new_events = newService_event.get_all_entries()
-                for event in new_events:
-                    service_id = web3.toText(event['args']['id'])
-                    
-                    requirements = web3.toText(event['args']['requirements'])
-
-                    requested_service, requested_replicas = extract_service_requirements(requirements.rstrip('\x00'))
-
-                    if GetServiceState(service_id) == 0:
-                        open_services.append(service_id)
-                # print("OPEN =", len(open_services)) 
-                if len(open_services) > 0:
-                    
-                    # Announcement received
-                    t_announce_received = time.time() - process_start_time
-                    data.append(['announce_received', t_announce_received])
-
-                    print('Announcement received:')
-                    print(new_events)
-                    print("\n\033[1;33mRequested service: " + repr(requested_service) + "\033[0m")
-                    print("\033[1;33mRequested replicas: " + repr(requested_replicas) + "\033[0m")
-                    newService = True
-                
-            service_id = open_services[-1]
-
-            # Place a bid offer to the Federation SC
-            t_bid_offer_sent = time.time() - process_start_time
-            data.append(['bid_offer_sent', t_bid_offer_sent])
-            winnerChosen_event = PlaceBid(service_id, 10)
-
-            print("\n\033[1;32m(TX-2) Bid offer sent to the SC\033[0m")
+            # The experiments queue of the announcement watcher only exists while an experiment runs
+            announcement_watcher.add_consumer("experiments")
+
+            # Subscribe to the closing of the announcements before taking one: its state is checked again when it is taken,
+            # so a closing mined after that check is received
+            closed_subscription = SubscribeEvent('ServiceAnnouncementClosed', None, subscriptions)
+
+            # Provider AD wait for service announcements (queued by the announcement watcher)
+            print("Waiting for service announcements...")
+            announcement = announcement_watcher.next_announcement("experiments")
+            try:
+                service_id = announcement["service-id"]
+                requested_service, requested_replicas = extract_service_requirements(announcement["requirements"])
+
+                # Announcement received
+                t_announce_received = time.time() - process_start_time
+                data.append(['announce_received', t_announce_received])
+
+                print('Announcement received:')
+                print(announcement)
+                print("\n\033[1;33mRequested service: " + repr(requested_service) + "\033[0m")
+                print("\033[1;33mRequested replicas: " + repr(requested_replicas) + "\033[0m")
+
+                # Place a bid offer to the Federation SC
+                t_bid_offer_sent = time.time() - process_start_time
+                data.append(['bid_offer_sent', t_bid_offer_sent])
+                if signed_bids:
+                    # The bid is signed off-chain and sent to the consumer, which accepts it in the SC
+                    SendSignedBid(service_id, 10)
+                    print("\n\033[1;32mSigned bid offer sent to the consumer\033[0m")
+                else:
+                    bid_receipt = PlaceBid(service_id, 10)
+                    print("\n\033[1;32m(TX-2) Bid offer sent to the SC\033[0m")
+                    try:
+                        bid_receipt.result(timeout=event_timeout)
+                    except TransactionFailed:
+                        # A bid on an announcement closed in the meantime is a lost auction (the closing is received
+                        # below), any other rejection (e.g. a full bid pool) fails the flow at once
+                        if GetServiceState(service_id) == 0:
+                            raise
+            finally:
+                # Also when the bid fails, so the announcement does not hold the cursor of the watcher
+                announcement_watcher.done(announcement)
             
-            # Ask to the Federation SC if there is a winner (wait...)
-        
-            winnerChosen = False
-            while winnerChosen == False:
-                new_events = winnerChosen_event.get_all_entries()
-                for event in new_events:
-                    event_serviceid = web3.toText(event['args']['_id'])
-                    if event_serviceid == service_id:
-                        
-                        # Winner choosen received
-                        t_winner_received = time.time() - process_start_time
-                        data.append(['winner_received', t_winner_received])
-                        print("There is a winner")
-                        winnerChosen = True
-                        break
+            # Wait until the Federation SC closes the announcement with a winner
+            event = closed_subscription.wait_for(lambda event: event_service_id(event) == service_id, event_timeout)
+            closed_subscription.close()
+
+            # Winner choosen received
+            t_winner_received = time.time() - process_start_time
+            data.append(['winner_received', t_winner_received])
+            print("There is a winner")
+            winner_address = event['args']['provider']
             
-            am_i_winner = False
-            while am_i_winner == False:
-                # Provider AD ask if he is the winner
-                am_i_winner = CheckWinner(service_id)
-                if am_i_winner == True:
-                    # Start deployment of the requested federated service
-                    print("Start deployment of the requested federated service...")
-                    t_deployment_start = time.time() - process_start_time
-                    data.append(['deployment_start', t_deployment_start])
-                    # print("I am the winner")
-                    break
+            # Provider AD checks if he is the winner (the winner is carried by the closing event)
+            if winner_address != web3.toChecksumAddress(block_address):
+                # The outcome is recorded and the flow goes on with the CSV export and cleanup
+                t_another_provider_won = time.time() - process_start_time
+                data.append(['another_provider_won', t_another_provider_won])
+                message = f"Another provider won the service {service_id}"
+                print(message)
+            else:
+                # Start deployment of the requested federated service
+                print("Start deployment of the requested federated service...")
+                t_deployment_start = time.time() - process_start_time
+                data.append(['deployment_start', t_deployment_start])
 
-            # Wait for the service to be ready and get the external IP
-            external_ip = deploy_object_detection_federation_component("provider", "object-detector-service")
+                # Wait for the service to be ready and get the external IP, signing the deployment confirmation meanwhile
+                external_ip, prebuilt = deploy_with_prebuilt_confirmation(service_id, deploy_object_detection_federation_component, "provider", "object-detector-service")
 
-            # Deployment finished
-            t_deployment_finished = time.time() - process_start_time
-            data.append(['deployment_finished', t_deployment_finished])
+                # Deployment finished
+                t_deployment_finished = time.time() - process_start_time
+                data.append(['deployment_finished', t_deployment_finished])
                 
-            # Deployment confirmation sent
-            t_confirm_deployment_sent = time.time() - process_start_time
-            data.append(['confirm_deployment_sent', t_confirm_deployment_sent])
-            ServiceDeployed(service_id, external_ip)
+                # Deployment confirmation sent
+                t_confirm_deployment_sent = time.time() - process_start_time
+                data.append(['confirm_deployment_sent', t_confirm_deployment_sent])
+                ServiceDeployed(service_id, external_ip, prebuilt)
 
-            total_duration = time.time() - process_start_time
-                
-            print("\n\033[1;32m(TX-4) Service deployed\033[0m")
-            print("External IP:", external_ip)
-            DisplayServiceState(service_id)
+                total_duration = time.time() - process_start_time
                 
+                print("\n\033[1;32m(TX-4) Service deployed\033[0m")
+                print("External IP:", external_ip)
+                DisplayServiceState(service_id)
+                message = f"Federation process completed in {total_duration:.2f} seconds"
+
             if export_to_csv:
                 # Export the data to a csv file only if export_to_csv is True
                 create_csv_file(domain, header, data)
@@ -1628,17 +2687,23 @@ def start_experiments_provider_object_detection_component(export_to_csv: bool =
             else:
                 print("CSV export not requested.")
 
-            return {"message": f"Federation process completed in {total_duration:.2f} seconds"}
+            return {"message": message}
         else:
             error_message = "You must be provider to run this code"
             raise HTTPException(status_code=500, detail=error_message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))    
+    finally:
+        for subscription in subscriptions:
+            subscription.close()
+        if announcement_watcher is not None:
+            announcement_watcher.remove_consumer("experiments")
 
 
 
 @app.post("/start_experiments_consumer_v3", tags=["Test 3: scaling of the object detector component"])
-def start_experiments_consumer_object_detection_component(export_to_csv: bool = False, replicas: int = 1):
+def start_experiments_consumer_object_detection_component(export_to_csv: bool = False, replicas: int = 1, max_bids: int = 0, max_price: int = None, signed_bids: bool = False):
+    subscriptions = []  # Event subscriptions of the flow, closed when it finishes or fails
     try:
         header = ['step', 'timestamp']
         data = []
@@ -1648,7 +2713,6 @@ def start_experiments_consumer_object_detection_component(export_to_csv: bool =
             # Start time of the process
             process_start_time = time.time()
             
-            global bids_event
             global service_requirements
             
             # Service Announcement Sent
@@ -1656,53 +2720,76 @@ def start_experiments_consumer_object_detection_component(export_to_csv: bool =
             data.append(['service_announced', t_service_announced])
             service_requirements = service_requirements.replace(re.search(r'replicas=\d+', service_requirements).group(), f"replicas={replicas}")
 
-            bids_event = AnnounceService()
+            # Subscribe to the bids and the deployment confirmation of the services created by this domain before announcing the service
+            # With signed_bids, the providers send their bids signed off-chain to /signed_bid instead of placing them in the SC
+            bids_subscription = SubscribeEvent('NewBid', [None, address_topic(block_address)], subscriptions) if not signed_bids else None
+            deployed_subscription = SubscribeEvent('ServiceDeployedEvent', [None, address_topic(block_address)], subscriptions)
+            # With max_bids or max_price, the SC selects the winner and closes the announcement itself
+            auto_selection = (max_bids > 0 or max_price is not None) and not signed_bids
+            closed_subscription = SubscribeEvent('ServiceAnnouncementClosed', [None, address_topic(block_address)], subscriptions) if auto_selection else None
+            AnnounceService(max_bids=max_bids, max_price=max_price)
             print("\nSERVICE_ID:", service_id) # service + timestamp
 
             print("\n\033[1;32m(TX-1) Service announcement sent to the SC\033[0m")
 
             # Consumer AD wait for provider bids
-            bidderArrived = False
-
             print("Waiting for bids...\n")
-            while bidderArrived == False:
-                new_events = bids_event.get_all_entries()
-                for event in new_events:
-                    
-                    # Bid Offer Received
-                    t_bid_offer_received = time.time() - process_start_time
-                    data.append(['bid_offer_received', t_bid_offer_received])
-
-                    event_id = str(web3.toText(event['args']['_id']))
-                    
-                    # Choosing provider
-
-                    # service id, service id, index of the bid
-                    print(service_id, web3.toText(event['args']['_id']), event['args']['max_bid_index'])
-                    print("BIDS ENTERED")
-                    bid_index = int(event['args']['max_bid_index'])
-                    bidderArrived = True 
-                    if int(bid_index) < 2:
-
-                        print("\nBids-info = [provider address , service price , bid index]\n")
-                        bid_info = GetBidInfo(int(bid_index-1))
-                        print(bid_info)
-                        
-                        # Winner choosen sent
-                        t_winner_choosen = time.time() - process_start_time
-                        data.append(['winner_choosen', t_winner_choosen])
-                        
-                        ChooseProvider(int(bid_index)-1)
-                        print("\n\033[1;32m(TX-3) Provider choosen! (bid index=" + str(bid_index-1) + ")\033[0m")
-
-                        # Service closed (state 1)
-                        #DisplayServiceState(service_id)
-                        break
+            if signed_bids:
+                signed_bid_pool.wait_for_bids(service_id, timeout=event_timeout)
+            else:
+                event = bids_subscription.wait_for(lambda event: event_service_id(event) == service_id, event_timeout)
+                if closed_subscription is None:
+                    bids_subscription.close()
+
+            # Bid Offer Received
+            t_bid_offer_received = time.time() - process_start_time
+            data.append(['bid_offer_received', t_bid_offer_received])
+
+            # Choosing provider
+
+            if signed_bids:
+                # Winner choosen
+                t_winner_choosen = time.time() - process_start_time
+                data.append(['winner_choosen', t_winner_choosen])
+
+                # The lowest signed bid closes the announcement in a single transaction (no PlaceBid nor ChooseProvider),
+                # falling back to the next lowest one if the SC rejects it
+                best_bid = AcceptBestSignedBid(service_id)
+                print("\n\033[1;32m(TX-2) Signed bid accepted! (provider: " + best_bid["provider"] + ")\033[0m")
+            else:
+                # service id, service id, index of the bid
+                print(service_id, web3.toText(event['args']['_id']), event['args']['max_bid_index'])
+                print("BIDS ENTERED")
+                bid_index = int(event['args']['max_bid_index'])
+
+                if closed_subscription is not None:
+                    # Winner choosen by the SC (no ChooseProvider transaction), or by the consumer if the SC does not close
+                    # the announcement within the bid window (with max_price, max_bids is the number of bids expected)
+                    winner, chosen_by_consumer = WaitForWinner(service_id, bids_subscription, closed_subscription,
+                                                               expected_bids=max_bids if max_price is not None else 0)
+                    bids_subscription.close()
+                    closed_subscription.close()
+                    t_winner_choosen = time.time() - process_start_time
+                    data.append(['winner_choosen', t_winner_choosen])
+                    print("\n\033[1;32mProvider choosen by the " + ("consumer" if chosen_by_consumer else "SC") + " (provider: " + winner + ")\033[0m")
+                else:
+                    # All the offers are evaluated with a single call: the lowest price wins
+                    print("\nBids-info = [provider address , service price , bid index]\n")
+                    bids = GetBids(service_id)
+                    for bid in bids:
+                        print([bid["provider-address"], bid["service-price"], bid["bid-index"]])
+                    bid_index = min(bids, key=lambda bid: bid["service-price"])["bid-index"] + 1
+
+                    # Winner choosen sent
+                    t_winner_choosen = time.time() - process_start_time
+                    data.append(['winner_choosen', t_winner_choosen])
+
+                    ChooseProvider(int(bid_index)-1)
+                    print("\n\033[1;32m(TX-3) Provider choosen! (bid index=" + str(bid_index-1) + ")\033[0m")
 
             # Consumer AD wait for provider confirmation
-            serviceDeployed = False 
-            while serviceDeployed == False:
-                serviceDeployed = True if GetServiceState(service_id) == 2 else False
+            deployed_subscription.wait_for(lambda event: event_service_id(event) == service_id, event_timeout)
+            deployed_subscription.close()
             
             # Confirmation received
             t_confirm_deployment_received = time.time() - process_start_time
@@ -1762,9 +2849,13 @@ def start_experiments_consumer_object_detection_component(export_to_csv: bool =
             raise HTTPException(status_code=500, detail=error_message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))    
+    finally:
+        for subscription in subscriptions:
+            subscription.close()
 
 @app.post("/start_experiments_provider_v3", tags=["Test 3: scaling of the object detector component"])
-def start_experiments_provider_object_detection_component(export_to_csv: bool = False):
+def start_experiments_provider_object_detection_component(export_to_csv: bool = False, signed_bids: bool = False):
+    subscriptions = []  # Event subscriptions of the flow, closed when it finishes or fails
     try:
         header = ['step', 'timestamp']
         data = []
@@ -1774,95 +2865,95 @@ def start_experiments_provider_object_detection_component(export_to_csv: bool =
             # Start time of the process
             process_start_time = time.time()
 
-            global winnerChosen_event 
             service_id = ''
             print("\nSERVICE_ID:", service_id)
 
-            newService_event = ServiceAnnouncementEvent()
-            newService = False
-            open_services = []
-
-            # Provider AD wait for service announcements
-            print("Subscribed to federation events...")
-            while newService == False:
-                new_events = newService_event.get_all_entries()
-                for event in new_events:
-                    service_id = web3.toText(event['args']['id'])
-                    
-                    requirements = web3.toText(event['args']['requirements'])
-
-                    requested_service, requested_replicas = extract_service_requirements(requirements.rstrip('\x00'))
-
-                    if GetServiceState(service_id) == 0:
-                        open_services.append(service_id)
-                # print("OPEN =", len(open_services)) 
-                if len(open_services) > 0:
-                    
-                    # Announcement received
-                    t_announce_received = time.time() - process_start_time
-                    data.append(['announce_received', t_announce_received])
-
-                    print('Announcement received:')
-                    print(new_events)
-                    print("\n\033[1;33mRequested service: " + repr(requested_service) + "\033[0m")
-                    print("\033[1;33mRequested replicas: " + repr(requested_replicas) + "\033[0m")
-                    newService = True
-                
-            service_id = open_services[-1]
-
-            # Place a bid offer to the Federation SC
-            t_bid_offer_sent = time.time() - process_start_time
-            data.append(['bid_offer_sent', t_bid_offer_sent])
-            winnerChosen_event = PlaceBid(service_id, 10)
-
-            print("\n\033[1;32m(TX-2) Bid offer sent to the SC\033[0m")
+            # The experiments queue of the announcement watcher only exists while an experiment runs
+            announcement_watcher.add_consumer("experiments")
+
+            # Subscribe to the closing of the announcements before taking one: its state is checked again when it is taken,
+            # so a closing mined after that check is received
+            closed_subscription = SubscribeEvent('ServiceAnnouncementClosed', None, subscriptions)
+
+            # Provider AD wait for service announcements (queued by the announcement watcher)
+            print("Waiting for service announcements...")
+            announcement = announcement_watcher.next_announcement("experiments")
+            try:
+                service_id = announcement["service-id"]
+                requested_service, requested_replicas = extract_service_requirements(announcement["requirements"])
+
+                # Announcement received
+                t_announce_received = time.time() - process_start_time
+                data.append(['announce_received', t_announce_received])
+
+                print('Announcement received:')
+                print(announcement)
+                print("\n\033[1;33mRequested service: " + repr(requested_service) + "\033[0m")
+                print("\033[1;33mRequested replicas: " + repr(requested_replicas) + "\033[0m")
+
+                # Place a bid offer to the Federation SC
+                t_bid_offer_sent = time.time() - process_start_time
+                data.append(['bid_offer_sent', t_bid_offer_sent])
+                if signed_bids:
+                    # The bid is signed off-chain and sent to the consumer, which accepts it in the SC
+                    SendSignedBid(service_id, 10)
+                    print("\n\033[1;32mSigned bid offer sent to the consumer\033[0m")
+                else:
+                    bid_receipt = PlaceBid(service_id, 10)
+                    print("\n\033[1;32m(TX-2) Bid offer sent to the SC\033[0m")
+                    try:
+                        bid_receipt.result(timeout=event_timeout)
+                    except TransactionFailed:
+                        # A bid on an announcement closed in the meantime is a lost auction (the closing is received
+                        # below), any other rejection (e.g. a full bid pool) fails the flow at once
+                        if GetServiceState(service_id) == 0:
+                            raise
+            finally:
+                # Also when the bid fails, so the announcement does not hold the cursor of the watcher
+                announcement_watcher.done(announcement)
             
-            # Ask to the Federation SC if there is a winner (wait...)
-        
-            winnerChosen = False
-            while winnerChosen == False:
-                new_events = winnerChosen_event.get_all_entries()
-                for event in new_events:
-                    event_serviceid = web3.toText(event['args']['_id'])
-                    if event_serviceid == service_id:
-                        
-                        # Winner choosen received
-                        t_winner_received = time.time() - process_start_time
-                        data.append(['winner_received', t_winner_received])
-                        print("There is a winner")
-                        winnerChosen = True
-                        break
+            # Wait until the Federation SC closes the announcement with a winner
+            event = closed_subscription.wait_for(lambda event: event_service_id(event) == service_id, event_timeout)
+            closed_subscription.close()
+
+            # Winner choosen received
+            t_winner_received = time.time() - process_start_time
+            data.append(['winner_received', t_winner_received])
+            print("There is a winner")
+            winner_address = event['args']['provider']
             
-            am_i_winner = False
-            while am_i_winner == False:
-                # Provider AD ask if he is the winner
-                am_i_winner = CheckWinner(service_id)
-                if am_i_winner == True:
-                    # Start deployment of the requested federated service
-                    print("Start deployment of the requested federated service...")
-                    t_deployment_start = time.time() - process_start_time
-                    data.append(['deployment_start', t_deployment_start])
-                    # print("I am the winner")
-                    break
+            # Provider AD checks if he is the winner (the winner is carried by the closing event)
+            if winner_address != web3.toChecksumAddress(block_address):
+                # The outcome is recorded and the flow goes on with the CSV export and cleanup
+                t_another_provider_won = time.time() - process_start_time
+                data.append(['another_provider_won', t_another_provider_won])
+                message = f"Another provider won the service {service_id}"
+                print(message)
+            else:
+                # Start deployment of the requested federated service
+                print("Start deployment of the requested federated service...")
+                t_deployment_start = time.time() - process_start_time
+                data.append(['deployment_start', t_deployment_start])
 
-            # Wait for the service to be ready and get the external IP
-            external_ip = deploy_object_detection_federation_component("provider", "object-detector-service", requested_replicas)
+                # Wait for the service to be ready and get the external IP, signing the deployment confirmation meanwhile
+                external_ip, prebuilt = deploy_with_prebuilt_confirmation(service_id, deploy_object_detection_federation_component, "provider", "object-detector-service", requested_replicas)
 
-            # Deployment finished
-            t_deployment_finished = time.time() - process_start_time
-            data.append(['deployment_finished', t_deployment_finished])
+                # Deployment finished
+                t_deployment_finished = time.time() - process_start_time
+                data.append(['deployment_finished', t_deployment_finished])
                 
-            # Deployment confirmation sent
-            t_confirm_deployment_sent = time.time() - process_start_time
-            data.append(['confirm_deployment_sent', t_confirm_deployment_sent])
-            ServiceDeployed(service_id, external_ip)
+                # Deployment confirmation sent
+                t_confirm_deployment_sent = time.time() - process_start_time
+                data.append(['confirm_deployment_sent', t_confirm_deployment_sent])
+                ServiceDeployed(service_id, external_ip, prebuilt)
 
-            total_duration = time.time() - process_start_time
-                
-            print("\n\033[1;32m(TX-4) Service deployed\033[0m")
-            print("External IP:", external_ip)
-            DisplayServiceState(service_id)
+                total_duration = time.time() - process_start_time
                 
+                print("\n\033[1;32m(TX-4) Service deployed\033[0m")
+                print("External IP:", external_ip)
+                DisplayServiceState(service_id)
+                message = f"Federation process completed in {total_duration:.2f} seconds"
+
             if export_to_csv:
                 # Export the data to a csv file only if export_to_csv is True
                 create_csv_file(domain, header, data)
@@ -1872,9 +2963,14 @@ def start_experiments_provider_object_detection_component(export_to_csv: bool =
             else:
                 print("CSV export not requested.")
 
-            return {"message": f"Federation process completed in {total_duration:.2f} seconds"}
+            return {"message": message}
         else:
             error_message = "You must be provider to run this code"
             raise HTTPException(status_code=500, detail=error_message)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))    
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))    
+    finally:
+        for subscription in subscriptions:
+            subscription.close()
+        if announcement_watcher is not None:
+            announcement_watcher.remove_consumer("experiments")
\ No newline at end of file
@@ -0,0 +1,105 @@
+from call_batch import decode_call_result
+
+
+# ABI of FederationMulticall.tryAggregate (smart-contracts/contracts/FederationMulticall.sol)
+MULTICALL_ABI = [
+    {
+        "constant": True,
+        "inputs": [
+            {
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "callData", "type": "bytes"}
+                ],
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "tryAggregate",
+        "outputs": [
+            {"name": "blockNumber", "type": "uint256"},
+            {
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"}
+                ],
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "payable": False,
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
+
+class FederationMulticall:
+    """
+    Client for the FederationMulticall aggregator contract.
+
+    All the Federation view calls needed to describe a list of services are packed into a single
+    'eth_call' to tryAggregate(), so the returned snapshot is read from one block and is consistent.
+    """
+
+    def __init__(self, web3, multicall_address, federation_contract):
+        """
+        Args:
+            web3 (Web3): Connected Web3 instance.
+            multicall_address (str): Address of the deployed FederationMulticall contract.
+            federation_contract (Contract): The Federation contract instance.
+        """
+        self.web3 = web3
+        self.federation_contract = federation_contract
+        self.contract = web3.eth.contract(address=web3.toChecksumAddress(multicall_address), abi=MULTICALL_ABI)
+
+    def _service_calls(self, service_id, caller, as_provider):
+        functions = self.federation_contract.functions
+        _id = self.web3.toBytes(text=service_id)
+        return {
+            "state": functions.GetServiceState(_id=_id),
+            "is-winner": functions.isWinner(_id=_id, _winner=caller),
+            "bid-count": functions.GetBidCount(_id=_id, _creator=caller),
+            "info": functions.GetServiceInfo(_id=_id, provider=as_provider, call_address=caller)
+        }
+
+    def snapshot(self, service_ids, caller, as_provider=False, block_identifier='latest'):
+        """
+        Reads the federation view of several services in one call.
+
+        Args:
+            service_ids (list): The unique identifiers of the services.
+            caller (str): Blockchain address of this domain (used for isWinner and GetServiceInfo).
+            as_provider (bool): Read GetServiceInfo as the provider (True) or as the consumer (False).
+            block_identifier (int or str): Block at which the snapshot is read.
+
+        Returns:
+            dict: The block number of the snapshot and, for each service, its state, whether the caller
+                  is the winner, the bid count and the service info. Values whose call reverted
+                  (e.g. isWinner on an open service, or the bid count of a service created by
+                  another domain) are None.
+        """
+        requests = []
+        for service_id in service_ids:
+            for field, contract_function in self._service_calls(service_id, caller, as_provider).items():
+                requests.append((service_id, field, contract_function))
+
+        calls = [(self.federation_contract.address, contract_function._encode_transaction_data())
+                 for _, _, contract_function in requests]
+        block_number, results = self.contract.functions.tryAggregate(calls).call(block_identifier=block_identifier)
+
+        services = {service_id: {} for service_id in service_ids}
+        for (service_id, field, contract_function), (success, return_data) in zip(requests, results):
+            value = decode_call_result(contract_function, return_data) if success else None
+            if isinstance(value, Exception):
+                value = None
+            if field == "info" and value is not None:
+                _service_id, endpoint, info = value
+                value = {
+                    "service-id": _service_id.rstrip(b'\x00').decode('utf-8'),
+                    "endpoint": endpoint.rstrip(b'\x00').decode('utf-8'),
+                    "info": info.rstrip(b'\x00').decode('utf-8')
+                }
+            services[service_id][field] = value
+
+        return {"block-number": block_number, "services": services}
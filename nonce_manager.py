@@ -0,0 +1,174 @@
+import heapq
+import threading
+
+
+class NonceManager:
+    """
+    Thread-safe nonce allocator for a single blockchain address.
+
+    FastAPI runs the synchronous endpoints on a thread pool, so several transactions from the same
+    domain can be built and signed at the same time. Nonces are reserved atomically, transactions that
+    were sent are tracked as pending, and nonces of transactions that failed to be sent are handed out
+    again before any new nonce, so no gap is left in the sequence.
+
+    A nonce can also be reserved speculatively, to sign a transaction before it is known whether (or which
+    variant of) it will be sent. Such a nonce never holds back the other transactions: the next reservation
+    takes it over, and the speculative transaction has to be signed again with a new nonce.
+    """
+
+    def __init__(self, web3, address):
+        """
+        Args:
+            web3 (Web3): Connected Web3 instance.
+            address (str): Blockchain address whose nonces are managed.
+        """
+        self.web3 = web3
+        self.address = address
+        self.lock = threading.Lock()
+        self.next_nonce = 0
+        self.released = []    # min-heap of nonces returned after a failed send
+        self.reserved = set() # nonces handed out whose transaction has not been sent yet
+        self.pending = {}     # nonce -> transaction hash
+        self.speculative = None  # reserved nonce that the next reservation takes over
+        self.resync()
+
+    def resync(self):
+        """
+        Realigns the local counter with the node, using the 'pending' transaction count so that
+        transactions already in the node's pool are taken into account. Nonces below the node count
+        are forgotten, and nonces above it that are neither reserved nor pending (e.g. dropped by the
+        node) are released so they are filled first.
+
+        Returns:
+            int: The next nonce that will be reserved.
+        """
+        with self.lock:
+            chain_nonce = self.web3.eth.getTransactionCount(self.address, 'pending')
+            self.pending = {n: h for n, h in self.pending.items() if n >= chain_nonce}
+            self.reserved = {n for n in self.reserved if n >= chain_nonce}
+            if self.speculative not in self.reserved:
+                self.speculative = None
+            self.next_nonce = max(chain_nonce, self.next_nonce)
+            self.released = [
+                n for n in range(chain_nonce, self.next_nonce)
+                if n not in self.pending and n not in self.reserved
+            ]
+            heapq.heapify(self.released)
+            return self.released[0] if self.released else self.next_nonce
+
+    def reserve(self):
+        """
+        Reserves a nonce for a new transaction. Released nonces (gaps) are reused first.
+
+        Returns:
+            int: The reserved nonce.
+        """
+        with self.lock:
+            if self.released:
+                nonce = heapq.heappop(self.released)
+            elif self.speculative is not None:
+                # Taken over from the speculative transaction, which is signed again when it is sent
+                nonce, self.speculative = self.speculative, None
+                return nonce
+            else:
+                nonce = self.next_nonce
+                self.next_nonce += 1
+            self.reserved.add(nonce)
+            return nonce
+
+    def reserve_speculative(self):
+        """
+        Reserves a nonce for a transaction signed in advance, only if no other transaction of the address is
+        waiting for a nonce, to be sent or to be mined (otherwise the signed transaction would rarely be the next one).
+
+        Returns:
+            int: The reserved nonce, or None if the address is busy.
+        """
+        with self.lock:
+            if self.reserved or self.pending or self.released:
+                return None
+            nonce = self.next_nonce
+            self.next_nonce += 1
+            self.reserved.add(nonce)
+            self.speculative = nonce
+            return nonce
+
+    def claim_speculative(self, nonce):
+        """
+        Turns a speculative nonce into a normal reservation right before its transaction is sent.
+
+        Args:
+            nonce (int): The nonce returned by reserve_speculative().
+
+        Returns:
+            bool: True if the nonce is still reserved for the transaction, False if another transaction took it over.
+        """
+        with self.lock:
+            if self.speculative != nonce:
+                return False
+            self.speculative = None
+            return True
+
+    def cancel_speculative(self, nonce):
+        """
+        Gives back a speculative nonce whose transaction will not be sent (nothing changes if it was taken over).
+
+        Args:
+            nonce (int): The nonce returned by reserve_speculative().
+        """
+        with self.lock:
+            if self.speculative != nonce:
+                return
+            self.speculative = None
+        self.release(nonce)
+
+    def release(self, nonce):
+        """
+        Returns a reserved nonce whose transaction could not be sent, so it fills the gap on the next reservation.
+
+        Args:
+            nonce (int): The nonce to release.
+        """
+        with self.lock:
+            self.reserved.discard(nonce)
+            self.pending.pop(nonce, None)
+            if nonce not in self.released:
+                heapq.heappush(self.released, nonce)
+
+    def mark_pending(self, nonce, tx_hash):
+        """
+        Records a transaction that was accepted by the node and is waiting to be mined.
+
+        Args:
+            nonce (int): The nonce used by the transaction.
+            tx_hash (HexBytes): The transaction hash.
+        """
+        with self.lock:
+            self.reserved.discard(nonce)
+            self.pending[nonce] = tx_hash
+
+    def confirm(self, nonce):
+        """
+        Removes a mined transaction from the pending set.
+
+        Args:
+            nonce (int): The nonce of the mined transaction.
+        """
+        with self.lock:
+            self.pending.pop(nonce, None)
+
+    def status(self):
+        """
+        Returns a snapshot of the allocator state.
+
+        Returns:
+            dict: Next nonce, released nonces and pending transactions.
+        """
+        with self.lock:
+            return {
+                "next-nonce": self.next_nonce,
+                "released-nonces": sorted(self.released),
+                "reserved-nonces": sorted(self.reserved),
+                "speculative-nonce": self.speculative,
+                "pending-transactions": {n: self.web3.toHex(h) for n, h in sorted(self.pending.items())}
+            }
@@ -0,0 +1,177 @@
+import threading
+
+from eth_abi import encode_abi
+from eth_account import Account
+from eth_account.messages import SignableMessage
+from eth_utils import keccak, to_checksum_address
+from hexbytes import HexBytes
+
+
+# EIP-712 type hashes (same type strings as EIP712_DOMAIN_TYPEHASH and BID_TYPEHASH in the Federation contract)
+EIP712_DOMAIN_TYPEHASH = keccak(text="EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)")
+BID_TYPEHASH = keccak(text="Bid(bytes32 service_id,address consumer,uint32 price,bytes32 endpoint_provider,uint256 expiry_block)")
+
+
+def _to_bytes32(value):
+    return value.encode('utf-8').ljust(32, b'\x00') if isinstance(value, str) else bytes(value)
+
+
+def domain_separator(chain_id, contract_address):
+    """
+    Computes the EIP-712 domain separator of a Federation contract (its DOMAIN_SEPARATOR).
+
+    Args:
+        chain_id (int): Chain ID given to the Federation contract constructor.
+        contract_address (str): Address of the Federation contract.
+
+    Returns:
+        bytes: The domain separator.
+    """
+    return keccak(encode_abi(['bytes32', 'bytes32', 'bytes32', 'uint256', 'address'], [
+        EIP712_DOMAIN_TYPEHASH, keccak(text="Federation"), keccak(text="1"), chain_id,
+        to_checksum_address(contract_address)]))
+
+
+def bid_message(chain_id, contract_address, bid):
+    """
+    Builds the EIP-712 message of a bid, as hashed by AcceptSignedBid.
+
+    The message is encoded here as in the contract instead of with encode_structured_data, which in eth-account
+    0.5 cannot take bytes32 values (it serializes the typed data to JSON).
+
+    Args:
+        chain_id (int): Chain ID given to the Federation contract constructor.
+        contract_address (str): Address of the Federation contract.
+        bid (dict): The bid (service ID, consumer address, price, provider endpoint and expiry block).
+
+    Returns:
+        SignableMessage: The message to sign or to recover the signer from.
+    """
+    struct_hash = keccak(encode_abi(['bytes32', 'bytes32', 'address', 'uint32', 'bytes32', 'uint256'], [
+        BID_TYPEHASH, _to_bytes32(bid["service-id"]), to_checksum_address(bid["consumer"]), bid["price"],
+        _to_bytes32(bid["endpoint-provider"]), bid["expiry-block"]]))
+    return SignableMessage(b'\x01', domain_separator(chain_id, contract_address), struct_hash)
+
+
+def sign_bid(private_key, chain_id, contract_address, service_id, consumer, price, endpoint_provider, expiry_block):
+    """
+    Signs a bid offer off-chain (no transaction is sent).
+
+    Args:
+        private_key (str): Private key of the provider.
+        chain_id (int): Chain ID given to the Federation contract constructor.
+        contract_address (str): Address of the Federation contract.
+        service_id (str): The unique identifier of the service.
+        consumer (str): Address of the consumer that announced the service.
+        price (int): The price offered for providing the service.
+        endpoint_provider (str): Endpoint of the provider.
+        expiry_block (int): Last block in which the consumer can accept the bid.
+
+    Returns:
+        dict: The bid with the provider address and the signature (v, r, s), ready to be sent as JSON.
+    """
+    bid = {
+        "service-id": service_id,
+        "consumer": consumer,
+        "price": price,
+        "endpoint-provider": endpoint_provider,
+        "expiry-block": expiry_block
+    }
+    signed = Account.sign_message(bid_message(chain_id, contract_address, bid), private_key)
+    bid.update({
+        "provider": Account.from_key(private_key).address,
+        "v": signed.v,
+        "r": HexBytes(signed.r.to_bytes(32, 'big')).hex(),
+        "s": HexBytes(signed.s.to_bytes(32, 'big')).hex()
+    })
+    return bid
+
+
+def recover_bid_signer(chain_id, contract_address, bid):
+    """
+    Recovers the address that signed a bid (the same check AcceptSignedBid does with ecrecover).
+
+    Args:
+        chain_id (int): Chain ID given to the Federation contract constructor.
+        contract_address (str): Address of the Federation contract.
+        bid (dict): The signed bid.
+
+    Returns:
+        str: The address of the signer.
+    """
+    vrs = (bid["v"], HexBytes(bid["r"]), HexBytes(bid["s"]))
+    return Account.recover_message(bid_message(chain_id, contract_address, bid), vrs=vrs)
+
+
+class SignedBidPool:
+    """
+    Signed bids received by the consumer, grouped by service ID and keyed by provider (one bid per provider).
+
+    Providers send their signed bids to the consumer API instead of placing them in the SC, so the bids
+    are kept here until the consumer accepts one of them with a single AcceptSignedBid transaction.
+    """
+
+    def __init__(self):
+        self.bids = {}
+        self.condition = threading.Condition()
+
+    def add(self, bid):
+        """
+        Adds a verified signed bid and wakes up the threads waiting for bids of its service. A new bid of a
+        provider replaces the bid it sent before for the same service.
+
+        Args:
+            bid (dict): The signed bid.
+
+        Returns:
+            int: The number of providers that sent a bid for the service.
+        """
+        with self.condition:
+            service_bids = self.bids.setdefault(bid["service-id"], {})
+            provider = to_checksum_address(bid["provider"])
+            service_bids.pop(provider, None)  # The replacing bid moves to the end of the arrival order
+            service_bids[provider] = bid
+            self.condition.notify_all()
+            return len(service_bids)
+
+    def get(self, service_id):
+        """
+        Returns the signed bids received for a service, in arrival order.
+
+        Args:
+            service_id (str): The unique identifier of the service.
+
+        Returns:
+            list: The signed bids.
+        """
+        with self.condition:
+            return list(self.bids.get(service_id, {}).values())
+
+    def wait_for_bids(self, service_id, count=1, timeout=None):
+        """
+        Blocks the calling thread until at least count signed bids have been received for a service.
+
+        Args:
+            service_id (str): The unique identifier of the service.
+            count (int): Number of bids to wait for.
+            timeout (int): Timeout in seconds (None waits forever).
+
+        Returns:
+            list: The signed bids received so far (fewer than count if the timeout expired).
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: len(self.bids.get(service_id, {})) >= count, timeout)
+            return list(self.bids.get(service_id, {}).values())
+
+    def pop(self, service_id):
+        """
+        Removes the signed bids of a service (e.g. once one of them has been accepted).
+
+        Args:
+            service_id (str): The unique identifier of the service.
+
+        Returns:
+            list: The removed signed bids.
+        """
+        with self.condition:
+            return list(self.bids.pop(service_id, {}).values())
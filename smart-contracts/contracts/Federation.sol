@@ -1,5 +1,7 @@
 // SPDX-License-Identifier: MIT
 pragma solidity >=0.4.21 <0.7.0;
+// Needed for the bytes[] parameter of AnnounceServices
+pragma experimental ABIEncoderV2;
 
 // Define the smart contract
 contract Federation {
@@ -7,69 +9,150 @@ contract Federation {
     // Define the possible states of a service
     enum ServiceState {Open, Closed, Deployed}
 
-    // Define the Operator struct
+    // Define the Operator struct (an operator is registered when its name is not empty)
     struct Operator {
         bytes32 name;
-        bool registered;
     }
 
     // Define the Service struct
+    // The service ID is the mapping key and the requirements are only kept as a hash (the full requirements
+    // are emitted in the ServiceAnnouncement event). The provider, the state and the automatic selection
+    // settings share one storage slot.
+    // With automatic selection (deadline_block or max_bids set), provider holds the lowest bid while the
+    // service is open, and the contract closes the service itself once the deadline is reached.
+    // With instant accept, best_price holds the maximum price of the consumer and the first bid at or
+    // below it closes the service in the same transaction.
     struct Service {
         address creator;
-        bytes32 endpoint_consumer;
-        bytes32 id;
+        uint32 closed_block;  // Block in which a provider was chosen (shares the slot of the creator)
         address provider;
-        bytes32 endpoint_provider;
-        bytes req_info;
         ServiceState state;
+        uint32 deadline_block;
+        uint16 max_bids;
+        uint32 best_price;
+        bool instant_accept;
+        bytes32 endpoint_consumer;
+        bytes32 endpoint_provider;
+        bytes32 requirements_hash;
+        bytes deployed_info;
     }
 
-    // Define the Bid struct
+    // Define the Bid struct (the bidder address and the price share one storage slot)
     struct Bid {
         address bid_address;
-        uint price;
+        uint32 price;
         bytes32 endpoint_provider;
     }
     
     // Define mappings to store data
-    mapping(bytes32 => uint) public bidCount;
     mapping(bytes32 => Bid[]) public bids;
     mapping(bytes32 => Service) public service;
     mapping(address => Operator) public operator;
+
+    // Maximum number of bids of a service. ReleaseService deletes the whole bid pool in one transaction, and each
+    // bid clears two storage slots (about 10000 gas), so a full pool is released with about 5 million gas, within
+    // the gas limit of the blocks of the private network (6721975, see genesis.json)
+    uint256 constant MAX_BIDS_PER_SERVICE = 500;
+
+    // Blocks after which the creator can release a closed service that its provider never confirmed with
+    // ServiceDeployed (about 10 minutes with the 2 s block period of the private network, see genesis.json)
+    uint256 constant CLOSED_RELEASE_TIMEOUT_BLOCKS = 300;
     
-    // Define events
-    event OperatorRegistered(address operator, bytes32 name);
-    event ServiceAnnouncement(bytes requirements, bytes32 id);
-    event NewBid(bytes32 _id, uint256 max_bid_index);
-    event ServiceAnnouncementClosed(bytes32 _id);
-    event ServiceDeployedEvent(bytes32 _id);
+    // EIP-712 typed data of the bids signed off-chain by the providers (see AcceptSignedBid)
+    bytes32 constant EIP712_DOMAIN_TYPEHASH = keccak256("EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)");
+    bytes32 constant BID_TYPEHASH = keccak256("Bid(bytes32 service_id,address consumer,uint32 price,bytes32 endpoint_provider,uint256 expiry_block)");
+    bytes32 public DOMAIN_SEPARATOR;
+
+    // Define events (service IDs and operator addresses are indexed topics, so clients can filter the logs on the node)
+    event OperatorRegistered(address indexed operator, bytes32 name);
+    event ServiceAnnouncement(bytes requirements, bytes32 indexed id, address indexed creator);
+    event NewBid(bytes32 indexed _id, address indexed creator, address indexed provider, uint256 max_bid_index);
+    event ServiceAnnouncementClosed(bytes32 indexed _id, address indexed creator, address indexed provider);
+    event ServiceDeployedEvent(bytes32 indexed _id, address indexed creator, address indexed provider);
+    event ServiceReleased(bytes32 indexed _id, address indexed creator, address indexed provider);
+
+    // The chain ID is a constructor argument because solc 0.5.0 has no chainid opcode (the migration passes the
+    // chain ID of the network, 1234 in the private network)
+    constructor(uint256 chain_id) public {
+        DOMAIN_SEPARATOR = keccak256(abi.encode(EIP712_DOMAIN_TYPEHASH, keccak256("Federation"), keccak256("1"), chain_id, address(this)));
+    }
 
     function addOperator(bytes32 name) public {
         Operator storage current_operator = operator[msg.sender];
-        require(name.length > 0, "Name is not valid");
-        require(current_operator.registered == false, "Operator already registered");
+        require(name != bytes32(0), "Name is not valid");
+        require(current_operator.name == bytes32(0), "Operator already registered");
         current_operator.name = name;
-        current_operator.registered = true;
         emit OperatorRegistered(msg.sender, name);
     }
 
     function getOperatorInfo(address op_address) public view returns (bytes32 name) {
         Operator storage current_operator = operator[op_address];
-        require(current_operator.registered == true, "Operator is not registered with this address. Please register.");
+        require(current_operator.name != bytes32(0), "Operator is not registered with this address. Please register.");
         return current_operator.name;
 	}
 
-    function AnnounceService(bytes memory _requirements, bytes32 _endpoint_consumer, bytes32 _id) public returns(ServiceState) {
+    function AnnounceService(bytes calldata _requirements, bytes32 _endpoint_consumer, bytes32 _id) external returns(ServiceState) {
+        Operator storage current_operator = operator[msg.sender];
+        require(current_operator.name != bytes32(0), "Operator is not registered. Can not bid. Please register.");
+        announceService(keccak256(_requirements), _endpoint_consumer, _id);
+        emit ServiceAnnouncement(_requirements, _id, msg.sender);
+        return ServiceState.Open;
+    }
+
+    // Announces several services in one transaction (same checks and events as AnnounceService)
+    function AnnounceServices(bytes[] memory reqs, bytes32[] memory endpoints, bytes32[] memory ids) public returns(uint256) {
+        Operator storage current_operator = operator[msg.sender];
+        require(current_operator.name != bytes32(0), "Operator is not registered. Can not bid. Please register.");
+        require(reqs.length == ids.length && endpoints.length == ids.length, "Array lengths do not match");
+        for (uint256 i = 0; i < ids.length; i++) {
+            announceService(keccak256(reqs[i]), endpoints[i], ids[i]);
+            emit ServiceAnnouncement(reqs[i], ids[i], msg.sender);
+        }
+        return ids.length;
+    }
+
+    // Announces a service whose winner is selected by the contract (lowest price, first bid on ties):
+    // the service is closed by the bid number max_bids, or by the first bid or SettleService call after
+    // deadline_blocks blocks. A zero value disables the corresponding rule.
+    function AnnounceServiceWithDeadline(bytes calldata _requirements, bytes32 _endpoint_consumer, bytes32 _id, uint32 deadline_blocks, uint16 max_bids) external returns(ServiceState) {
         Operator storage current_operator = operator[msg.sender];
+        require(current_operator.name != bytes32(0), "Operator is not registered. Can not bid. Please register.");
+        require(deadline_blocks > 0 || max_bids > 0, "A deadline or a maximum number of bids is required");
+        announceService(keccak256(_requirements), _endpoint_consumer, _id);
+
         Service storage current_service = service[_id];
-        require(current_operator.registered == true, "Operator is not registered. Can not bid. Please register.");
-        require(current_service.id != _id, "Service ID for operator already exists");
+        if (deadline_blocks > 0) {
+            current_service.deadline_block = uint32(block.number + deadline_blocks);
+        }
+        current_service.max_bids = max_bids;
+        emit ServiceAnnouncement(_requirements, _id, msg.sender);
+        return ServiceState.Open;
+    }
 
-        service[_id] = Service(msg.sender, _endpoint_consumer, _id, msg.sender,  _endpoint_consumer, _requirements, ServiceState.Open);
-        emit ServiceAnnouncement(_requirements, _id);
+    // Announces a service that is awarded to the first bid at or below max_price (instant accept):
+    // the bid closes the service and emits ServiceAnnouncementClosed, so no ChooseProvider is needed.
+    function AnnounceServiceWithMaxPrice(bytes calldata _requirements, bytes32 _endpoint_consumer, bytes32 _id, uint32 max_price) external returns(ServiceState) {
+        Operator storage current_operator = operator[msg.sender];
+        require(current_operator.name != bytes32(0), "Operator is not registered. Can not bid. Please register.");
+        announceService(keccak256(_requirements), _endpoint_consumer, _id);
+
+        Service storage current_service = service[_id];
+        current_service.best_price = max_price;
+        current_service.instant_accept = true;
+        emit ServiceAnnouncement(_requirements, _id, msg.sender);
         return ServiceState.Open;
     }
 
+    function announceService(bytes32 _requirements_hash, bytes32 _endpoint_consumer, bytes32 _id) internal {
+        Service storage current_service = service[_id];
+        require(current_service.creator == address(0), "Service ID for operator already exists");
+
+        // Only the non-zero fields are written (the state starts as Open)
+        current_service.creator = msg.sender;
+        current_service.endpoint_consumer = _endpoint_consumer;
+        current_service.requirements_hash = _requirements_hash;
+    }
+
     function GetServiceState(bytes32 _id) public view returns (ServiceState) {
         return service[_id].state;
     }
@@ -77,61 +160,181 @@ contract Federation {
     function GetServiceInfo(bytes32 _id, bool provider, address call_address) public view returns (bytes32, bytes32, bytes memory) {
         Operator storage current_operator = operator[call_address];
         Service storage current_service = service[_id];
-        require(current_operator.registered == true, "Operator is not registered. Can not look into. Please register.");
+        require(current_operator.name != bytes32(0), "Operator is not registered. Can not look into. Please register.");
         require(current_service.state >= ServiceState.Closed, "Service is still open or not exists");
         if(provider == true) {
                 require(current_service.provider == call_address, "This domain is not a winner");
-                return(current_service.id, current_service.endpoint_consumer, current_service.req_info);
+                return(_id, current_service.endpoint_consumer, current_service.deployed_info);
         }
         else {
                 require(current_service.creator == call_address, "This domain is not a creator");
-                return(current_service.id, current_service.endpoint_provider, current_service.req_info);
+                return(_id, current_service.endpoint_provider, current_service.deployed_info);
         }
     }
 
     function PlaceBid(bytes32 _id, uint32 _price, bytes32 _endpoint) public returns (uint256) {
         Operator storage current_operator = operator[msg.sender];
+        require(current_operator.name != bytes32(0), "Operator is not registered. Can not bid. Please register.");
+        return placeBid(_id, _price, _endpoint);
+    }
+
+    // Places a bid for several services in one transaction (same events as PlaceBid). The services that are
+    // closed, do not exist or have a full bid pool are skipped instead of reverting the whole batch. Returns the
+    // number of bids placed.
+    function PlaceBids(bytes32[] memory ids, uint32[] memory prices, bytes32 endpoint) public returns (uint256) {
+        Operator storage current_operator = operator[msg.sender];
+        require(current_operator.name != bytes32(0), "Operator is not registered. Can not bid. Please register.");
+        require(prices.length == ids.length, "Array lengths do not match");
+        uint256 placed = 0;
+        for (uint256 i = 0; i < ids.length; i++) {
+            Service storage current_service = service[ids[i]];
+            if (current_service.creator == address(0) || current_service.state != ServiceState.Open ||
+                bids[ids[i]].length >= MAX_BIDS_PER_SERVICE) {
+                continue;
+            }
+            if (placeBid(ids[i], prices[i], endpoint) != 0) {
+                placed++;
+            }
+        }
+        return placed;
+    }
+
+    function placeBid(bytes32 _id, uint32 _price, bytes32 _endpoint) internal returns (uint256) {
         Service storage current_service = service[_id];
-        require(current_operator.registered == true, "Operator is not registered. Can not bid. Please register.");
-        require(current_service.state == ServiceState.Open, "Service is closed or not exists");
+        require(current_service.creator != address(0) && current_service.state == ServiceState.Open, "Service is closed or not exists");
+        bool automatic = current_service.deadline_block != 0 || current_service.max_bids != 0;
+
+        // A bid after the deadline closes the service with the best bid received so far (it is not added)
+        if (automatic && current_service.provider != address(0) && deadlineReached(current_service)) {
+            closeService(_id, current_service);
+            return 0;
+        }
+        require(bids[_id].length < MAX_BIDS_PER_SERVICE, "The bid pool of the service is full");
+
         uint256 max_bid_index = bids[_id].push(Bid(msg.sender, _price, _endpoint));
-        bidCount[_id] = max_bid_index;
-        emit NewBid(_id, max_bid_index);
+        emit NewBid(_id, current_service.creator, msg.sender, max_bid_index);
+
+        if (current_service.instant_accept) {
+            if (_price <= current_service.best_price) {
+                current_service.provider = msg.sender;
+                current_service.endpoint_provider = _endpoint;
+                closeService(_id, current_service);
+            }
+        }
+        else if (automatic) {
+            if (current_service.provider == address(0) || _price < current_service.best_price) {
+                current_service.provider = msg.sender;
+                current_service.best_price = _price;
+                current_service.endpoint_provider = _endpoint;
+            }
+            if (deadlineReached(current_service) || (current_service.max_bids != 0 && max_bid_index >= current_service.max_bids)) {
+                closeService(_id, current_service);
+            }
+        }
         return max_bid_index;
     }
 
+    // Closes a service with automatic selection once its deadline is reached (callable by anyone)
+    function SettleService(bytes32 _id) public returns (address) {
+        Service storage current_service = service[_id];
+        require(current_service.creator != address(0) && current_service.state == ServiceState.Open, "Service is closed or not exists");
+        require(current_service.deadline_block != 0 && deadlineReached(current_service), "Service deadline not reached");
+        require(current_service.provider != address(0), "No bids for requested Service");
+        closeService(_id, current_service);
+        return current_service.provider;
+    }
+
+    function deadlineReached(Service storage current_service) internal view returns (bool) {
+        return current_service.deadline_block != 0 && block.number > current_service.deadline_block;
+    }
+
+    function closeService(bytes32 _id, Service storage current_service) internal {
+        current_service.state = ServiceState.Closed;
+        current_service.closed_block = uint32(block.number);
+        emit ServiceAnnouncementClosed(_id, current_service.creator, current_service.provider);
+    }
+
     function GetBidCount(bytes32 _id, address _creator) public view returns (uint256) {
         Service storage current_service = service[_id];
-        require(current_service.id == _id, "Service not exists");
+        require(current_service.creator != address(0), "Service not exists");
         require(current_service.creator == _creator, "Only service creator can look into the information");
-        return bidCount[_id];
+        return bids[_id].length;
     }
 
     function GetBid(bytes32 _id, uint256 bider_index, address _creator) public view returns (address, uint, uint256) {
         Service storage current_service = service[_id];
         Bid[] storage current_bid_pool = bids[_id];
-        require(current_service.id == _id, "Service not exists");
+        require(current_service.creator != address(0), "Service not exists");
         require(current_service.creator == _creator, "Only service creator can look into the information");
         require(bids[_id].length > 0, "No bids for requested Service");
         return (current_bid_pool[bider_index].bid_address, current_bid_pool[bider_index].price, bider_index);
     }
 
+    // Returns a page of the bid pool of a service as parallel arrays (bidder addresses, prices and endpoints),
+    // so all the offers can be evaluated with a single call
+    function GetBids(bytes32 _id, uint256 offset, uint256 limit, address _creator) public view returns (address[] memory, uint32[] memory, bytes32[] memory) {
+        Service storage current_service = service[_id];
+        Bid[] storage current_bid_pool = bids[_id];
+        require(current_service.creator != address(0), "Service not exists");
+        require(current_service.creator == _creator, "Only service creator can look into the information");
+        uint256 count = 0;
+        if (offset < current_bid_pool.length) {
+            count = current_bid_pool.length - offset;
+            if (count > limit) {
+                count = limit;
+            }
+        }
+        address[] memory bid_addresses = new address[](count);
+        uint32[] memory prices = new uint32[](count);
+        bytes32[] memory endpoints = new bytes32[](count);
+        for (uint256 i = 0; i < count; i++) {
+            Bid storage current_bid = current_bid_pool[offset + i];
+            bid_addresses[i] = current_bid.bid_address;
+            prices[i] = current_bid.price;
+            endpoints[i] = current_bid.endpoint_provider;
+        }
+        return (bid_addresses, prices, endpoints);
+    }
+
     function ChooseProvider(bytes32 _id, uint256 bider_index) public returns (bytes32 endpoint_provider) {
         Service storage current_service = service[_id];
         Bid[] storage current_bid_pool = bids[_id];
-        require(current_service.id == _id, "Service not exists");
+        require(current_service.creator != address(0), "Service not exists");
         require(current_service.creator == msg.sender, "Only service creator can close the announcement");
         require(current_service.state == ServiceState.Open, "Service announcement already closed");
 
+        // The provider and the state are written to the same storage slot
+        Bid storage chosen_bid = current_bid_pool[bider_index];
+        current_service.provider = chosen_bid.bid_address;
         current_service.state = ServiceState.Closed;
-        // address bid_address_= current_bid_pool[bider_index].bid_address;
-        service[_id].provider = current_bid_pool[bider_index].bid_address;
-        service[_id].endpoint_provider = current_bid_pool[bider_index].endpoint_provider;
-        emit ServiceAnnouncementClosed(_id);
-        return service[_id].endpoint_provider;
+        current_service.closed_block = uint32(block.number);
+        current_service.endpoint_provider = chosen_bid.endpoint_provider;
+        emit ServiceAnnouncementClosed(_id, msg.sender, chosen_bid.bid_address);
+        return chosen_bid.endpoint_provider;
         // return (current_bid_pool[bider_index].bid_address, current_bid_pool[bider_index].price);
     }
 
+    // Closes a service with a bid signed off-chain (EIP-712) by a registered provider, so the provider does not send
+    // a PlaceBid transaction and the consumer does not send ChooseProvider. The signature covers the service ID, the
+    // consumer, the price, the provider endpoint and the last block in which the bid can be accepted.
+    function AcceptSignedBid(bytes32 _id, uint32 _price, bytes32 _endpoint, uint256 expiry_block, uint8 v, bytes32 r, bytes32 s) public returns (address) {
+        Service storage current_service = service[_id];
+        require(current_service.creator != address(0), "Service not exists");
+        require(current_service.creator == msg.sender, "Only service creator can close the announcement");
+        require(current_service.state == ServiceState.Open, "Service announcement already closed");
+        require(block.number <= expiry_block, "Signed bid expired");
+
+        bytes32 digest = keccak256(abi.encodePacked("\x19\x01", DOMAIN_SEPARATOR,
+            keccak256(abi.encode(BID_TYPEHASH, _id, msg.sender, _price, _endpoint, expiry_block))));
+        address provider = ecrecover(digest, v, r, s);
+        require(provider != address(0) && operator[provider].name != bytes32(0), "Invalid signature or provider not registered");
+
+        current_service.provider = provider;
+        current_service.endpoint_provider = _endpoint;
+        closeService(_id, current_service);
+        return provider;
+    }
+
     function isWinner(bytes32 _id, address _winner) public view returns (bool) {
         Service storage current_service = service[_id];
         require(current_service.state == ServiceState.Closed, "Service winner not choosen. Service: DEPLOYED or OPEN");
@@ -145,14 +348,36 @@ contract Federation {
 
     function ServiceDeployed(bytes memory info, bytes32 _id) public returns (bool) {
         Service storage current_service = service[_id];
-        require(current_service.id == _id, "Service not exists");
+        require(current_service.creator != address(0), "Service not exists");
         require(current_service.provider == msg.sender, "Only service provider can deploy the service");
         require(current_service.state == ServiceState.Closed, "Service winner not choosen. Service: DEPLOYED or OPEN");
         current_service.state = ServiceState.Deployed;
-        current_service.req_info = info;
-        emit ServiceDeployedEvent(_id);
+        current_service.deployed_info = info;
+        emit ServiceDeployedEvent(_id, current_service.creator, msg.sender);
         return true;
     }
 
-
+    // Releases a finished (or abandoned) service: its storage and bid pool are deleted (refunding the gas of
+    // the cleared slots) and the service ID can be announced again. The provider can release the service once it
+    // is deployed. The creator can also release an open service that received no bids or whose deadline passed,
+    // and a closed one that the chosen provider did not deploy within CLOSED_RELEASE_TIMEOUT_BLOCKS (before that,
+    // the provider may still be deploying it).
+    function ReleaseService(bytes32 _id) public returns (bool) {
+        Service storage current_service = service[_id];
+        address creator = current_service.creator;
+        address provider = current_service.provider;
+        require(creator != address(0), "Service not exists");
+        require(creator == msg.sender || provider == msg.sender, "Only the service creator or provider can release it");
+        bool abandoned = creator == msg.sender && (
+            (current_service.state == ServiceState.Open && (bids[_id].length == 0 || deadlineReached(current_service))) ||
+            (current_service.state == ServiceState.Closed &&
+             block.number > uint256(current_service.closed_block) + CLOSED_RELEASE_TIMEOUT_BLOCKS));
+        require(current_service.state == ServiceState.Deployed || abandoned,
+                "Only a deployed service, an open service without bids or past its deadline, or a closed service never deployed can be released");
+        // Bounded by MAX_BIDS_PER_SERVICE
+        delete bids[_id];
+        delete service[_id];
+        emit ServiceReleased(_id, creator, provider);
+        return true;
+    }
 }
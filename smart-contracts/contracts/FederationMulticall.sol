@@ -0,0 +1,30 @@
+// SPDX-License-Identifier: MIT
+pragma solidity >=0.5.0 <0.7.0;
+pragma experimental ABIEncoderV2;
+
+// Aggregates read-only calls so that a whole federation view is read in one eth_call, from the same block
+contract FederationMulticall {
+
+    // Define the Call struct
+    struct Call {
+        address target;
+        bytes callData;
+    }
+
+    // Define the Result struct
+    struct Result {
+        bool success;
+        bytes returnData;
+    }
+
+    function tryAggregate(Call[] memory calls) public view returns (uint256 blockNumber, Result[] memory returnData) {
+        blockNumber = block.number;
+        returnData = new Result[](calls.length);
+        for (uint256 i = 0; i < calls.length; i++) {
+            // A reverted call (e.g. isWinner on an open service) does not revert the whole snapshot
+            (bool success, bytes memory result) = calls[i].target.staticcall(calls[i].callData);
+            returnData[i] = Result(success, result);
+        }
+        return (blockNumber, returnData);
+    }
+}
@@ -6,9 +6,12 @@ output=$(truffle migrate --network node1)
 # Print the output
 echo "$output"
 
-# Extract the contract address using grep and awk
-contract_address=$(echo "$output" | grep "contract address:" | awk '{print $4}')
+# Extract the address of each contract using awk (first "contract address:" line after its "Deploying" line)
+contract_address=$(echo "$output" | awk "/Deploying 'Federation'/{found=1} found && /contract address:/{print \$4; exit}")
+multicall_address=$(echo "$output" | awk "/Deploying 'FederationMulticall'/{found=1} found && /contract address:/{print \$4; exit}")
 
-# Save the contract address in the ../code/ directory
+# Save the contract addresses in the ../code/ directory
 echo "CONTRACT_ADDRESS=$contract_address" > ./.env
-echo "Contract Address saved in ./.env file: $contract_address"
\ No newline at end of file
+echo "MULTICALL_ADDRESS=$multicall_address" >> ./.env
+echo "Contract Address saved in ./.env file: $contract_address"
+echo "Multicall Address saved in ./.env file: $multicall_address"
@@ -1,5 +1,7 @@
 const Federation = artifacts.require('Federation.sol');
 
-module.exports = function (deployer) {
-    deployer.deploy(Federation);
+module.exports = async function (deployer) {
+    // Chain ID of the EIP-712 domain of the signed bids (1234 in the private network)
+    const chainId = await web3.eth.getChainId();
+    await deployer.deploy(Federation, chainId);
 };
@@ -0,0 +1,5 @@
+const FederationMulticall = artifacts.require('FederationMulticall.sol');
+
+module.exports = function (deployer) {
+    deployer.deploy(FederationMulticall);
+};
@@ -0,0 +1,84 @@
+"""
+Round trip of the bids signed off-chain: sign_bid -> recover_bid_signer, and the same signature accepted by
+AcceptSignedBid of the Federation contract deployed on a local in-process EVM (eth-tester + py-evm).
+
+Requirements: pip install -r requirements-dev.txt
+Usage (from the repository root):
+    python3 -m pytest tests
+"""
+import os
+import re
+import sys
+
+import pytest
+from eth_account import Account
+from eth_utils import keccak
+from web3 import Web3, EthereumTesterProvider
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from contract_build import CONTRACTS_DIR, load_contract
+from signed_bids import BID_TYPEHASH, EIP712_DOMAIN_TYPEHASH, domain_separator, recover_bid_signer, sign_bid
+
+
+CHAIN_ID = 1234  # Chain ID of the private network
+SERVICE_ID = "service1718000000"
+ENDPOINT_PROVIDER = "10.5.50.71"
+
+
+@pytest.fixture(scope="module")
+def chain():
+    web3 = Web3(EthereumTesterProvider())
+    try:
+        abi, bytecode = load_contract("Federation")
+    except RuntimeError as e:
+        pytest.skip(str(e))
+    consumer = web3.eth.accounts[0]
+    tx_hash = web3.eth.contract(abi=abi, bytecode=bytecode).constructor(CHAIN_ID).transact({'from': consumer})
+    contract = web3.eth.contract(address=web3.eth.wait_for_transaction_receipt(tx_hash)['contractAddress'], abi=abi)
+    return web3, contract
+
+
+def test_type_hashes_match_the_contract():
+    source = open(os.path.join(CONTRACTS_DIR, "Federation.sol")).read()
+    type_strings = dict(re.findall(r'bytes32 constant (\w+) = keccak256\("([^"]+)"\)', source))
+    assert keccak(text=type_strings["EIP712_DOMAIN_TYPEHASH"]) == EIP712_DOMAIN_TYPEHASH
+    assert keccak(text=type_strings["BID_TYPEHASH"]) == BID_TYPEHASH
+
+
+def test_recover_signer():
+    provider = Account.create()
+    consumer = Account.create().address
+    contract_address = Account.create().address
+    bid = sign_bid(provider.key, CHAIN_ID, contract_address, SERVICE_ID, consumer, 10, ENDPOINT_PROVIDER, 100)
+    assert bid["provider"] == provider.address
+    assert recover_bid_signer(CHAIN_ID, contract_address, bid) == provider.address
+
+    # Any change of the signed fields recovers another address
+    assert recover_bid_signer(CHAIN_ID, contract_address, dict(bid, price=9)) != provider.address
+    assert recover_bid_signer(CHAIN_ID + 1, contract_address, bid) != provider.address
+
+
+def test_domain_separator_matches_the_contract(chain):
+    web3, contract = chain
+    assert contract.functions.DOMAIN_SEPARATOR().call() == domain_separator(CHAIN_ID, contract.address)
+
+
+def test_accept_signed_bid(chain):
+    web3, contract = chain
+    consumer, provider = web3.eth.accounts[:2]
+    text = lambda value: web3.toBytes(text=value)
+    for account, name in ((consumer, "AD1"), (provider, "AD2")):
+        contract.functions.addOperator(text(name)).transact({'from': account})
+    contract.functions.AnnounceService(_requirements=text("service=object-detector;replicas=1"),
+                                       _endpoint_consumer=text("10.5.50.70"), _id=text(SERVICE_ID)).transact({'from': consumer})
+
+    provider_key = web3.provider.ethereum_tester.backend.account_keys[1]
+    bid = sign_bid(provider_key, CHAIN_ID, contract.address, SERVICE_ID, consumer, 10, ENDPOINT_PROVIDER,
+                   web3.eth.blockNumber + 10)
+    assert recover_bid_signer(CHAIN_ID, contract.address, bid) == provider
+
+    accept = contract.functions.AcceptSignedBid(text(SERVICE_ID), bid["price"], text(ENDPOINT_PROVIDER), bid["expiry-block"],
+                                                bid["v"], web3.toBytes(hexstr=bid["r"]), web3.toBytes(hexstr=bid["s"]))
+    assert accept.call({'from': consumer}) == provider
+    assert web3.eth.wait_for_transaction_receipt(accept.transact({'from': consumer}))['status'] == 1
+    assert contract.functions.isWinner(text(SERVICE_ID), provider).call()
@@ -0,0 +1,174 @@
+import threading
+import time
+from concurrent.futures import Future
+
+
+class TransactionFailed(Exception):
+    """
+    Raised through a receipt future when the transaction was mined but reverted (status 0).
+    """
+
+    def __init__(self, receipt):
+        self.receipt = receipt
+        super().__init__(f"Transaction {receipt['tx-hash']} ({receipt['step']}) reverted in block {receipt['block-number']}")
+
+
+class TransactionTracker:
+    """
+    Push-based tracker that turns transaction hashes into futures.
+
+    The tracker subscribes to 'newHeads' on the websocket node. For every new block it fetches the
+    transaction hashes of the block and resolves the futures of the tracked transactions it contains,
+    recording the submit -> inclusion latency of each federation step.
+
+    As a fallback (subscription not available, blocks missed while reconnecting), the receipts of the
+    transactions still tracked after poll_interval seconds are polled with 'eth_getTransactionReceipt',
+    and all of them are polled right after a reconnection.
+    """
+
+    def __init__(self, ws_client, poll_interval=2):
+        """
+        Args:
+            ws_client (WebsocketClient): Started websocket client connected to the Ethereum node.
+            poll_interval (int): Seconds between receipt polls of the transactions not resolved by newHeads.
+        """
+        self.ws_client = ws_client
+        self.poll_interval = poll_interval
+        self.lock = threading.Lock()
+        self.tracked = {}    # tx hash (lowercase hex) -> (step, submit time, future)
+        self.latencies = {}  # step -> list of submit -> inclusion latencies (seconds)
+        self.subscription_id = None
+        self.catch_up = threading.Event()
+        self.poller = threading.Thread(target=self._poll_receipts, name="tx-receipt-poller", daemon=True)
+
+    def start(self):
+        """
+        Starts the receipt polling fallback and subscribes to new block headers.
+        """
+        if not self.poller.is_alive():
+            self.poller.start()
+            self.ws_client.add_reconnect_callback(self.catch_up.set)
+        self.subscription_id = self.ws_client.subscribe(['newHeads'], self._on_new_head)
+
+    def track(self, tx_hash, step):
+        """
+        Starts tracking a transaction. Call it before broadcasting the transaction so that a block
+        arriving right after the broadcast cannot be missed.
+
+        Args:
+            tx_hash (str or bytes): The transaction hash.
+            step (str): Name of the federation step (e.g. 'AnnounceService').
+
+        Returns:
+            Future: Resolves to the receipt summary (dict) once the transaction is included in a block,
+                    or raises TransactionFailed if it reverted.
+        """
+        future = Future()
+        key = self._key(tx_hash)
+        with self.lock:
+            self.tracked[key] = (step, time.time(), future)
+        return future
+
+    def forget(self, tx_hash):
+        """
+        Stops tracking a transaction that was never broadcast.
+
+        Args:
+            tx_hash (str or bytes): The transaction hash.
+        """
+        with self.lock:
+            entry = self.tracked.pop(self._key(tx_hash), None)
+        if entry is not None:
+            entry[2].cancel()
+
+    def summary(self):
+        """
+        Returns inclusion latency statistics per federation step.
+
+        Returns:
+            dict: For each step, the number of samples and the mean, min and max latency in seconds.
+        """
+        with self.lock:
+            return {
+                step: {
+                    "samples": len(values),
+                    "mean": sum(values) / len(values),
+                    "min": min(values),
+                    "max": max(values)
+                }
+                for step, values in self.latencies.items() if values
+            }
+
+    @staticmethod
+    def _key(tx_hash):
+        if isinstance(tx_hash, (bytes, bytearray)):
+            return '0x' + bytes(tx_hash).hex()
+        return tx_hash.lower()
+
+    def _resolve(self, tx_hash, entry, receipt, included_at):
+        step, submitted_at, future = entry
+        latency = included_at - submitted_at
+        with self.lock:
+            self.latencies.setdefault(step, []).append(latency)
+        result = {
+            "tx-hash": tx_hash,
+            "step": step,
+            "block-number": int(receipt['blockNumber'], 16),
+            "status": int(receipt['status'], 16),
+            "gas-used": int(receipt['gasUsed'], 16),
+            "latency": latency
+        }
+        print(f"(TX) {step} included in block {result['block-number']} after {latency:.3f} seconds")
+        if result['status'] == 1:
+            future.set_result(result)
+        else:
+            future.set_exception(TransactionFailed(result))
+
+    async def _on_new_head(self, header):
+        if not self.tracked:
+            return
+        block = await self.ws_client.async_request('eth_getBlockByHash', [header['hash'], False])
+        if block is None:
+            return
+        included_at = time.time()
+        with self.lock:
+            matches = [(h, self.tracked.pop(h)) for h in block['transactions'] if h in self.tracked]
+
+        for tx_hash, entry in matches:
+            try:
+                receipt = await self.ws_client.async_request('eth_getTransactionReceipt', [tx_hash])
+            except Exception as e:
+                entry[2].set_exception(e)
+                continue
+            if receipt is None:
+                # Not indexed yet: left to the receipt poller
+                with self.lock:
+                    self.tracked[tx_hash] = entry
+                continue
+            self._resolve(tx_hash, entry, receipt, included_at)
+
+    def _poll_receipts(self):
+        while True:
+            catch_up = self.catch_up.wait(self.poll_interval)
+            self.catch_up.clear()
+            now = time.time()
+            with self.lock:
+                # After a reconnection every transaction is polled, otherwise only the ones newHeads did not resolve
+                pending = [tx_hash for tx_hash, (_, submitted_at, _) in self.tracked.items()
+                           if catch_up or now - submitted_at >= self.poll_interval]
+            if not pending:
+                continue
+            try:
+                receipts = self.ws_client.batch([('eth_getTransactionReceipt', [tx_hash]) for tx_hash in pending])
+            except Exception as e:
+                print(f"Failed to poll transaction receipts: {e}")
+                continue
+            included_at = time.time()
+            for tx_hash, receipt in zip(pending, receipts):
+                if receipt is None or isinstance(receipt, Exception):
+                    continue
+                with self.lock:
+                    entry = self.tracked.pop(tx_hash, None)
+                # Skipped if newHeads resolved it in the meantime
+                if entry is not None:
+                    self._resolve(tx_hash, entry, receipt, included_at)
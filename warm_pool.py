@@ -0,0 +1,138 @@
+import threading
+
+from kubernetes.client.rest import ApiException
+
+from k8s_teardown import RELEASE_LABEL
+
+
+HTTP_CONFLICT = 409
+
+
+def pod_ready(pod):
+    if pod.metadata.deletion_timestamp is not None or pod.status.phase != 'Running':
+        return False
+    return any(condition.type == 'Ready' and condition.status == 'True' for condition in pod.status.conditions or [])
+
+
+class WarmPool:
+    """
+    Warm standby pool of a federated component (e.g. the object detector of the provider).
+
+    The pool keeps a standby Deployment whose pods are created, pulled and started in advance but held out
+    of service: their 'app' label does not match the selector of the Service, which is also created in
+    advance (so its external IP is already assigned). Claiming a pod patches its labels to the ones of the
+    component, so the Service selects it at once and provisioning becomes a label flip. The patched pod no
+    longer matches the selector of the standby ReplicaSet, which releases it and starts a replacement: the
+    pool refills itself in the background.
+
+    Released pods have no owner: a claimed pod that fails or is evicted is not replaced, so the component
+    runs with fewer replicas until it is deployed again (deploy, from cold, keeps a Deployment). Claimed pods
+    keep their standby names; they are found by their labels (app and release), e.g. to wait for their
+    termination.
+    """
+
+    def __init__(self, chart, core_api, pod_informer, standby_release, service_release, component_release,
+                 standby_values, service_values, component_values, app, standby_app, size=1, namespace="default"):
+        """
+        Args:
+            chart (Chart): Chart the standby pods and the Service are rendered from.
+            core_api (CoreV1Api): Client of the core API (pods).
+            pod_informer (Informer): Pod informer used to find the ready standby pods.
+            standby_release (str): Release name of the standby deployment (and its ConfigMaps).
+            service_release (str): Release name of the Service of the component.
+            component_release (str): Release name the claimed pods are moved to (deleted with it on teardown).
+            standby_values (tuple): Values files and --set assignments of the standby release.
+            service_values (tuple): Values files and --set assignments of the Service release.
+            component_values (tuple): Values files and --set assignments of the component release (cold deployment).
+            app (str): 'app' label of the component (selected by the Service).
+            standby_app (str): 'app' label of the standby pods (set by the standby values).
+            size (int): Number of standby pods.
+            namespace (str): Namespace of the pool.
+        """
+        self.chart = chart
+        self.core_api = core_api
+        self.pod_informer = pod_informer
+        self.standby_release = standby_release
+        self.service_release = service_release
+        self.component_release = component_release
+        self.standby_values = standby_values
+        self.service_values = service_values
+        self.component_values = component_values
+        self.app = app
+        self.standby_app = standby_app
+        self.size = size
+        self.namespace = namespace
+        self.lock = threading.Lock()
+
+    def refill(self):
+        """
+        Creates the standby deployment and the Service of the component if they do not exist (e.g. at startup
+        or after the Service has been deleted with the federated component).
+        """
+        # The objects that already exist (e.g. created by a previous refill or before a restart) are kept
+        self.chart.install(self.standby_release, *self.standby_values, namespace=self.namespace, exist_ok=True)
+        self.chart.install(self.service_release, *self.service_values, namespace=self.namespace, exist_ok=True)
+        print(f"Warm pool of {self.app}: {len(self.ready_pods())}/{self.size} standby pods ready")
+
+    def refill_in_background(self):
+        """
+        Runs refill in a background thread.
+        """
+        def refill():
+            try:
+                self.refill()
+            except Exception as e:
+                print(f"Failed to refill the warm pool of {self.app}: {e}")
+
+        threading.Thread(target=refill, daemon=True).start()
+
+    def ready_pods(self):
+        """
+        Returns:
+            list: The standby pods that are ready to be claimed.
+        """
+        pods = self.pod_informer.list(namespace=self.namespace, labels={"app": self.standby_app})
+        return [pod for pod in pods if pod_ready(pod)]
+
+    def claim(self, count=1):
+        """
+        Moves ready standby pods into service by patching their labels.
+
+        Args:
+            count (int): Number of pods to claim.
+
+        Returns:
+            list: Names of the claimed pods (fewer than count if the pool does not have enough ready pods).
+        """
+        with self.lock:
+            claimed = []
+            for pod in self.ready_pods():
+                if len(claimed) == count:
+                    break
+                body = {"metadata": {
+                    "labels": {"app": self.app, RELEASE_LABEL: self.component_release},
+                    # Fails if the pod changed since it was read (e.g. it started terminating)
+                    "resourceVersion": pod.metadata.resource_version
+                }}
+                try:
+                    self.core_api.patch_namespaced_pod(pod.metadata.name, self.namespace, body)
+                except ApiException as e:
+                    if e.status != HTTP_CONFLICT:
+                        raise
+                    continue
+                claimed.append(pod.metadata.name)
+            print(f"Claimed standby pods of {self.app}: {claimed}")
+            return claimed
+
+    def deploy(self, replicas=1):
+        """
+        Deploys replicas of the component from cold, next to the pool (used when there are not enough ready
+        standby pods).
+
+        Args:
+            replicas (int): Number of replicas of the component.
+        """
+        self.refill()
+        files, set_values = self.component_values
+        self.chart.install(self.component_release, files, list(set_values) + [f"deployments[0].replicas={replicas}"],
+                           namespace=self.namespace)
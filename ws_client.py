@@ -0,0 +1,260 @@
+import asyncio
+import itertools
+import json
+import threading
+
+import websockets
+
+
+class JSONRPCError(Exception):
+    """
+    Raised when the Ethereum node answers a JSON-RPC request with an error object.
+    """
+
+    def __init__(self, error):
+        self.code = error.get('code')
+        self.message = error.get('message')
+        super().__init__(f"JSON-RPC error {self.code}: {self.message}")
+
+
+class WebsocketClient:
+    """
+    Minimal JSON-RPC client over a persistent websocket connection to the Ethereum node.
+
+    web3 5.x does not expose 'eth_subscribe' notifications, so this client keeps its own connection
+    on an asyncio event loop that runs in a background thread. Synchronous code (e.g. the FastAPI
+    thread pool) uses request() and subscribe(), which are safe to call from any thread.
+    """
+
+    def __init__(self, endpoint_uri, timeout=30):
+        """
+        Args:
+            endpoint_uri (str): Websocket URL of the Ethereum node (e.g. ws://10.5.50.70:3334).
+            timeout (int): Default timeout in seconds for requests issued from synchronous code.
+        """
+        self.endpoint_uri = endpoint_uri
+        self.timeout = timeout
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="ws-client", daemon=True)
+        self.conn = None
+        self.connect_lock = None
+        self.request_ids = itertools.count(1)
+        self.responses = {}      # request id -> asyncio.Future
+        self.subscriptions = {}  # node subscription id -> (subscription id, params, callback)
+        self.subscription_ids = {}  # subscription id (stable across reconnections) -> node subscription id
+        self.local_ids = itertools.count(1)
+        self.reconnect_callbacks = []
+
+    def start(self):
+        """
+        Starts the event loop thread and opens the websocket connection.
+        """
+        if not self.thread.is_alive():
+            self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._ensure_connected(), self.loop).result(self.timeout)
+
+    async def _ensure_connected(self):
+        if self.connect_lock is None:
+            self.connect_lock = asyncio.Lock()
+        async with self.connect_lock:
+            if self.conn is not None and not self.conn.closed:
+                return
+            self.conn = await websockets.connect(self.endpoint_uri, max_size=None)
+            self.loop.create_task(self._reader(self.conn))
+
+            # Subscriptions do not survive a reconnection, so they are issued again under new node IDs, mapped
+            # to the IDs the callers hold
+            previous = list(self.subscriptions.values())
+            self.subscriptions.clear()
+            for subscription_id, params, callback in previous:
+                node_subscription_id = await self._send('eth_subscribe', params)
+                self.subscriptions[node_subscription_id] = (subscription_id, params, callback)
+                self.subscription_ids[subscription_id] = node_subscription_id
+
+    def add_reconnect_callback(self, callback):
+        """
+        Registers a function called (without arguments, on the client event loop) after every reconnection,
+        e.g. to catch up with the notifications missed while the connection was down. It must not block.
+
+        Args:
+            callback (callable): The function.
+        """
+        self.reconnect_callbacks.append(callback)
+
+    async def _reconnect(self):
+        while self.subscriptions:
+            try:
+                await self._ensure_connected()
+                print(f"Reconnected to {self.endpoint_uri}")
+                for callback in self.reconnect_callbacks:
+                    try:
+                        callback()
+                    except Exception as e:
+                        print(f"Reconnection callback failed: {e}")
+                return
+            except Exception as e:
+                print(f"Reconnection to {self.endpoint_uri} failed: {e}")
+                await asyncio.sleep(1)
+
+    async def _reader(self, conn):
+        try:
+            async for raw in conn:
+                message = json.loads(raw)
+                for item in (message if isinstance(message, list) else [message]):
+                    self._dispatch(item)
+        except websockets.ConnectionClosed as e:
+            print(f"Websocket connection to {self.endpoint_uri} closed: {e}")
+        finally:
+            # Fail the requests that will never get an answer on this connection
+            for future in self.responses.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Websocket connection closed"))
+            self.responses.clear()
+            if self.subscriptions:
+                self.loop.create_task(self._reconnect())
+
+    def _dispatch(self, item):
+        if item.get('method') == 'eth_subscription':
+            params = item['params']
+            subscription = self.subscriptions.get(params['subscription'])
+            if subscription is None:
+                return
+            callback = subscription[2]
+            # A failing callback must not stop the reader of the connection
+            if asyncio.iscoroutinefunction(callback):
+                self.loop.create_task(self._run_callback(callback, params['result']))
+            else:
+                try:
+                    callback(params['result'])
+                except Exception as e:
+                    print(f"Subscription callback failed: {e}")
+            return
+
+        future = self.responses.pop(item.get('id'), None)
+        if future is None or future.done():
+            return
+        if 'error' in item:
+            future.set_exception(JSONRPCError(item['error']))
+        else:
+            future.set_result(item.get('result'))
+
+    @staticmethod
+    async def _run_callback(callback, result):
+        try:
+            await callback(result)
+        except Exception as e:
+            print(f"Subscription callback failed: {e}")
+
+    def _payload(self, method, params):
+        request_id = next(self.request_ids)
+        future = self.loop.create_future()
+        self.responses[request_id] = future
+        return {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}, future
+
+    async def _send(self, method, params):
+        payload, future = self._payload(method, params)
+        await self.conn.send(json.dumps(payload))
+        return await future
+
+    async def async_request(self, method, params=None):
+        """
+        Sends a JSON-RPC request from the client event loop.
+
+        Args:
+            method (str): JSON-RPC method (e.g. 'eth_getBlockByHash').
+            params (list): Method parameters.
+
+        Returns:
+            Any: The 'result' field of the response.
+        """
+        await self._ensure_connected()
+        return await self._send(method, params or [])
+
+    def request(self, method, params=None, timeout=None):
+        """
+        Sends a JSON-RPC request from synchronous code and waits for the result.
+
+        Args:
+            method (str): JSON-RPC method.
+            params (list): Method parameters.
+            timeout (int): Timeout in seconds (defaults to the client timeout).
+
+        Returns:
+            Any: The 'result' field of the response.
+        """
+        coroutine = self.async_request(method, params)
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout or self.timeout)
+
+    async def async_batch(self, calls):
+        """
+        Sends several JSON-RPC requests as a single batch from the client event loop.
+
+        Args:
+            calls (list): List of (method, params) tuples.
+
+        Returns:
+            list: One entry per call, in order. Failed calls hold the exception instead of the result.
+        """
+        await self._ensure_connected()
+        payloads, futures = [], []
+        for method, params in calls:
+            payload, future = self._payload(method, params)
+            payloads.append(payload)
+            futures.append(future)
+        await self.conn.send(json.dumps(payloads))
+        return await asyncio.gather(*futures, return_exceptions=True)
+
+    def batch(self, calls, timeout=None):
+        """
+        Sends several JSON-RPC requests in one websocket round trip and splits the responses back in order.
+
+        Args:
+            calls (list): List of (method, params) tuples.
+            timeout (int): Timeout in seconds (defaults to the client timeout).
+
+        Returns:
+            list: One entry per call, in order. Failed calls hold the exception instead of the result.
+        """
+        if not calls:
+            return []
+        coroutine = self.async_batch(calls)
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout or self.timeout)
+
+    async def _subscribe(self, params, callback):
+        node_subscription_id = await self.async_request('eth_subscribe', params)
+        subscription_id = f"local-{next(self.local_ids)}"
+        self.subscriptions[node_subscription_id] = (subscription_id, params, callback)
+        self.subscription_ids[subscription_id] = node_subscription_id
+        return subscription_id
+
+    def subscribe(self, params, callback):
+        """
+        Creates an 'eth_subscribe' subscription. The callback runs on the client event loop and
+        receives the 'result' field of every notification; it can be a plain function or a coroutine
+        function, and must not block.
+
+        Args:
+            params (list): Subscription parameters (e.g. ['newHeads'] or ['logs', {...}]).
+            callback (callable): Function called for every notification.
+
+        Returns:
+            str: The subscription id (it stays the same when the subscription is issued again after a reconnection).
+        """
+        coroutine = self._subscribe(params, callback)
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(self.timeout)
+
+    def unsubscribe(self, subscription_id):
+        """
+        Cancels an 'eth_subscribe' subscription.
+
+        Args:
+            subscription_id (str): The subscription id returned by subscribe().
+        """
+        node_subscription_id = self.subscription_ids.pop(subscription_id, None)
+        if node_subscription_id is None:
+            return
+        self.subscriptions.pop(node_subscription_id, None)
+        try:
+            self.request('eth_unsubscribe', [node_subscription_id])
+        except Exception as e:
+            print(f"Failed to cancel subscription {subscription_id}: {e}")